@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""
+Бенчмарк размера индекса на диске
+
+Индексирует синтетический репозиторий в каждом доступном режиме хранилища
+и сравнивает размер .seditor/ с хранением текстов файлов в индексе (как
+было раньше: documents в upsert) и без него. Для квантованных и IVF-хранилищ
+тексты не сохранялись и раньше, поэтому сравнение до/после имеет смысл для
+Chroma; без chromadb печатается объём текстов, который Chroma хранила бы
+второй копией.
+
+Запуск:
+    python -m benchmarks.bench_index_size [--files N]
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from typing import Dict, List
+
+from benchmarks.synthetic_repo import generate_repo
+
+
+def directory_size(path: str) -> int:
+    """Суммарный размер файлов директории"""
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for name in filenames:
+            try:
+                total += os.path.getsize(os.path.join(dirpath, name))
+            except OSError:
+                pass
+    return total
+
+
+def _indexer_class(with_documents: bool):
+    """SemanticIndexer; with_documents - прежнее поведение с текстами в хранилище"""
+    from seditor.search.semantic_indexer import SemanticIndexer
+
+    class MeasuredIndexer(SemanticIndexer):
+        document_bytes = 0
+
+        def _upsert_batch(self, ids, documents, metadatas):
+            MeasuredIndexer.document_bytes += sum(len(d.encode('utf-8')) for d in documents)
+            if not with_documents:
+                return super()._upsert_batch(ids, documents, metadatas)
+            embeddings = self._model.encode(documents, show_progress_bar=False)
+            self._collection.upsert(ids=ids, embeddings=embeddings.tolist(), documents=documents,
+                                    metadatas=[self._store_metadata(m) for m in metadatas])
+
+    return MeasuredIndexer
+
+
+def available_modes() -> List[str]:
+    """Режимы индекса, доступные в окружении"""
+    from seditor.search.semantic_indexer import INDEX_MODES
+
+    modes = list(INDEX_MODES)
+    try:
+        import chromadb  # noqa: F401
+    except ImportError:
+        modes.remove('chroma')
+    return modes
+
+
+def measure_index_size(root: str, modes: List[str]) -> Dict[str, dict]:
+    """
+    Проиндексировать репозиторий в каждом режиме и измерить .seditor/
+
+    Returns:
+        Словарь 'режим' / 'режим+documents' -> bytes, seconds, document_bytes
+    """
+    from seditor.search.embeddings import HashingEmbedder
+
+    seditor_dir = os.path.join(root, '.seditor')
+    variants = [(mode, False) for mode in modes]
+    if 'chroma' in modes:
+        variants.insert(0, ('chroma', True))
+
+    results = {}
+    for mode, with_documents in variants:
+        shutil.rmtree(seditor_dir, ignore_errors=True)
+        indexer_class = _indexer_class(with_documents)
+        indexer_class.document_bytes = 0
+        indexer = indexer_class(root, embedder=HashingEmbedder(), index_mode=mode)
+        began = time.perf_counter()
+        indexer.index_directory()
+        seconds = time.perf_counter() - began
+        name = f'{mode}+documents' if with_documents else mode
+        results[name] = {
+            'bytes': directory_size(seditor_dir),
+            'seconds': seconds,
+            'entries': indexer.get_indexed_count(),
+            'document_bytes': indexer_class.document_bytes,
+        }
+    shutil.rmtree(seditor_dir, ignore_errors=True)
+    return results
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--files', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix='seditor-bench-') as root:
+        generate_repo(root, files=args.files, seed=args.seed)
+        results = measure_index_size(root, available_modes())
+
+    print(f"{'index':18s} {'entries':>8s} {'size KB':>10s} {'B/entry':>9s} {'index s':>8s}")
+    for name, result in results.items():
+        per_entry = result['bytes'] / max(1, result['entries'])
+        print(f"{name:18s} {result['entries']:8d} {result['bytes'] / 1024:10.1f} "
+              f"{per_entry:9.0f} {result['seconds']:8.2f}")
+    document_bytes = max(result['document_bytes'] for result in results.values())
+    print(f'Тексты файлов (вторая копия при хранении documents): {document_bytes / 1024:.1f} KB')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""
+Бенчмарк объёма вывода панели дерева: полная перерисовка против диффа кадров
+
+Запуск: python -m benchmarks.bench_render [--files N] [--steps N]
+"""
+
+import argparse
+import os
+import tempfile
+
+from seditor.components.file_tree import FileTreePane
+from seditor.terminal.layout import Layout
+from seditor.terminal.screen import DiffRenderer
+
+
+def measure_tree_render_bytes(root_path: str, steps: int = 100,
+                              width: int = 160, height: int = 48) -> dict:
+    """
+    Прогнать навигацию по дереву и посчитать байты вывода
+
+    Args:
+        root_path: Директория для дерева
+        steps: Количество перемещений выделения
+        width: Ширина терминала
+        height: Высота терминала
+
+    Returns:
+        Словарь с байтами на кадр для полной перерисовки и диффа
+    """
+    pane = FileTreePane(Layout(width, height), root_path)
+    full_renderer = DiffRenderer()
+    diff_renderer = DiffRenderer()
+
+    for step in range(steps):
+        full_renderer.invalidate()
+        pane.render(full_renderer, focused=True)
+        pane.render(diff_renderer, focused=True)
+        if step % 20 == 19:
+            pane.expand_directory()
+        pane.move_down()
+
+    frames = max(1, diff_renderer.frames_rendered)
+    return {
+        'frames': frames,
+        'full_bytes_per_frame': full_renderer.bytes_written / frames,
+        'diff_bytes_per_frame': diff_renderer.bytes_written / frames,
+    }
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--files', type=int, default=200)
+    parser.add_argument('--steps', type=int, default=100)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as root:
+        for i in range(args.files):
+            sub = os.path.join(root, f'pkg_{i % 10}') if i % 3 else root
+            os.makedirs(sub, exist_ok=True)
+            with open(os.path.join(sub, f'module_{i:04d}.py'), 'w') as f:
+                f.write('x = 1\n')
+        result = measure_tree_render_bytes(root, steps=args.steps)
+
+    ratio = result['full_bytes_per_frame'] / max(1.0, result['diff_bytes_per_frame'])
+    print(f"frames:              {result['frames']}")
+    print(f"full redraw, B/frame: {result['full_bytes_per_frame']:.0f}")
+    print(f"diff,        B/frame: {result['diff_bytes_per_frame']:.0f}")
+    print(f"reduction:           {ratio:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
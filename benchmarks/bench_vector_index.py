@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+"""
+Бенчмарк векторных индексов: полнота (recall@k), задержка и размер
+
+Эталон - точный поиск по float32. Для квантованных индексов векторы -
+хэширующие эмбеддинги файлов синтетического репозитория, запросы - фрагменты
+случайных файлов. Для IVF генерируются кластеризованные векторы, чтобы
+проверить масштаб в сотни тысяч записей.
+
+Запуск:
+    python -m benchmarks.bench_vector_index [--files N] [--queries N]
+    python -m benchmarks.bench_vector_index --ann --vectors 200000
+"""
+
+import argparse
+import random
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from benchmarks.synthetic_repo import generate_repo
+
+
+def build_vectors(root: str, files: int, queries: int, seed: int = 0,
+                  dimension: int = 384) -> Tuple[List[str], np.ndarray, np.ndarray]:
+    """
+    Сгенерировать репозиторий и эмбеддинги файлов и запросов
+
+    Returns:
+        (пути файлов, векторы файлов, векторы запросов)
+    """
+    from seditor.search.embeddings import HashingEmbedder
+
+    repo = generate_repo(root, files=files, seed=seed)
+    embedder = HashingEmbedder(dimension=dimension)
+    texts = []
+    for path in repo.files:
+        with open(path, encoding='utf-8') as f:
+            texts.append(f.read())
+    vectors = embedder.encode(texts)
+
+    rng = random.Random(seed)
+    query_texts = []
+    for _ in range(queries):
+        words = rng.choice(texts).split()
+        start = rng.randrange(max(1, len(words) - 8))
+        query_texts.append(' '.join(words[start:start + 8]))
+    return repo.files, vectors, embedder.encode(query_texts)
+
+
+def exact_top_k(vectors: np.ndarray, queries: np.ndarray, k: int) -> List[set]:
+    """Точные k ближайших по L2 для каждого запроса"""
+    result = []
+    for query in queries:
+        distances = ((vectors - query) ** 2).sum(axis=1)
+        result.append(set(np.argsort(distances)[:k].tolist()))
+    return result
+
+
+def measure_index(query: Callable[[np.ndarray], List[int]], queries: np.ndarray,
+                  truth: List[set], k: int) -> Dict[str, float]:
+    """
+    Полнота и задержка индекса
+
+    Args:
+        query: Функция запрос -> номера найденных векторов
+        queries: Векторы запросов
+        truth: Эталонные множества (см. exact_top_k)
+        k: Глубина выдачи
+
+    Returns:
+        recall_at_k, p50_ms, p99_ms
+    """
+    hits = 0
+    samples = []
+    for vector, expected in zip(queries, truth):
+        began = time.perf_counter()
+        found = query(vector)
+        samples.append((time.perf_counter() - began) * 1000)
+        hits += len(expected & set(found[:k]))
+    samples.sort()
+    return {
+        'recall_at_k': hits / (k * len(queries)),
+        'p50_ms': samples[len(samples) // 2],
+        'p99_ms': samples[min(len(samples) - 1, int(len(samples) * 0.99))],
+    }
+
+
+def measure_quantized(vectors: np.ndarray, queries: np.ndarray, k: int = 10,
+                      rerank_factor: Optional[int] = None) -> Dict[str, dict]:
+    """
+    Сравнить точный поиск с квантованными хранилищами
+
+    Args:
+        vectors: Векторы индекса
+        queries: Векторы запросов
+        k: Глубина выдачи
+        rerank_factor: Множитель кандидатов (по умолчанию - значение хранилища для режима)
+
+    Returns:
+        Словарь режим -> recall_at_k, p50_ms, p99_ms, resident_bytes
+    """
+    from benchmarks.stubs import MemoryCollection
+    from seditor.search.quantization import QuantizedVectorStore
+
+    truth = exact_top_k(vectors, queries, k)
+    ids = [str(i) for i in range(len(vectors))]
+    results = {}
+
+    exact = MemoryCollection()
+    exact.upsert(ids, vectors, [{} for _ in ids])
+    results['float32'] = measure_index(
+        lambda q: [int(i) for i in exact.query([q], n_results=k)['ids'][0]], queries, truth, k)
+    results['float32']['resident_bytes'] = vectors.astype(np.float32).nbytes
+
+    for mode in QuantizedVectorStore.MODES:
+        with tempfile.TemporaryDirectory() as directory:
+            store = QuantizedVectorStore(directory, mode=mode, rerank_factor=rerank_factor)
+            store.upsert(ids, vectors, [{} for _ in ids])
+            store.flush()
+            results[mode] = measure_index(
+                lambda q: [int(i) for i in store.query([q], n_results=k)['ids'][0]], queries, truth, k)
+            results[mode]['resident_bytes'] = store.memory_usage()
+    return results
+
+
+def generate_clustered_vectors(count: int, dimension: int = 384, clusters: int = 256,
+                               noise: float = 0.8, seed: int = 0) -> np.ndarray:
+    """
+    Сгенерировать нормированные векторы, сгруппированные вокруг случайных центров
+
+    Returns:
+        Матрица (count, dimension), float32
+    """
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dimension))
+    vectors = centers[rng.integers(0, clusters, count)] + rng.normal(scale=noise, size=(count, dimension))
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors.astype(np.float32)
+
+
+def measure_ann(vectors: np.ndarray, queries: np.ndarray, k: int = 10,
+                nprobes=(1, 4, 8, 16, 32)) -> Dict[str, dict]:
+    """
+    Сравнить точный поиск с IVF при разных nprobe
+
+    Returns:
+        Словарь 'exact' / 'ivf_nprobe_N' -> recall_at_k, p50_ms, p99_ms
+    """
+    from seditor.search.ann import IVFVectorStore
+
+    truth = exact_top_k(vectors, queries, k)
+    results = {'exact': measure_index(
+        lambda q: np.argsort(((vectors - q) ** 2).sum(axis=1))[:k].tolist(), queries, truth, k)}
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = IVFVectorStore(directory)
+        ids = [str(i) for i in range(len(vectors))]
+        began = time.perf_counter()
+        store.upsert(ids, vectors)
+        store.train()
+        results['ivf_build'] = {'seconds': time.perf_counter() - began, 'lists': len(store._centroids)}
+        for nprobe in nprobes:
+            store.nprobe = nprobe
+            results[f'ivf_nprobe_{nprobe}'] = measure_index(
+                lambda q: [int(i) for i in store.query([q], n_results=k)['ids'][0]], queries, truth, k)
+    return results
+
+
+def _print_table(results: Dict[str, dict], k: int) -> None:
+    base = results.get('float32', {}).get('resident_bytes')
+    print(f"{'index':14s} {'recall@' + str(k):>10s} {'p50 ms':>8s} {'p99 ms':>8s} {'size':>10s}")
+    for name, result in results.items():
+        if 'recall_at_k' not in result:
+            continue
+        size = f"{base / max(1, result['resident_bytes']):9.1f}x" if base else ''
+        print(f"{name:14s} {result['recall_at_k']:10.3f} {result['p50_ms']:8.2f} {result['p99_ms']:8.2f} {size}")
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--files', type=int, default=5000)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--rerank-factor', type=int, default=None,
+                        help='Множитель кандидатов для доранжирования')
+    parser.add_argument('--ann', action='store_true', help='Сравнить IVF с точным поиском')
+    parser.add_argument('--vectors', type=int, default=100000, help='Количество векторов для --ann')
+    parser.add_argument('--dimension', type=int, default=384, help='Размерность векторов для --ann')
+    args = parser.parse_args(argv)
+
+    if args.ann:
+        data = generate_clustered_vectors(args.vectors + args.queries, args.dimension, seed=args.seed)
+        results = measure_ann(data[:args.vectors], data[args.vectors:], k=args.k)
+        build = results['ivf_build']
+        print(f"IVF build: {build['seconds']:.1f}s, {build['lists']} lists")
+        _print_table(results, args.k)
+        return
+
+    with tempfile.TemporaryDirectory(prefix='seditor-bench-') as root:
+        _, vectors, queries = build_vectors(root, args.files, args.queries, seed=args.seed)
+
+    results = measure_quantized(vectors, queries, k=args.k, rerank_factor=args.rerank_factor)
+    _print_table(results, args.k)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,327 @@
+# -*- coding: utf-8 -*-
+"""
+Набор бенчмарков горячих путей seditor на синтетическом репозитории
+
+Запуск:
+    python -m benchmarks.run --files 2000 --output before.json
+    python -m benchmarks.run --files 2000 --output after.json --compare before.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from benchmarks.synthetic_repo import RepoStats, generate_repo
+
+# Зарегистрированные бенчмарки: (имя, функция(ctx) -> (замер, кол-во повторов или None))
+BENCHMARKS: List[Tuple[str, Callable]] = []
+
+SEARCH_QUERIES = [
+    'user session token', 'render tree layout', 'payment invoice order',
+    'vector embedding score', 'parser lexer event', 'queue worker batch',
+]
+
+
+def benchmark(name: str):
+    """Декоратор регистрации бенчмарка"""
+    def decorator(func: Callable) -> Callable:
+        BENCHMARKS.append((name, func))
+        return func
+    return decorator
+
+
+def _time_calls(func: Callable[[], object], repeat: int) -> Dict[str, float]:
+    """
+    Выполнить функцию repeat раз и собрать статистику
+
+    Returns:
+        Словарь min/median/mean в миллисекундах
+    """
+    samples = []
+    for _ in range(repeat):
+        began = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - began) * 1000)
+    return {
+        'min_ms': min(samples),
+        'median_ms': statistics.median(samples),
+        'mean_ms': statistics.fmean(samples),
+        'repeat': repeat,
+    }
+
+
+class Context:
+    """Общее состояние бенчмарков: сгенерированный репозиторий и параметры"""
+
+    def __init__(self, repo: RepoStats, repeat: int):
+        self.repo = repo
+        self.repeat = repeat
+        self.root = repo.root
+
+
+@benchmark('fs.scan_directory')
+def bench_scan_directory(ctx: Context) -> Dict[str, float]:
+    from seditor.utils.file_utils import scan_directory
+
+    def run():
+        for directory in ctx.repo.directories:
+            scan_directory(directory)
+    return _time_calls(run, ctx.repeat)
+
+
+def _expanded_tree(root: str):
+    """Дерево с раскрытыми всеми директориями"""
+    from seditor.core.file_tree import FileTree
+
+    tree = FileTree(root)
+    stack = list(tree.root.children)
+    while stack:
+        node = stack.pop()
+        if node.is_dir:
+            node.expand()
+            stack.extend(node.children)
+    return tree
+
+
+@benchmark('tree.get_visible_items')
+def bench_visible_items(ctx: Context) -> Dict[str, float]:
+    tree = _expanded_tree(ctx.root)
+    return _time_calls(tree.get_visible_items, ctx.repeat)
+
+
+@benchmark('tree.navigate_200')
+def bench_navigation(ctx: Context) -> Dict[str, float]:
+    tree = _expanded_tree(ctx.root)
+
+    def run():
+        tree.selected_index = 0
+        for _ in range(200):
+            tree.move_down()
+        tree.get_selected_item()
+    return _time_calls(run, ctx.repeat)
+
+
+@benchmark('tree_pane.get_display_lines')
+def bench_display_lines(ctx: Context) -> Dict[str, float]:
+    from seditor.components.file_tree import FileTreePane
+    from seditor.terminal.layout import Layout
+
+    pane = FileTreePane(Layout(160, 50), ctx.root)
+    pane.tree = _expanded_tree(ctx.root)
+    pane.tree.selected_index = len(pane.tree.get_visible_items()) // 2
+    return _time_calls(lambda: pane.get_display_lines(max_lines=48, max_width=38), ctx.repeat)
+
+
+def _largest_file(ctx: Context) -> str:
+    return max(ctx.repo.files, key=os.path.getsize)
+
+
+@benchmark('editor.load_file')
+def bench_load_file(ctx: Context) -> Dict[str, float]:
+    from seditor.components.editor_ptk import EditorPanePTK
+    from seditor.terminal.layout import Layout
+
+    editor = EditorPanePTK(Layout(160, 50))
+    path = _largest_file(ctx)
+    return _time_calls(lambda: editor.load_file(path), ctx.repeat)
+
+
+@benchmark('editor.save_file')
+def bench_save_file(ctx: Context) -> Dict[str, float]:
+    from seditor.components.editor_ptk import EditorPanePTK
+    from seditor.terminal.layout import Layout
+
+    editor = EditorPanePTK(Layout(160, 50))
+    editor.load_file(_largest_file(ctx))
+
+    def run():
+        editor.buffer.insert_text('#')
+        editor.save_file()
+    return _time_calls(run, ctx.repeat)
+
+
+def _make_indexer(root: str):
+    """Индексатор с хэширующим эмбеддером (и хранилищем в памяти, если chromadb не установлен)"""
+    from benchmarks.stubs import MemoryCollection
+    from seditor.search.embeddings import HashingEmbedder
+    from seditor.search.semantic_indexer import SemanticIndexer
+
+    indexer = SemanticIndexer(root, embedder=HashingEmbedder())
+    try:
+        import chromadb  # noqa: F401
+    except ImportError:
+        indexer._client = object()
+        indexer._collection = MemoryCollection()
+    return indexer
+
+
+@benchmark('indexer.collect_files')
+def bench_collect_files(ctx: Context) -> Dict[str, float]:
+    indexer = _make_indexer(ctx.root)
+    return _time_calls(indexer._collect_files, ctx.repeat)
+
+
+@benchmark('indexer.index_directory')
+def bench_index_directory(ctx: Context) -> Dict[str, float]:
+    indexers = []
+
+    def run():
+        indexers.append(_make_indexer(ctx.root))
+        indexers[-1].index_directory()
+    result = _time_calls(run, max(1, ctx.repeat // 2))
+    result['files_per_sec'] = len(ctx.repo.files) / (result['median_ms'] / 1000)
+    result['index_entries'] = indexers[-1].get_indexed_count()
+    return result
+
+
+@benchmark('indexer.reindex_unchanged')
+def bench_reindex_unchanged(ctx: Context) -> Dict[str, float]:
+    """Повторный проход по неизменённому репозиторию (по контрольной точке, без эмбеддингов)"""
+    indexer = _make_indexer(ctx.root)
+    indexer.index_directory()
+    return _time_calls(indexer.index_directory, ctx.repeat)
+
+
+@benchmark('indexer.search')
+def bench_search(ctx: Context) -> Dict[str, float]:
+    indexer = _make_indexer(ctx.root)
+    indexer.index_directory()
+
+    def run():
+        for query in SEARCH_QUERIES:
+            indexer.search(query, top_k=10)
+    result = _time_calls(run, ctx.repeat)
+    result['per_query_ms'] = result['median_ms'] / len(SEARCH_QUERIES)
+    return result
+
+
+@benchmark('tree_pane.render_diff_bytes')
+def bench_render_bytes(ctx: Context) -> Dict[str, float]:
+    from benchmarks.bench_render import measure_tree_render_bytes
+
+    return measure_tree_render_bytes(ctx.root, steps=100)
+
+
+@benchmark('index.quantized')
+def bench_quantized(ctx: Context) -> Dict[str, float]:
+    from benchmarks.bench_vector_index import build_vectors, measure_quantized
+
+    with tempfile.TemporaryDirectory(prefix='seditor-bench-') as root:
+        _, vectors, queries = build_vectors(root, len(ctx.repo.files), queries=50)
+    results = measure_quantized(vectors, queries)
+    return {
+        f'{mode}_{key}': value
+        for mode, result in results.items()
+        for key, value in result.items()
+        if key in ('recall_at_k', 'p50_ms')
+    }
+
+
+def run_benchmarks(ctx: Context, only: Optional[str] = None) -> Dict[str, dict]:
+    """
+    Выполнить бенчмарки
+
+    Args:
+        ctx: Контекст с репозиторием
+        only: Префикс имени для выборочного запуска
+
+    Returns:
+        Словарь имя -> результаты
+    """
+    results = {}
+    for name, func in BENCHMARKS:
+        if only and not name.startswith(only):
+            continue
+        try:
+            results[name] = func(ctx)
+        except ImportError as e:
+            results[name] = {'skipped': str(e)}
+        print(f'{name:32s} {_summary(results[name])}', file=sys.stderr)
+    return results
+
+
+def _summary(result: dict) -> str:
+    if 'skipped' in result:
+        return f"skipped: {result['skipped']}"
+    if 'median_ms' in result:
+        return f"median {result['median_ms']:9.2f} ms  min {result['min_ms']:9.2f} ms"
+    return ', '.join(f'{k}={v:.1f}' for k, v in result.items())
+
+
+def _git_commit() -> Optional[str]:
+    """Текущий коммит рабочей копии (без вызова git)"""
+    git_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.git')
+    try:
+        with open(os.path.join(git_dir, 'HEAD')) as f:
+            head = f.read().strip()
+        if head.startswith('ref: '):
+            with open(os.path.join(git_dir, head[5:])) as f:
+                return f.read().strip()
+        return head
+    except OSError:
+        return None
+
+
+def compare(base: dict, current: dict) -> None:
+    """Вывести изменение медиан относительно базового прогона"""
+    print(f"\nсравнение с {base['meta'].get('commit', '?')[:10]}:")
+    for name, result in current['results'].items():
+        old = base['results'].get(name, {})
+        if 'median_ms' in result and 'median_ms' in old and old['median_ms'] > 0:
+            change = (result['median_ms'] - old['median_ms']) / old['median_ms'] * 100
+            print(f"  {name:32s} {old['median_ms']:9.2f} -> {result['median_ms']:9.2f} ms ({change:+.1f}%)")
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description='Бенчмарки seditor')
+    parser.add_argument('--files', type=int, default=2000, help='Количество файлов')
+    parser.add_argument('--depth', type=int, default=3, help='Глубина дерева директорий')
+    parser.add_argument('--fanout', type=int, default=4, help='Ветвление директорий')
+    parser.add_argument('--seed', type=int, default=0, help='Зерно генератора')
+    parser.add_argument('--duplicates', type=float, default=0.0,
+                        help='Доля файлов с содержимым, повторяющим другие файлы')
+    parser.add_argument('--repeat', type=int, default=5, help='Повторов каждого замера')
+    parser.add_argument('--only', default=None, help='Префикс имени бенчмарка')
+    parser.add_argument('--output', default=None, help='Файл для JSON-результатов')
+    parser.add_argument('--compare', default=None, help='JSON предыдущего прогона для сравнения')
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix='seditor-bench-') as root:
+        repo = generate_repo(root, files=args.files, depth=args.depth,
+                             fanout=args.fanout, seed=args.seed,
+                             duplicate_ratio=args.duplicates)
+        results = run_benchmarks(Context(repo, args.repeat), only=args.only)
+
+    report = {
+        'meta': {
+            'commit': _git_commit(),
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'params': vars(args),
+            'repo': {'files': len(repo.files), 'directories': len(repo.directories),
+                     'bytes': repo.total_bytes},
+        },
+        'results': results,
+    }
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    else:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            compare(json.load(f), report)
+
+
+if __name__ == '__main__':
+    main()
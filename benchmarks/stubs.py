@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""
+Заглушка векторного хранилища для бенчмарков без chromadb
+"""
+
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+class MemoryCollection:
+    """Коллекция в памяти с подмножеством API chromadb (точный поиск по L2)"""
+
+    def __init__(self):
+        self._ids: List[str] = []
+        self._positions: Dict[str, int] = {}
+        self._vectors: List[np.ndarray] = []
+        self._metadatas: List[dict] = []
+
+    def count(self) -> int:
+        return len(self._ids)
+
+    def upsert(self, ids, embeddings, metadatas, documents: Optional[List[str]] = None) -> None:
+        for item_id, vector, metadata in zip(ids, embeddings, metadatas):
+            vector = np.asarray(vector, dtype=np.float32)
+            position = self._positions.get(item_id)
+            if position is None:
+                self._positions[item_id] = len(self._ids)
+                self._ids.append(item_id)
+                self._vectors.append(vector)
+                self._metadatas.append(metadata)
+            else:
+                self._vectors[position] = vector
+                self._metadatas[position] = metadata
+
+    def update(self, ids, metadatas) -> None:
+        for item_id, metadata in zip(ids, metadatas):
+            position = self._positions.get(item_id)
+            if position is not None:
+                self._metadatas[position] = metadata
+
+    def get(self, ids=None, include=None) -> dict:
+        if ids is None:
+            ids = self._ids
+        positions = [self._positions[i] for i in ids if i in self._positions]
+        return {
+            'ids': [self._ids[p] for p in positions],
+            'metadatas': [self._metadatas[p] for p in positions],
+        }
+
+    def delete(self, ids) -> None:
+        removed = set(ids)
+        keep = [p for p, item_id in enumerate(self._ids) if item_id not in removed]
+        self._ids = [self._ids[p] for p in keep]
+        self._vectors = [self._vectors[p] for p in keep]
+        self._metadatas = [self._metadatas[p] for p in keep]
+        self._positions = {item_id: p for p, item_id in enumerate(self._ids)}
+
+    def query(self, query_embeddings, n_results: int = 10) -> dict:
+        matrix = np.vstack(self._vectors)
+        query = np.asarray(query_embeddings[0], dtype=np.float32)
+        distances = ((matrix - query) ** 2).sum(axis=1)
+        order = np.argsort(distances)[:n_results]
+        return {
+            'ids': [[self._ids[i] for i in order]],
+            'metadatas': [[self._metadatas[i] for i in order]],
+            'distances': [[float(distances[i]) for i in order]],
+        }
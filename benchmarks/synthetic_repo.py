@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+"""
+Детерминированный генератор синтетических репозиториев для бенчмарков
+"""
+
+import os
+import random
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+# Слова для идентификаторов и текста: фиксированный словарь даёт
+# одинаковый результат на любой машине при одинаковом seed
+VOCABULARY = [
+    'user', 'account', 'session', 'token', 'cache', 'index', 'search', 'query',
+    'file', 'tree', 'node', 'buffer', 'render', 'layout', 'theme', 'style',
+    'config', 'loader', 'parser', 'lexer', 'event', 'handler', 'request', 'response',
+    'client', 'server', 'worker', 'queue', 'task', 'job', 'batch', 'chunk',
+    'vector', 'matrix', 'model', 'embedding', 'score', 'rank', 'filter', 'merge',
+    'path', 'root', 'item', 'entry', 'record', 'table', 'column', 'schema',
+    'payment', 'invoice', 'order', 'cart', 'product', 'price', 'discount', 'shipping',
+]
+
+# Шаблоны по языкам: (расширение, заголовок, блок с плейсхолдерами {a} {b} {c})
+LANGUAGES: Dict[str, Tuple[str, str, str]] = {
+    'python': (
+        '.py',
+        '# -*- coding: utf-8 -*-\n"""Module for {a} {b}"""\n\nimport os\n\n',
+        'def {a}_{b}({c}, limit=10):\n    """Return {a} for {c}"""\n'
+        '    result = [{c} for _ in range(limit)]\n    return result\n\n',
+    ),
+    'javascript': (
+        '.js',
+        '// {a} {b} module\n\n',
+        'export function {a}{B}({c}) {{\n  const items = [];\n'
+        '  for (let i = 0; i < {c}.length; i++) {{ items.push({c}[i]); }}\n  return items;\n}}\n\n',
+    ),
+    'typescript': (
+        '.ts',
+        '// {a} {b} service\n\n',
+        'export interface {A}{B} {{\n  {c}: string;\n  count: number;\n}}\n\n'
+        'export const {a}{B} = ({c}: string): number => {c}.length;\n\n',
+    ),
+    'go': (
+        '.go',
+        'package {a}\n\nimport "fmt"\n\n',
+        'func {A}{B}({c} string) int {{\n\tfmt.Println({c})\n\treturn len({c})\n}}\n\n',
+    ),
+    'rust': (
+        '.rs',
+        '//! {a} {b} crate\n\n',
+        'pub fn {a}_{b}({c}: &str) -> usize {{\n    {c}.len()\n}}\n\n',
+    ),
+    'markdown': (
+        '.md',
+        '# {A} {B}\n\n',
+        '## {A} {c}\n\nThe {a} handles {b} and {c} for every request.\n\n',
+    ),
+    'json': (
+        '.json',
+        '',
+        '',
+    ),
+    'yaml': (
+        '.yaml',
+        '# {a} {b} settings\n',
+        '{a}_{b}:\n  {c}: true\n  limit: 10\n',
+    ),
+}
+
+
+class RepoStats(NamedTuple):
+    """Итоги генерации"""
+    root: str
+    files: List[str]
+    directories: List[str]
+    total_bytes: int
+    by_language: Dict[str, int]
+
+
+def _words(rng: random.Random) -> Dict[str, str]:
+    """Подобрать слова для подстановки в шаблон"""
+    a, b, c = rng.sample(VOCABULARY, 3)
+    return {'a': a, 'b': b, 'c': c, 'A': a.capitalize(), 'B': b.capitalize()}
+
+
+def _render_content(language: str, size: int, rng: random.Random) -> str:
+    """Сгенерировать содержимое файла примерно заданного размера"""
+    _, header, block = LANGUAGES[language]
+    if language == 'json':
+        parts = ['{\n']
+        while sum(len(p) for p in parts) < size:
+            words = _words(rng)
+            parts.append(f'  "{words["a"]}_{words["b"]}_{len(parts)}": "{words["c"]}",\n')
+        parts.append('  "end": true\n}\n')
+        return ''.join(parts)
+
+    parts = [header.format(**_words(rng))]
+    length = len(parts[0])
+    while length < size:
+        chunk = block.format(**_words(rng))
+        parts.append(chunk)
+        length += len(chunk)
+    return ''.join(parts)
+
+
+def _build_directories(depth: int, fanout: int) -> List[str]:
+    """Относительные пути директорий: полное дерево глубины depth с ветвлением fanout"""
+    directories = ['']
+    level = ['']
+    for d in range(depth):
+        next_level = []
+        for parent in level:
+            for i in range(fanout):
+                name = f'{VOCABULARY[(d * fanout + i) % len(VOCABULARY)]}_{d}{i}'
+                path = os.path.join(parent, name) if parent else name
+                next_level.append(path)
+        directories.extend(next_level)
+        level = next_level
+    return directories
+
+
+def generate_repo(
+    root: str,
+    files: int = 1000,
+    depth: int = 3,
+    fanout: int = 4,
+    seed: int = 0,
+    languages: Optional[Sequence[str]] = None,
+    size_range: Tuple[int, int] = (200, 20000),
+    duplicate_ratio: float = 0.0,
+) -> RepoStats:
+    """
+    Создать синтетический репозиторий
+
+    Размеры файлов распределены лог-равномерно в size_range, поэтому
+    получается много маленьких файлов и немного крупных, как в реальных проектах.
+
+    Args:
+        root: Директория, в которой создаётся репозиторий
+        files: Количество файлов
+        depth: Глубина дерева директорий
+        fanout: Количество поддиректорий у каждой директории
+        seed: Зерно генератора (одинаковый seed - одинаковое дерево)
+        languages: Подмножество ключей LANGUAGES (по умолчанию все)
+        size_range: Минимальный и максимальный размер файла в байтах
+        duplicate_ratio: Доля файлов, копирующих содержимое более раннего файла
+            того же языка (вендоринг, сгенерированный код, одинаковые конфиги)
+
+    Returns:
+        RepoStats со списком созданных файлов и директорий
+    """
+    rng = random.Random(seed)
+    languages = list(languages or LANGUAGES)
+    directories = _build_directories(depth, fanout)
+    for rel_dir in directories:
+        os.makedirs(os.path.join(root, rel_dir), exist_ok=True)
+
+    low, high = size_range
+    created: List[str] = []
+    by_language: Dict[str, int] = {}
+    total_bytes = 0
+    contents_by_language: Dict[str, List[str]] = {}
+
+    for i in range(files):
+        language = languages[i % len(languages)]
+        rel_dir = rng.choice(directories)
+        ext = LANGUAGES[language][0]
+        name = f'{rng.choice(VOCABULARY)}_{i:05d}{ext}'
+        size = int(low * (high / low) ** rng.random()) if high > low else low
+        previous = contents_by_language.get(language)
+        if duplicate_ratio and previous and rng.random() < duplicate_ratio:
+            content = rng.choice(previous)
+        else:
+            content = _render_content(language, size, rng)
+            if duplicate_ratio:
+                contents_by_language.setdefault(language, []).append(content)
+
+        path = os.path.join(root, rel_dir, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+
+        created.append(path)
+        by_language[language] = by_language.get(language, 0) + 1
+        total_bytes += len(content.encode('utf-8'))
+
+    return RepoStats(
+        root=root,
+        files=created,
+        directories=[os.path.join(root, d) if d else root for d in directories],
+        total_bytes=total_bytes,
+        by_language=by_language,
+    )
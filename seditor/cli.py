@@ -0,0 +1,257 @@
+# -*- coding: utf-8 -*-
+"""
+Команды без интерфейса: seditor index и seditor search
+
+Работают с SemanticIndexer напрямую и не импортируют prompt_toolkit, поэтому
+подходят для скриптов, pre-commit хуков и бенчмарков: прогреть индекс,
+выполнить запрос и получить результаты в JSON.
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from typing import List, TextIO
+
+from seditor.search import INDEX_MODES
+from seditor.search.embeddings import PROVIDERS
+from seditor.utils.progress import ProgressSnapshot
+
+# Файлов в батче эмбеддинга при пакетной индексации
+BULK_BATCH_SIZE = 64
+# Потоков чтения и хэширования файлов по умолчанию
+DEFAULT_JOBS = min(8, os.cpu_count() or 1)
+
+
+def add_commands(subparsers) -> None:
+    """
+    Зарегистрировать подкоманды index и search
+
+    Args:
+        subparsers: Результат ArgumentParser.add_subparsers()
+    """
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--embedder', type=str.lower, choices=('auto', *PROVIDERS),
+                        help='Провайдер эмбеддингов; по умолчанию $SEDITOR_EMBEDDER')
+    common.add_argument('--index-mode', type=str.lower, choices=INDEX_MODES,
+                        help='Хранилище индекса; по умолчанию $SEDITOR_INDEX_MODE')
+
+    index = subparsers.add_parser('index', parents=[common], help='Проиндексировать директории без запуска UI')
+    index.add_argument('paths', nargs='*', default=['.'], metavar='PATH', help='Корни индексации (по умолчанию .)')
+    index.add_argument('-j', '--jobs', type=int, default=DEFAULT_JOBS,
+                       help=f'Потоков чтения файлов (по умолчанию {DEFAULT_JOBS})')
+    index.add_argument('--batch-size', type=int, default=BULK_BATCH_SIZE,
+                       help=f'Файлов в батче эмбеддинга (по умолчанию {BULK_BATCH_SIZE})')
+    index.add_argument('--full', action='store_true',
+                       help='Перечитать все файлы, не доверяя контрольной точке')
+    index.add_argument('--no-progress', action='store_true', help='Не показывать прогресс')
+    index.add_argument('--json', action='store_true', help='Итог в JSON')
+    index.set_defaults(handler=run_index)
+
+    search = subparsers.add_parser('search', parents=[common], help='Семантический поиск, результаты в JSON')
+    search.add_argument('query', help='Текстовый запрос')
+    # Свой dest: иначе значение по умолчанию подкоманды затирает общий --root до подкоманды
+    search.add_argument('--root', dest='roots', action='append', default=[], metavar='PATH',
+                        help='Где искать (можно несколько раз; по умолчанию .)')
+    search.add_argument('-k', '--top-k', type=int, default=10, help='Количество результатов')
+    search.add_argument('--snippets', action='store_true', help='Добавить фрагменты найденных файлов')
+    search.set_defaults(handler=run_search)
+
+
+class ConsoleProgress:
+    """Строка прогресса в терминале (перерисовывается не чаще MIN_INTERVAL)"""
+
+    MIN_INTERVAL = 0.1  # seconds
+    WIDTH = 30
+
+    def __init__(self, label: str, stream: TextIO = sys.stderr):
+        self.label = label
+        self.stream = stream
+        self.enabled = stream.isatty()
+        self._started = time.monotonic()
+        self._last_draw = 0.0
+        self._drawn = False
+
+    def __call__(self, current: int, total: int) -> None:
+        now = time.monotonic()
+        if not self.enabled or (now - self._last_draw < self.MIN_INTERVAL and current < total):
+            return
+        self._last_draw = now
+        elapsed = now - self._started
+        rate = current / elapsed if elapsed > 0 else 0.0
+        eta = (total - current) / rate if rate > 0 else None
+        snapshot = ProgressSnapshot(current, total, elapsed, rate, eta)
+        filled = int(self.WIDTH * snapshot.percent / 100)
+        bar = '█' * filled + '░' * (self.WIDTH - filled)
+        self.stream.write(f'\r{bar} {snapshot.format(self.label)}\x1b[K')
+        self.stream.flush()
+        self._drawn = True
+
+    def close(self) -> None:
+        """Перевести строку после прогресса"""
+        if self._drawn:
+            self.stream.write('\n')
+            self.stream.flush()
+            self._drawn = False
+
+
+def _index_root(indexer, args: argparse.Namespace) -> dict:
+    """
+    Проиндексировать один корень в отдельном потоке
+
+    Ctrl+C отменяет индексацию так же, как в редакторе: текущий батч
+    дописывается и контрольная точка сохраняется.
+    """
+    if args.full:
+        indexer.checkpoint.files = {}
+    progress = ConsoleProgress(os.path.basename(indexer.root_path) or indexer.root_path)
+    if args.no_progress:
+        progress.enabled = False
+    cancel = threading.Event()
+    outcome = {}
+
+    def work():
+        try:
+            outcome['indexed'] = indexer.index_directory(progress, cancel, batch_size=args.batch_size,
+                                                         workers=args.jobs)
+        except BaseException as e:  # пробрасывается в основной поток
+            outcome['error'] = e
+
+    started = time.perf_counter()
+    thread = threading.Thread(target=work, name='index', daemon=True)
+    thread.start()
+    try:
+        while thread.is_alive():
+            thread.join(0.1)
+    except KeyboardInterrupt:
+        cancel.set()
+        thread.join()
+    finally:
+        progress.close()
+    if 'error' in outcome:
+        raise outcome['error']
+    return {
+        'root': indexer.root_path,
+        'indexed': outcome.get('indexed', 0),
+        'stored': indexer.get_indexed_count(),
+        'complete': indexer.checkpoint.complete,
+        'skipped': indexer.skip_counts,
+        'seconds': round(time.perf_counter() - started, 3),
+    }
+
+
+def run_index(args: argparse.Namespace) -> int:
+    """
+    seditor index: пакетная инкрементальная индексация
+
+    Ошибки открытия индекса (нет chromadb или sentence-transformers, неверное
+    имя в переменной окружения) печатаются одной строкой без трассировки.
+
+    Returns:
+        Код выхода (0 - все корни проиндексированы, 1 - ошибка, 130 - прервано)
+    """
+    from seditor.search.semantic_indexer import SemanticIndexer
+    from seditor.search.sniff import format_skip_counts
+
+    summaries = []
+    for path in args.paths:
+        if not os.path.isdir(path):
+            print(f'Ошибка: {path} не является директорией', file=sys.stderr)
+            return 1
+        try:
+            indexer = SemanticIndexer(path, embedder=args.embedder, index_mode=args.index_mode)
+            summary = _index_root(indexer, args)
+        except (ImportError, ValueError) as e:
+            print(f'Ошибка: не удалось проиндексировать {path}: {e}', file=sys.stderr)
+            return 1
+        summaries.append(summary)
+        if not args.json:
+            line = f'{summary["root"]}: {summary["indexed"]} файлов за {summary["seconds"]:.1f} с'
+            if summary['skipped']:
+                line += f', пропущено: {format_skip_counts(summary["skipped"])}'
+            if not summary['complete']:
+                line += ' (прервано, продолжится со следующего запуска)'
+            print(line)
+        if not summary['complete']:
+            break
+    if args.json:
+        print(json.dumps(summaries, ensure_ascii=False, indent=2))
+    return 0 if all(summary['complete'] for summary in summaries) else 130
+
+
+def run_search(args: argparse.Namespace) -> int:
+    """
+    seditor search: поиск по готовому (или частичному) индексу
+
+    Корни (общий --root и --root подкоманды) ищутся как шарды рабочего
+    пространства; поддиректория проиндексированного репозитория ищет по
+    индексу репозитория. Поиск ничего не пишет в дерево: корни без
+    сохранённого индекса попадают в missing, а не индексируются заново.
+
+    Returns:
+        Код выхода (0 - поиск выполнен, 1 - индекса нет или он не открывается)
+    """
+    from seditor.search.registry import IndexerRegistry
+    from seditor.search.semantic_indexer import SemanticIndexer
+    from seditor.search.workspace import Workspace
+
+    started = time.perf_counter()
+    registry = IndexerRegistry(
+        lambda root: SemanticIndexer(root, embedder=args.embedder, index_mode=args.index_mode))
+    roots = args.root + args.roots or ['.']
+
+    # Модель и хранилища загружаются до поиска: время загрузки и поиска - отдельно.
+    # Хранилище открывается только у найденного индекса: scope_for() для корня
+    # без индекса создал бы .seditor и пустую базу
+    indexed: List[str] = []
+    missing: List[str] = []
+    try:
+        for root in roots:
+            scope = registry.find_scope(root) if os.path.isdir(root) else None
+            if scope is not None:
+                scope.indexer._init_store()
+            if scope is not None and scope.indexer.get_indexed_count() > 0:
+                indexed.append(root)
+            else:
+                missing.append(os.path.abspath(root))
+        if not indexed:
+            print(f'Ошибка: индекс не найден, выполните: seditor index {" ".join(missing)}', file=sys.stderr)
+            return 1
+        workspace = Workspace(indexed, registry=registry)
+        for scope in workspace.shards():
+            scope.indexer._init_model()
+    except (ImportError, ValueError) as e:
+        print(f'Ошибка: не удалось открыть индекс: {e}', file=sys.stderr)
+        return 1
+    loaded = time.perf_counter()
+
+    results = workspace.search(args.query, top_k=args.top_k)
+    searched = time.perf_counter()
+
+    output = {
+        'query': args.query,
+        'results': [],
+        'timings': {
+            'load_ms': round((loaded - started) * 1000, 2),
+            'search_ms': round((searched - loaded) * 1000, 2),
+            'total_ms': round((searched - started) * 1000, 2),
+            'shards': [
+                {'root': latency.root, 'ms': round(latency.milliseconds, 2),
+                 'results': latency.results, 'error': latency.error}
+                for latency in workspace.last_latencies
+            ],
+        },
+    }
+    for path, name, score in results:
+        item = {'path': path, 'name': name, 'score': round(score, 4)}
+        if args.snippets:
+            item['snippet'] = workspace.get_snippet(path)
+        output['results'].append(item)
+    if missing:
+        output['missing'] = missing
+    workspace.close()
+    print(json.dumps(output, ensure_ascii=False, indent=2))
+    return 0
+
@@ -3,7 +3,7 @@
 Командная палитра для выбора команд и настроек
 """
 
-from typing import Optional, Callable, List, Tuple
+from typing import Optional, Callable, Dict, List, Tuple
 from prompt_toolkit.buffer import Buffer
 from prompt_toolkit.document import Document
 
@@ -34,6 +34,9 @@ class CommandPalette:
         self.filtered_items: List[Tuple[str, str, Callable]] = []
         self.mode = 'command'  # 'command', 'theme_select', или 'search'
         self.search_results: List[Tuple[str, str, float]] = []  # Результаты поиска (path, name, score)
+        # Источник предпросмотра найденного файла (путь -> текст) и кэш прочитанного
+        self.preview_provider: Optional[Callable[[str], Optional[str]]] = None
+        self._previews: Dict[str, Optional[str]] = {}
         
     def show(self) -> None:
         """Показать командную палитру"""
@@ -67,7 +70,11 @@ class CommandPalette:
                 ('Поиск файлов (Search)', 'search', lambda: self._enter_search()),
                 ('Выбрать тему (Themes)', 'themes', lambda: self._enter_theme_select()),
                 ('Переиндексировать (Reindex)', 'reindex', lambda: None),  # Будет обработано в app
+                ('Рабочее пространство: добавить/убрать (Workspace)', 'workspace', lambda: None),  # Будет обработано в app
                 ('Сохранить файл (Save)', 'save', lambda: None),  # Будет обработано в app
+                ('Производительность (Perf HUD)', 'perf_hud', lambda: None),  # Будет обработано в app
+                ('Профилирование: старт/стоп (Profile)', 'profile', lambda: None),  # Будет обработано в app
+                ('Память (Memory)', 'memory', lambda: None),  # Будет обработано в app
                 ('Выход (Quit)', 'quit', lambda: None),  # Будет обработано в app
             ]
             
@@ -129,8 +136,25 @@ class CommandPalette:
             results: Список кортежей (path, name, score)
         """
         self.search_results = results
+        self._previews = {}
         self._update_filtered_items()
     
+    def get_preview(self, path: str) -> Optional[str]:
+        """
+        Предпросмотр найденного файла (читается один раз на результат поиска)
+        
+        Args:
+            path: Путь из результатов поиска
+            
+        Returns:
+            Текст предпросмотра или None
+        """
+        if self.preview_provider is None:
+            return None
+        if path not in self._previews:
+            self._previews[path] = self.preview_provider(path)
+        return self._previews[path]
+    
     def move_up(self) -> None:
         """Переместить выделение вверх"""
         if self.filtered_items:
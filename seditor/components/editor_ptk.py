@@ -3,7 +3,9 @@
 ?????? ????????? ?? ?????? prompt_toolkit (75% ??????)
 """
 
+import hashlib
 import os
+import sys
 from typing import Optional
 from prompt_toolkit.buffer import Buffer
 from prompt_toolkit.lexers import PygmentsLexer
@@ -11,6 +13,12 @@ from prompt_toolkit.document import Document
 from pygments.lexers import get_lexer_by_name, get_lexer_for_filename
 from pygments.util import ClassNotFound
 from seditor.terminal.layout import Layout
+from seditor.utils.metrics import metrics
+
+
+def _text_digest(text: str) -> bytes:
+    """Хэш текста для сравнения с сохранённой версией"""
+    return hashlib.blake2b(text.encode('utf-8', 'surrogatepass'), digest_size=16).digest()
 
 
 def get_lexer_for_file(file_path: Optional[str]) -> Optional[PygmentsLexer]:
@@ -96,7 +104,10 @@ class EditorPanePTK:
         self.file_path: Optional[str] = None
         self.buffer: Optional[Buffer] = None
         self._dirty: bool = False
-        self._last_saved_snapshot: str = ""
+        # Вместо копии сохранённого текста храним его длину и хэш:
+        # после правок буфер и снимок иначе держали бы две копии файла
+        self._last_saved_length: int = 0
+        self._last_saved_digest: bytes = _text_digest("")
         self._suspend_dirty_events: bool = False
         
         # ??????? ????? prompt_toolkit
@@ -126,8 +137,22 @@ class EditorPanePTK:
         self.buffer.text = text
         self._suspend_dirty_events = False
         self._dirty = False
-        self._last_saved_snapshot = text
+        self._remember_saved(text)
+    
+    def _remember_saved(self, text: str) -> None:
+        """Запомнить длину и хэш сохранённого текста"""
+        self._last_saved_length = len(text)
+        self._last_saved_digest = _text_digest(text)
+    
+    def _matches_saved(self, text: str) -> bool:
+        """Совпадает ли текст с последним сохранённым"""
+        return len(text) == self._last_saved_length and _text_digest(text) == self._last_saved_digest
+    
+    def memory_usage(self) -> int:
+        """Примерный размер текста буфера в байтах"""
+        return sys.getsizeof(self.buffer.text) if self.buffer else 0
     
+    @metrics.timed('editor.load_file')
     def load_file(self, file_path: str) -> bool:
         """
         ????????? ???? ? ????????
@@ -191,6 +216,7 @@ class EditorPanePTK:
         """???????? ?????? ??? ???????? ?????"""
         return get_lexer_for_file(self.file_path)
     
+    @metrics.timed('editor.save_file')
     def save_file(self, file_path: Optional[str] = None) -> bool:
         """
         ????????? ????
@@ -213,7 +239,7 @@ class EditorPanePTK:
             not file_path
             and save_path == self.file_path
             and not self._dirty
-            and current_text == self._last_saved_snapshot
+            and self._matches_saved(current_text)
         ):
             return True
         
@@ -223,7 +249,7 @@ class EditorPanePTK:
             
             self.file_path = save_path
             
-            self._last_saved_snapshot = current_text
+            self._remember_saved(current_text)
             self._dirty = False
             return True
         except (OSError, PermissionError):
@@ -235,4 +261,5 @@ class EditorPanePTK:
             return False
         if self._dirty:
             return True
-        return self.buffer.text != self._last_saved_snapshot
+        # Без событий изменения текст совпадает с сохранённым; длина - дешёвая страховка
+        return len(self.buffer.text) != self._last_saved_length
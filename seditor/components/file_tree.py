@@ -6,11 +6,17 @@
 import os
 from seditor.terminal.layout import Layout
 from seditor.core.file_tree import FileTree, FileNode
+from seditor.terminal.screen import DiffRenderer, Frame, SGR_BOLD, sgr_bg_rgb, sgr_join
 
 
 class FileTreePane:
     """?????? ??Отрендерить панель дерева файлов"""
 
+    # Фон панели в фокусе и выделенного элемента (SGR-параметры)
+    FOCUSED_BG = sgr_bg_rgb(40, 40, 40)
+    SELECTED_FOCUSED_BG = sgr_bg_rgb(60, 60, 60)
+    SELECTED_BG = sgr_bg_rgb(30, 30, 30)
+
     def __init__(self, layout: Layout, root_path: str = None):
         """
         ????Отрендерить панель дерева файлов ??????
@@ -188,94 +194,64 @@ class FileTreePane:
         # По умолчанию - обычный файл
         return '📄'
 
-    def render(self, terminal, focused: bool = False) -> str:
+    def draw(self, frame: Frame, focused: bool = False) -> None:
         """
-        ??Отрендерить панель дерева файлов ??????
+        Нарисовать панель дерева файлов в кадр
 
         Args:
-            terminal: ?????? blessed.Terminal
-            focused: ??????? ?? ?????? (??? ????????? ????)
-
-        Returns:
-            ?????? ? ANSI-?????? ??? ?????????
+            frame: Кадр размером с терминал
+            focused: Находится ли панель в фокусе (для подсветки фона)
         """
-        output = []
         tree_x, tree_y, tree_width, tree_height = self.layout.get_tree_bounds()
+        pane_bg = self.FOCUSED_BG if focused else ''
 
-        # ?Обновить дерево
+        # Заголовок
         title = " File Tree "
-        if focused:
-            # ??Тёмно-серый??? ???? ??? Обновить дерево
-            bg_color = terminal.on_color_rgb(40, 40, 40)  # Тёмно-серый
-            output.append(terminal.move_xy(tree_x, tree_y) + bg_color + terminal.bold + title)
-        else:
-            output.append(terminal.move_xy(tree_x, tree_y) + terminal.bold + title)
+        frame.fill(tree_x, tree_y, tree_width, pane_bg)
+        frame.put(tree_x, tree_y, title, sgr_join(pane_bg, SGR_BOLD))
 
-        # Обновить дерево? ????????
         visible_items = self.tree.get_visible_items()
         selected_item = self.tree.get_selected_item()
 
-        # ?Обновить дерево???
         display_height = self.get_display_height()
-        if self.tree.selected_index >= self.scroll_offset + display_height:
-            self.scroll_offset = self.tree.selected_index - display_height + 1
-        elif self.tree.selected_index < self.scroll_offset:
-            self.scroll_offset = self.tree.selected_index
+        self._ensure_selection_visible(display_height, len(visible_items))
 
-        # ??Обновить дерево??
         start_y = tree_y + 1
-        max_items = min(len(visible_items), display_height)
-        max_name_width = tree_width - 2  # -2 ??? ????????
+        max_name_width = tree_width - 2  # -2 для отступов
 
-        for i in range(max_items):
+        for i in range(display_height):
+            y_pos = start_y + i
             item_index = self.scroll_offset + i
             if item_index >= len(visible_items):
-                break
+                frame.fill(tree_x, y_pos, tree_width, pane_bg)
+                continue
 
             item = visible_items[item_index]
-            is_selected = (item == selected_item)
-            y_pos = start_y + i
+            if item == selected_item:
+                style = self.SELECTED_FOCUSED_BG if focused else self.SELECTED_BG
+            else:
+                style = pane_bg
 
-            # ?Форматируем имя для отображения с отступами и символами
             name = self._format_item_name(item, max_name_width)
+            frame.fill(tree_x, y_pos, tree_width, pane_bg)
+            end_x = frame.put(tree_x + 1, y_pos, name, style)
+            # Выделение тянется до края панели
+            frame.fill(end_x, y_pos, tree_x + tree_width - end_x, style)
 
-            # ?Обновить дерево???? ????????
-            if is_selected:
-                if focused:
-                    # ????? ?Обновить дерево???? ???????? ? Обновить дерево
-                    bg_color = terminal.on_color_rgb(60, 60, 60)  # ?????
-                    output.append(terminal.move_xy(tree_x + 1, y_pos) + bg_color + name)
-                else:
-                    # ????Обновить дерево??? ? ??Обновить дерево
-                    bg_color = terminal.on_color_rgb(30, 30, 30)  # Тёмно-серый
-                    output.append(terminal.move_xy(tree_x + 1, y_pos) + bg_color + name)
-            else:
-                # ??Тёмно-серый?
-                if focused:
-                    # ?Тёмно-серый?????? ??? ??? Обновить дерево
-                    bg_color = terminal.on_color_rgb(40, 40, 40)  # Тёмно-серый
-                    output.append(terminal.move_xy(tree_x + 1, y_pos) + bg_color + " " * tree_width)
-                    output.append(terminal.move_xy(tree_x + 1, y_pos) + name)
-                else:
-                    output.append(terminal.move_xy(tree_x + 1, y_pos) + name)
-
-            # ??????? ???Обновить дерево??????
-            remaining_width = tree_width - len(name) - 1
-            if remaining_width > 0:
-                clear_line = " " * remaining_width
-                output.append(terminal.move_xy(tree_x + 1 + len(name), y_pos) + clear_line)
-
-        # ??Тёмно-серый???? ?????
-        for i in range(max_items, display_height):
-            y_pos = start_y + i
-            clear_line = " " * tree_width
-            if focused:
-                bg_color = terminal.on_color_rgb(40, 40, 40)
-                output.append(terminal.move_xy(tree_x, y_pos) + bg_color + clear_line)
-            else:
-                output.append(terminal.move_xy(tree_x, y_pos) + clear_line)
+    def render(self, renderer: DiffRenderer, focused: bool = False) -> str:
+        """
+        Отрендерить панель дерева файлов
+
+        Args:
+            renderer: Рендерер, хранящий предыдущий кадр
+            focused: Находится ли панель в фокусе
 
-        return "".join(output)
+        Returns:
+            ANSI-вывод только для изменившихся ячеек
+        """
+        frame = Frame(self.layout.terminal_width, self.layout.terminal_height)
+        self.draw(frame, focused)
+        return renderer.render(frame)
 
     def _ensure_selection_visible(self, display_height: int, total_items: int) -> None:
         """??????????? ??????? ???????? ? ???????? ????????"""
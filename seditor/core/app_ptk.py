@@ -6,31 +6,44 @@
 import asyncio
 import logging
 import os
+import threading
+import time
 from datetime import datetime
-from typing import Optional
+from typing import TYPE_CHECKING, List, Optional, Sequence
 
-from prompt_toolkit import Application
 from prompt_toolkit.formatted_text import FormattedText
-from prompt_toolkit.layout import Layout as PTKLayout, HSplit, VSplit, Window
+from prompt_toolkit.layout import (
+    ConditionalContainer,
+    Float,
+    FloatContainer,
+    HSplit,
+    Layout as PTKLayout,
+    VSplit,
+    Window,
+)
 from prompt_toolkit.layout.controls import BufferControl, FormattedTextControl
 from prompt_toolkit.layout.dimension import Dimension
 from prompt_toolkit.key_binding import KeyBindings
 from prompt_toolkit.filters import Condition
-from prompt_toolkit.styles import Style, merge_styles, style_from_pygments_cls
 from prompt_toolkit.lexers import DynamicLexer
-from pygments.styles import get_style_by_name
 
 from seditor.terminal.layout import Layout as ScreenLayout
 from seditor.components.editor_ptk import EditorPanePTK
 from seditor.components.file_tree import FileTreePane
 from seditor.components.command_palette import CommandPalette
-from seditor.search import SemanticIndexer
+from seditor.core.themes import DEFAULT_THEME, ThemedApplication, ThemeRegistry, ThemeStyle
+from seditor.utils.memory import MemoryAccountant, MemoryLimits
+from seditor.utils.metrics import metrics
+from seditor.utils.profiler import SamplingProfiler
+from seditor.utils.progress import ProgressSnapshot, ThrottledProgress
+from seditor.search.scheduler import IdleThrottle
+from seditor.search.workspace import Workspace
+
+if TYPE_CHECKING:
+    from seditor.search import SemanticIndexer
+    from seditor.search.scheduler import IndexPriorities
+    from seditor.search.worker import IndexWorker
 
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    filename='seditor_debug.log'
-)
 logger = logging.getLogger(__name__)
 
 
@@ -38,23 +51,65 @@ class AppPTK:
     """Основное приложение seditor, построенное на prompt_toolkit."""
 
     AUTOSAVE_INTERVAL = 5  # seconds
+    PREWARM_DELAY = 1.0  # seconds, даём UI отрисоваться до тяжёлых импортов
+    MAINTENANCE_INTERVAL = 30  # seconds, проверка лимитов памяти
+    PREVIEW_LINES = 2  # строк предпросмотра найденного файла в палитре
 
-    def __init__(self) -> None:
+    def __init__(self, prewarm: bool = False, metrics_file: Optional[str] = None,
+                 workspace_roots: Sequence[str] = ()) -> None:
+        """
+        Args:
+            prewarm: Загрузить модель семантического поиска в фоне после запуска UI
+            metrics_file: Файл, в который при выходе сохраняются метрики (JSON)
+            workspace_roots: Дополнительные корни рабочего пространства (поиск идёт и по ним)
+        """
         self.screen_layout = ScreenLayout(100, 30)
         self.file_tree_pane = FileTreePane(self.screen_layout)
         self.editor_pane = EditorPanePTK(self.screen_layout)
         self.command_palette = CommandPalette()
+        self.command_palette.preview_provider = self._get_search_preview
 
         self.focused_pane: str = 'tree'
         self.current_file: Optional[str] = None
         self._status_message: str = ''
         self._autosave_task: Optional[asyncio.Task] = None
         self._running: bool = False
-        self._current_theme: str = 'vscode-dark'  # Текущая тема
+        self._current_theme: str = DEFAULT_THEME  # Текущая тема
+        # Темы компилируются лениво, смена темы - замена указателя в theme_style
+        self.theme_registry = ThemeRegistry()
+        self.theme_style = ThemeStyle(self.theme_registry, self._current_theme)
         
         # Семантический индексатор
-        self.semantic_indexer: Optional[SemanticIndexer] = None
+        self.semantic_indexer: Optional['SemanticIndexer'] = None
+        self._search_prefix: Optional[str] = None  # поддиректория корня индекса, в которой искать
         self._indexing_task: Optional[asyncio.Task] = None
+        self._indexing_cancel: Optional[threading.Event] = None
+        self._indexing_progress: Optional[ProgressSnapshot] = None  # None - индексация не идёт
+        # Батчи индексации откладываются, пока пользователь печатает
+        self._idle_throttle = IdleThrottle()
+        self._index_worker: Optional['IndexWorker'] = None  # дочерний процесс индексации
+        # Поток или процесс последнего прохода: после отмены задачи он ещё дописывает
+        # хранилище, и следующий проход ждёт его завершения
+        self._indexing_work: Optional[asyncio.Future] = None
+        # Рабочее пространство: шарды дополнительных корней индексируются по очереди
+        self.workspace = Workspace.from_env(workspace_roots)
+        self._index_queue: List['SemanticIndexer'] = []
+        self._workspace_task: Optional[asyncio.Task] = None
+        self._prewarm = prewarm
+        self._prewarm_task: Optional[asyncio.Task] = None
+        
+        # Метрики производительности
+        self._metrics_file = metrics_file
+        self._perf_hud_visible: bool = False
+        self._pending_keypress: Optional[float] = None  # время первой необработанной клавиши
+        self._frame_started: Optional[float] = None
+        self._profiler: Optional[SamplingProfiler] = None
+        
+        # Учёт памяти и лимиты для долгих сессий
+        self.memory_limits = MemoryLimits.from_env()
+        self.memory = MemoryAccountant()
+        self._register_memory_estimators()
+        self._maintenance_task: Optional[asyncio.Task] = None
 
         self.kb = KeyBindings()
         self._setup_keybindings()
@@ -104,7 +159,7 @@ class AppPTK:
         )
         self.command_palette_window = Window(
             content=self.command_palette_control,
-            height=lambda: Dimension.exact(min(12, len(self.command_palette.filtered_items) + 3)) if self.command_palette.is_visible else Dimension.exact(0),
+            height=self._command_palette_height,
             style='class:command_palette',
         )
         self.command_palette_input_window = Window(
@@ -118,24 +173,96 @@ class AppPTK:
             padding=0,
         )
         container = HSplit([body, self.command_palette_window, self.command_palette_input_window, self.status_window])
+        
+        # Оверлей с метриками производительности (переключается из палитры)
+        self.perf_hud_window = Window(
+            content=FormattedTextControl(text=self._get_perf_hud_text),
+            style='class:perf_hud',
+            dont_extend_width=True,
+            dont_extend_height=True,
+        )
+        container = FloatContainer(
+            content=container,
+            floats=[
+                Float(
+                    content=ConditionalContainer(
+                        self.perf_hud_window,
+                        filter=Condition(lambda: self._perf_hud_visible),
+                    ),
+                    top=1,
+                    right=1,
+                ),
+            ],
+        )
 
         self.layout = PTKLayout(container, focused_element=self.tree_window)
-        self.app = Application(
+        self.app = ThemedApplication(
             layout=self.layout,
             key_bindings=self.kb,
             full_screen=True,
-            style=self._create_style(),
+            # Скомпилированная тема самодостаточна: без слияния со стилями по умолчанию
+            style=self.theme_style,
             refresh_interval=0.5,
             mouse_support=True,  # Включаем поддержку мыши
         )
         self.app.pre_run_callables.append(self._on_app_start)
+        self.app.before_render += self._on_before_render
+        self.app.after_render += self._on_after_render
+        # Все нажатия, включая ввод текста стандартной привязкой self-insert
+        self.app.key_processor.before_key_press += self._on_key_press
 
     def _on_app_start(self) -> None:
         self._running = True
         self._update_screen_layout_from_output()
         if self._autosave_task is None:
             self._autosave_task = self.app.create_background_task(self._autosave_loop())
+        if self._prewarm and self._prewarm_task is None:
+            self._prewarm_task = self.app.create_background_task(self._prewarm_search())
+        if self._maintenance_task is None:
+            self._maintenance_task = self.app.create_background_task(self._maintenance_loop())
+        if len(self.workspace) and self._workspace_task is None:
+            self._workspace_task = self.app.create_background_task(self._index_workspace_async())
 
+    def _on_before_render(self, _app) -> None:
+        self._frame_started = time.perf_counter()
+    
+    def _on_key_press(self, _key_processor) -> None:
+        """Отметить нажатие клавиши: замер задержки до отрисовки и пауза индексации"""
+        if self._pending_keypress is None:
+            self._pending_keypress = time.perf_counter()
+        metrics.inc('keypress')
+        self._idle_throttle.touch()
+        if self._index_worker is not None:
+            self._index_worker.touch()
+    
+    def _on_after_render(self, _app) -> None:
+        """Замер времени кадра и задержки от нажатия клавиши до отрисовки"""
+        now = time.perf_counter()
+        if self._frame_started is not None:
+            metrics.observe('frame', (now - self._frame_started) * 1000)
+            self._frame_started = None
+        if self._pending_keypress is not None:
+            metrics.observe('key_to_render', (now - self._pending_keypress) * 1000)
+            self._pending_keypress = None
+        metrics.inc('frames')
+    
+    def _bind(self, *keys, **kwargs):
+        """
+        Аналог self.kb.add, замеряющий время обработчика клавиши
+        
+        Args:
+            keys: Клавиши (как в KeyBindings.add)
+            kwargs: Параметры KeyBindings.add (filter и т.д.)
+        """
+        metric_name = 'key.' + '+'.join(str(k) for k in keys)
+        
+        def decorator(handler):
+            def timed_handler(event):
+                with metrics.timer(metric_name):
+                    return handler(event)
+            return self.kb.add(*keys, **kwargs)(timed_handler)
+        return decorator
+    
     def _get_editor_lexer(self):
         """Возвращает лексер для редактора (вызывается BufferControl)."""
         return self.editor_pane.get_lexer()
@@ -182,86 +309,7 @@ class AppPTK:
         ):
             self.screen_layout.update_size(size.columns, size.rows)
 
-    def _create_style(self) -> Style:
-        # Выбираем тему в зависимости от настройки
-        if self._current_theme == 'vscode-dark':
-            # Наша кастомная тема VS Code Dark+
-            pygments_style = Style([])
-            syntax_colors = [
-                ('pygments.keyword', 'fg:#c586c0'),
-                ('pygments.keyword.namespace', 'fg:#c586c0'),
-                ('pygments.keyword.type', 'fg:#4ec9b0'),
-                ('pygments.name', 'fg:#9cdcfe'),
-                ('pygments.name.builtin', 'fg:#4ec9b0'),
-                ('pygments.name.function', 'fg:#dcdcaa'),
-                ('pygments.name.class', 'fg:#4ec9b0'),
-                ('pygments.name.decorator', 'fg:#dcdcaa'),
-                ('pygments.string', 'fg:#ce9178'),
-                ('pygments.string.doc', 'fg:#6a9955'),
-                ('pygments.number', 'fg:#b5cea8'),
-                ('pygments.comment', 'fg:#6a9955'),
-                ('pygments.comment.single', 'fg:#6a9955'),
-                ('pygments.comment.multiline', 'fg:#6a9955'),
-                ('pygments.operator', 'fg:#d4d4d4'),
-                ('pygments.punctuation', 'fg:#d4d4d4'),
-                ('pygments.literal', 'fg:#569cd6'),
-                ('pygments.literal.string', 'fg:#ce9178'),
-            ]
-        else:
-            # Стандартная тема Pygments
-            try:
-                pygments_style = style_from_pygments_cls(get_style_by_name(self._current_theme))
-                syntax_colors = []
-            except Exception:
-                # Если тема не найдена, используем нашу кастомную
-                pygments_style = Style([])
-                syntax_colors = [
-                    ('pygments.keyword', 'fg:#c586c0'),
-                    ('pygments.name.function', 'fg:#dcdcaa'),
-                    ('pygments.string', 'fg:#ce9178'),
-                    ('pygments.comment', 'fg:#6a9955'),
-                ]
-        
-        # Базовые стили для UI
-        ui_style = Style([
-            # Дерево файлов
-            ('tree', 'bg:#1e1e1e fg:#d4d4d4'),
-            ('tree.header', 'fg:#888'),
-            ('tree.text', 'fg:#d4d4d4'),
-            ('tree.selected', 'fg:#d4d4d4'),
-            ('tree.selected.focused', 'bg:#3a3d41 fg:#ffffff'),
-            ('tree.empty', 'fg:#666'),
-            ('separator', 'fg:#444'),
-            
-            # Редактор
-            ('editor', 'bg:#1e1e1e fg:#d4d4d4'),
-            ('editor.line-number', '#858585'),
-            ('editor.cursor', 'bg:#aeafad'),
-            ('editor.selection', 'bg:#264f78'),
-            
-            # Статус-бар
-            ('status', 'bg:#1b1b1b fg:#d4d4d4'),
-            ('status.label', 'bold'),
-            ('status.separator', 'fg:#555'),
-            ('status.message', 'fg:#9cdcfe'),
-            ('status.hint', 'fg:#888 italic'),
-            
-            # Командная палитра
-            ('command_palette', 'bg:#252526 fg:#cccccc'),
-            ('command_palette.header', 'bg:#252526 fg:#ffffff bold'),
-            ('command_palette.separator', 'bg:#252526 fg:#555'),
-            ('command_palette.item', 'bg:#252526 fg:#cccccc'),
-            ('command_palette.item.filename', 'bg:#252526 fg:#ffffff bold'),
-            ('command_palette.item.path', 'bg:#252526 fg:#888'),
-            ('command_palette.selected', 'bg:#094771 fg:#ffffff bold'),
-            ('command_palette.selected.filename', 'bg:#094771 fg:#ffffff bold'),
-            ('command_palette.selected.path', 'bg:#094771 fg:#aaaaaa'),
-            ('command_palette.empty', 'bg:#252526 fg:#888 italic'),
-            ('command_palette.input', 'bg:#3c3c3c fg:#cccccc'),
-        ] + syntax_colors)
-        
-        return merge_styles([pygments_style, ui_style])
-
+    @metrics.timed('render.tree')
     def _get_tree_content(self) -> FormattedText:
         self._update_screen_layout_from_output()
         render_info = getattr(self.tree_window, 'render_info', None)
@@ -305,6 +353,7 @@ class AppPTK:
 
         return FormattedText(fragments)
 
+    @metrics.timed('render.status')
     def _get_status_text(self) -> FormattedText:
         fragments: list[tuple[str, str]] = []
         file_path = self.editor_pane.get_file_path()
@@ -326,6 +375,33 @@ class AppPTK:
 
         return FormattedText(fragments)
     
+    def _get_perf_hud_text(self) -> FormattedText:
+        """Отрисовка оверлея с метриками производительности"""
+        snapshot = metrics.snapshot()
+        histograms = snapshot['histograms']
+        lines = [' Производительность (p50 / p99, мс) ']
+        
+        # Сначала кадр и отклик на клавиши, затем подсистемы по алфавиту
+        names = [n for n in ('frame', 'key_to_render') if n in histograms]
+        names += [n for n in histograms if n not in ('frame', 'key_to_render')]
+        for name in names:
+            summary = histograms[name]
+            lines.append(
+                f' {name:<26} {summary["p50"]:7.2f} {summary["p99"]:7.2f}  n={summary["count"]} '
+            )
+        if not names:
+            lines.append(' нет данных ')
+        
+        return FormattedText([('class:perf_hud', '\n'.join(lines))])
+    
+    def _command_palette_height(self) -> Dimension:
+        """Высота палитры: заголовок, пункты и предпросмотр выбранного результата поиска"""
+        if not self.command_palette.is_visible:
+            return Dimension.exact(0)
+        items = len(self.command_palette.filtered_items)
+        preview = self.PREVIEW_LINES if self.command_palette.mode == 'search' and items else 0
+        return Dimension.exact(min(12 + preview, items + 3 + preview))
+    
     def _get_command_palette_text(self) -> FormattedText:
         """Отрисовка командной палитры"""
         if not self.command_palette.is_visible:
@@ -340,6 +416,14 @@ class AppPTK:
             header = '  Выберите тему:'
         elif self.command_palette.mode == 'search':
             header = '  Поиск файлов (введите описание):'
+            details = []
+            if self._indexing_progress is not None:
+                # Поиск идёт по уже проиндексированной части
+                details.append(f'проиндексировано {self._indexing_progress.percent:.0f}%')
+            if len(self.workspace.last_latencies) > 1:
+                details.append(self.workspace.format_latencies())
+            if details:
+                header = f'  Поиск файлов ({"; ".join(details)}):'
         else:
             header = '  Команды:'
         
@@ -365,6 +449,12 @@ class AppPTK:
                     fragments.append(('class:command_palette.item', ' '))
                     fragments.append(('class:command_palette.item.path', f'({path})'))
                 fragments.append(('', '\n'))
+                if is_selected:
+                    # Фрагмент файла читается лениво и только для выбранного результата
+                    preview = self.command_palette.get_preview(self.command_palette.get_selected_command())
+                    for preview_line in (preview or '').splitlines():
+                        fragments.append(('class:command_palette.preview', f'    {preview_line}'))
+                        fragments.append(('', '\n'))
         else:
             # Обычное форматирование для команд и тем
             lines = self.command_palette.get_display_lines(max_lines=10)
@@ -442,15 +532,18 @@ class AppPTK:
         command_palette_hidden = Condition(lambda: not self.command_palette.is_visible)
         
         # Ctrl+P - открыть командную палитру
-        @self.kb.add('c-p', filter=command_palette_hidden)
+        @self._bind('c-p', filter=command_palette_hidden)
         def _(event) -> None:
             self.command_palette.show()
             self.layout.focus(self.command_palette_input_window)
             event.app.invalidate()
         
         # Escape - закрыть командную палитру
-        @self.kb.add('escape', filter=command_palette_visible)
+        @self._bind('escape', filter=command_palette_visible)
         def _(event) -> None:
+            if self.command_palette.mode == 'theme_select':
+                # Отменяем предпросмотр темы
+                self._preview_theme(self._current_theme)
             self.command_palette.hide()
             if self.focused_pane == 'tree':
                 self.layout.focus(self.tree_window)
@@ -459,37 +552,39 @@ class AppPTK:
             event.app.invalidate()
         
         # Enter - выбрать команду/тему
-        @self.kb.add('enter', filter=command_palette_visible)
+        @self._bind('enter', filter=command_palette_visible)
         def _(event) -> None:
             self._handle_command_palette_enter()
             event.app.invalidate()
         
         # Up/Down - навигация в командной палитре
-        @self.kb.add('up', filter=command_palette_visible)
+        @self._bind('up', filter=command_palette_visible)
         def _(event) -> None:
             self.command_palette.move_up()
+            self._preview_selected_theme()
             event.app.invalidate()
         
-        @self.kb.add('down', filter=command_palette_visible)
+        @self._bind('down', filter=command_palette_visible)
         def _(event) -> None:
             self.command_palette.move_down()
+            self._preview_selected_theme()
             event.app.invalidate()
         
         # Обработка изменения текста в командной палитре
         self.command_palette.buffer.on_text_changed += lambda _: self._on_command_palette_text_changed()
         
-        @self.kb.add('tab', filter=command_palette_hidden)
+        @self._bind('tab', filter=command_palette_hidden)
         def _(event) -> None:
             self._toggle_focus()
 
-        @self.kb.add('q', filter=command_palette_hidden)
+        @self._bind('q', filter=command_palette_hidden)
         def _(event) -> None:
             self._request_exit()
 
         tree_focus = Condition(lambda: self.focused_pane == 'tree' and not self.command_palette.is_visible)
         editor_focus = Condition(lambda: self.focused_pane == 'editor' and not self.command_palette.is_visible)
 
-        @self.kb.add('enter', filter=tree_focus)
+        @self._bind('enter', filter=tree_focus)
         def _(event) -> None:
             result = self.file_tree_pane.enter()
             if result:
@@ -503,37 +598,38 @@ class AppPTK:
                 # Запускаем индексацию только если это Git-репозиторий
                 self._start_indexing_if_git_repo(current_path)
 
-        @self.kb.add('up', filter=tree_focus)
+        @self._bind('up', filter=tree_focus)
         def _(event) -> None:
             self.file_tree_pane.move_up()
             event.app.invalidate()
 
-        @self.kb.add('down', filter=tree_focus)
+        @self._bind('down', filter=tree_focus)
         def _(event) -> None:
             self.file_tree_pane.move_down()
             event.app.invalidate()
 
-        @self.kb.add('left', filter=tree_focus)
+        @self._bind('left', filter=tree_focus)
         def _(event) -> None:
             self.file_tree_pane.collapse_directory()
             event.app.invalidate()
 
-        @self.kb.add('right', filter=tree_focus)
+        @self._bind('right', filter=tree_focus)
         def _(event) -> None:
             self.file_tree_pane.expand_directory()
             event.app.invalidate()
 
-        @self.kb.add('backspace', filter=tree_focus)
+        @self._bind('backspace', filter=tree_focus)
         def _(event) -> None:
             self.file_tree_pane.go_up_level()
+            self._scope_search_to(self.file_tree_pane.tree.current_path)
             event.app.invalidate()
 
-        @self.kb.add('c-s', filter=editor_focus)
+        @self._bind('c-s', filter=editor_focus)
         def _(event) -> None:
             self._manual_save()
 
         # Option+Left (Alt+B в Emacs) - к началу предыдущего слова
-        @self.kb.add('escape', 'b', filter=editor_focus)
+        @self._bind('escape', 'b', filter=editor_focus)
         def _(event) -> None:
             buffer = event.app.current_buffer
             pos = buffer.document.find_start_of_previous_word()
@@ -541,7 +637,7 @@ class AppPTK:
                 buffer.cursor_position += pos
 
         # Option+Right (Alt+F в Emacs) - к началу следующего слова
-        @self.kb.add('escape', 'f', filter=editor_focus)
+        @self._bind('escape', 'f', filter=editor_focus)
         def _(event) -> None:
             buffer = event.app.current_buffer
             pos = buffer.document.find_next_word_beginning()
@@ -557,7 +653,8 @@ class AppPTK:
         success = self.editor_pane.save_file()
         if success:
             self._set_status(message, with_timestamp=force_timestamp)
-            logger.debug('File saved: %s', file_path)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug('File saved: %s', file_path)
         else:
             self._set_status('Ошибка сохранения')
             logger.error('Failed to save file: %s', file_path)
@@ -572,9 +669,41 @@ class AppPTK:
             return
         self._save_if_needed('Сохранено вручную')
     
+    def _profiles_dir(self) -> str:
+        """Директория для профилей: .seditor/profiles в корне дерева"""
+        return os.path.join(self.file_tree_pane.tree.current_path, '.seditor', 'profiles')
+    
+    def _toggle_profiler(self) -> None:
+        """Запустить или остановить сэмплирующий профилировщик"""
+        if self._profiler is None or not self._profiler.is_running:
+            self._profiler = SamplingProfiler()
+            self._profiler.start()
+            self._set_status('Профилирование запущено (повторите команду для остановки)')
+            return
+        self._finish_profiling()
+    
+    def _finish_profiling(self) -> None:
+        """Остановить профилировщик и сохранить стеки в .seditor/profiles"""
+        profiler = self._profiler
+        if profiler is None or not profiler.is_running:
+            return
+        profiler.stop()
+        try:
+            path = profiler.write(self._profiles_dir())
+        except OSError as exc:
+            logger.error('Не удалось сохранить профиль: %s', exc)
+            self._set_status('Ошибка сохранения профиля')
+            return
+        logger.info('Profile saved: %s (%d samples)', path, profiler.samples)
+        self._set_status(
+            f'Профиль: {os.path.relpath(path, self.file_tree_pane.tree.current_path)} '
+            f'({profiler.samples} сэмплов за {profiler.duration:.1f}с)'
+        )
+    
     def _on_command_palette_text_changed(self) -> None:
         """Обработчик изменения текста в командной палитре"""
         self.command_palette.on_text_changed()
+        self._preview_selected_theme()
         
         # Если в режиме поиска - выполняем поиск
         if self.command_palette.mode == 'search':
@@ -607,6 +736,13 @@ class AppPTK:
                     self.layout.focus(self.tree_window)
                 else:
                     self.layout.focus(self.editor_window)
+            elif selected == 'workspace':
+                self._toggle_workspace_root()
+                self.command_palette.hide()
+                if self.focused_pane == 'tree':
+                    self.layout.focus(self.tree_window)
+                else:
+                    self.layout.focus(self.editor_window)
             elif selected == 'save':
                 self._manual_save()
                 self.command_palette.hide()
@@ -614,6 +750,27 @@ class AppPTK:
                     self.layout.focus(self.tree_window)
                 else:
                     self.layout.focus(self.editor_window)
+            elif selected == 'perf_hud':
+                self._perf_hud_visible = not self._perf_hud_visible
+                self.command_palette.hide()
+                if self.focused_pane == 'tree':
+                    self.layout.focus(self.tree_window)
+                else:
+                    self.layout.focus(self.editor_window)
+            elif selected == 'memory':
+                self._set_status(self.memory.format_report())
+                self.command_palette.hide()
+                if self.focused_pane == 'tree':
+                    self.layout.focus(self.tree_window)
+                else:
+                    self.layout.focus(self.editor_window)
+            elif selected == 'profile':
+                self._toggle_profiler()
+                self.command_palette.hide()
+                if self.focused_pane == 'tree':
+                    self.layout.focus(self.tree_window)
+                else:
+                    self.layout.focus(self.editor_window)
             elif selected == 'quit':
                 self._request_exit()
         
@@ -635,9 +792,7 @@ class AppPTK:
     def _change_theme(self, theme_id: str) -> None:
         """Сменить тему подсветки синтаксиса"""
         self._current_theme = theme_id
-        
-        # Пересоздаём стиль с новой темой
-        self.app.style = self._create_style()
+        self.theme_style.activate(theme_id)
         
         # Находим название темы для сообщения
         theme_name = theme_id
@@ -647,7 +802,27 @@ class AppPTK:
                 break
         
         self._set_status(f'Тема изменена: {theme_name}')
-        logger.info(f'Theme changed to: {theme_id}')
+        logger.info('Theme changed to: %s', theme_id)
+    
+    def _preview_theme(self, theme_id: str) -> None:
+        """
+        Временно применить тему (без смены _current_theme)
+        
+        Args:
+            theme_id: Идентификатор темы
+        """
+        if self.theme_style.theme_id != theme_id:
+            self.theme_style.activate(theme_id)
+            if self.app.is_running:
+                self.app.invalidate()
+    
+    def _preview_selected_theme(self) -> None:
+        """Предпросмотр темы под курсором в режиме выбора темы"""
+        if self.command_palette.mode != 'theme_select':
+            return
+        selected = self.command_palette.get_selected_command()
+        if selected:
+            self._preview_theme(selected)
     
     def _is_git_repository(self, directory_path: str) -> bool:
         """
@@ -662,6 +837,21 @@ class AppPTK:
         git_path = os.path.join(directory_path, '.git')
         return os.path.isdir(git_path)
     
+    def _scope_search_to(self, directory_path: str) -> None:
+        """
+        Ограничить поиск директорией, если она внутри текущего индекса
+        
+        Args:
+            directory_path: Текущая директория дерева
+        """
+        if self.semantic_indexer is None:
+            return
+        relative = os.path.relpath(directory_path, self.semantic_indexer.root_path)
+        if relative == os.curdir:
+            self._search_prefix = None
+        elif relative != os.pardir and not relative.startswith(os.pardir + os.sep):
+            self._search_prefix = relative
+    
     def _start_indexing_if_git_repo(self, directory_path: str) -> None:
         """
         Запустить индексацию только если директория является Git-репозиторием
@@ -669,13 +859,46 @@ class AppPTK:
         Args:
             directory_path: Путь к директории для проверки и индексации
         """
+        # Поддиректория уже проиндексированного корня: поиск по индексу корня с фильтром
+        from seditor.search.registry import registry
+        scope = registry.find_scope(directory_path)
+        if scope is not None and scope.prefix is not None:
+            self.semantic_indexer = scope.indexer
+            self._search_prefix = scope.prefix
+            logger.info('Reusing index of %s for %s', scope.indexer.root_path, directory_path)
+            return
+        
         if not self._is_git_repository(directory_path):
-            logger.info(f'Skipping indexing for non-git directory: {directory_path}')
+            logger.info('Skipping indexing for non-git directory: %s', directory_path)
             return
         
-        logger.info(f'Git repository detected, starting indexing: {directory_path}')
+        logger.info('Git repository detected, starting indexing: %s', directory_path)
         self._start_indexing(directory_path)
     
+    def _create_indexer(self, directory_path: str) -> 'SemanticIndexer':
+        """
+        Индексатор директории из общего реестра (модуль поиска импортируется при первом использовании)
+        
+        Args:
+            directory_path: Корень индексации
+            
+        Returns:
+            SemanticIndexer корня (один на процесс, модель общая)
+        """
+        from seditor.search.registry import registry
+        return registry.get(directory_path)
+    
+    async def _prewarm_search(self) -> None:
+        """Фоновый прогрев модели эмбеддингов после отрисовки первого кадра"""
+        try:
+            await asyncio.sleep(self.PREWARM_DELAY)
+            from seditor.search.embeddings import prewarm
+            loop = asyncio.get_running_loop()
+            if await loop.run_in_executor(None, prewarm):
+                logger.info('Search model prewarmed')
+        except asyncio.CancelledError:
+            pass
+    
     def _start_indexing(self, directory_path: str) -> None:
         """
         Запустить индексацию директории в фоне
@@ -684,18 +907,16 @@ class AppPTK:
             directory_path: Путь к директории для индексации
         """
         # Отменяем предыдущую задачу индексации если есть
-        if self._indexing_task and not self._indexing_task.done():
-            self._indexing_task.cancel()
+        self._cancel_indexing()
         
-        # Создаём индексатор если ещё не создан или путь изменился
-        if self.semantic_indexer is None or self.semantic_indexer.root_path != directory_path:
-            try:
-                self.semantic_indexer = SemanticIndexer(directory_path)
-                logger.info(f'Created semantic indexer for: {directory_path}')
-            except Exception as e:
-                logger.error(f'Failed to create indexer: {e}')
-                self._set_status('Ошибка создания индексатора')
-                return
+        # Индексатор корня берётся из реестра (повторный вход не создаёт новый)
+        try:
+            self.semantic_indexer = self._create_indexer(directory_path)
+            self._search_prefix = None
+        except Exception as e:
+            logger.error('Failed to create indexer: %s', e)
+            self._set_status('Ошибка создания индексатора')
+            return
         
         # Проверяем, нужна ли индексация
         if self.semantic_indexer.is_indexed():
@@ -706,33 +927,187 @@ class AppPTK:
         # Запускаем индексацию в фоне
         self._indexing_task = self.app.create_background_task(self._index_directory_async())
     
-    async def _index_directory_async(self) -> None:
-        """Асинхронная индексация директории"""
+    def _index_priorities(self) -> 'IndexPriorities':
+        """Приоритеты индексации: директория открытого файла и раскрытые узлы дерева"""
+        from seditor.search.scheduler import IndexPriorities
+        tree = self.file_tree_pane.tree
+        focus = (os.path.dirname(self.current_file),) if self.current_file else ()
+        # Корень раскрыт всегда и в приоритет не входит
+        expanded = tuple(node.path for node in tree.iter_nodes()
+                         if node.is_dir and node.expanded and node is not tree.root)
+        return IndexPriorities(focus_dirs=focus, expanded_dirs=expanded)
+    
+    def _cancel_indexing(self) -> None:
+        """
+        Остановить текущую индексацию (поток или процесс индексации сохраняет контрольную точку)
+        
+        Поток или процесс завершается не сразу; следующий проход дожидается
+        его в _wait_indexing_stopped.
+        """
+        if self._indexing_cancel is not None:
+            self._indexing_cancel.set()
+        if self._index_worker is not None:
+            self._index_worker.cancel()
+        if self._indexing_task and not self._indexing_task.done():
+            self._indexing_task.cancel()
+    
+    async def _wait_indexing_stopped(self) -> None:
+        """Дождаться, пока поток или процесс прошлого прохода перестанет писать в хранилище"""
+        work = self._indexing_work
+        if work is None or work.done():
+            return
+        logger.info('Waiting for the previous indexing run to stop')
+        if self._index_worker is not None:
+            # Процесс - с таймаутом и принудительным завершением
+            await self._index_worker.stop()
+        try:
+            # Поток отменяется по событию после текущего батча
+            await asyncio.shield(work)
+        except Exception:
+            pass  # ошибка прошлого прохода уже записана в лог
+    
+    def _track_indexing_work(self, work: asyncio.Future) -> asyncio.Future:
+        """Запомнить работу прохода; её ошибка не теряется, даже если задачу отменили"""
+        work.add_done_callback(lambda future: future.cancelled() or future.exception())
+        self._indexing_work = work
+        return work
+    
+    async def _index_directory_async(self, indexer: Optional['SemanticIndexer'] = None) -> None:
+        """
+        Асинхронная индексация директории
+        
+        Args:
+            indexer: Индексатор (по умолчанию - текущей директории); после него
+                индексируются шарды рабочего пространства из очереди
+        """
+        # Задача asyncio отменяется сразу, а поток индексации - по событию:
+        # пока прошлый проход не остановился, новый не начинается
+        await self._wait_indexing_stopped()
+        cancel = threading.Event()
+        self._indexing_cancel = cancel
+        indexer = indexer or self.semantic_indexer
         try:
             self._set_status('Индексация...')
             
-            def progress_callback(current: int, total: int):
-                """Обновление прогресса индексации"""
-                self._set_status(f'Индексация: {current}/{total} файлов')
-                if self.app.is_running:
-                    self.app.invalidate()
+            # Прогресс агрегируется в потоке индексации и доставляется в UI
+            # через call_soon_threadsafe не чаще нескольких раз в секунду
+            loop = asyncio.get_running_loop()
+            progress = ThrottledProgress(loop, self._on_indexing_progress)
             
-            # Запускаем индексацию в executor чтобы не блокировать UI
-            loop = asyncio.get_event_loop()
-            indexed_count = await loop.run_in_executor(
-                None,
-                lambda: self.semantic_indexer.index_directory(progress_callback)
-            )
+            # Первая индексация начинается со снимка из SEDITOR_SNAPSHOT_DIR,
+            # если он есть: догоняются только локальные отличия
+            from seditor.search.snapshot import restore_snapshot
+            manifest = await loop.run_in_executor(None, restore_snapshot, indexer)
+            if manifest is not None:
+                self._set_status(f'Индекс загружен из снимка ({manifest.get("files")} файлов), '
+                                 f'проверка изменений...')
             
-            self._set_status(f'Индексация завершена ({indexed_count} файлов)')
-            logger.info(f'Indexing completed: {indexed_count} files')
+            from seditor.search.worker import IndexWorker, use_index_process
+            try:
+                priorities = self._index_priorities()
+                # Работа прохода защищена от отмены задачи: она останавливается
+                # сама (по событию или команде cancel) и дожидается следующим проходом
+                if use_index_process():
+                    # Индексация в дочернем процессе с пониженным приоритетом
+                    self._index_worker = IndexWorker(indexer)
+                    work = asyncio.ensure_future(self._index_worker.run(progress, priorities))
+                else:
+                    # Индексация в executor чтобы не блокировать UI
+                    self._index_worker = None
+                    throttle = self._idle_throttle
+                    work = loop.run_in_executor(
+                        None,
+                        lambda: indexer.index_directory(progress, cancel, priorities, throttle)
+                    )
+                indexed_count = await asyncio.shield(self._track_indexing_work(work))
+            finally:
+                progress.close()
+                self._indexing_progress = None
+            
+            from seditor.search.sniff import format_skip_counts
+            skipped = format_skip_counts(indexer.skip_counts)
+            if skipped:
+                self._set_status(f'Индексация завершена ({indexed_count} файлов, пропущено: {skipped})')
+            else:
+                self._set_status(f'Индексация завершена ({indexed_count} файлов)')
+            logger.info('Indexing completed: %s files', indexed_count)
+            # Готовый индекс может перестать покрывать вложенные корни
+            self.workspace.invalidate()
             
         except asyncio.CancelledError:
+            cancel.set()
             self._set_status('Индексация отменена')
             logger.info('Indexing cancelled')
+            # Прерванный шард рабочего пространства доиндексируется позже
+            if indexer is not self.semantic_indexer and indexer not in self._index_queue:
+                self._index_queue.insert(0, indexer)
+            return
         except Exception as e:
             self._set_status('Ошибка индексации')
-            logger.error(f'Indexing failed: {e}', exc_info=True)
+            logger.error('Indexing failed: %s', e, exc_info=True)
+        
+        if self._index_queue and self._running:
+            self._indexing_task = self.app.create_background_task(
+                self._index_directory_async(self._index_queue.pop(0)))
+    
+    def _queue_indexing(self, indexer: 'SemanticIndexer') -> None:
+        """
+        Проиндексировать шард сейчас или после текущей индексации
+        
+        Args:
+            indexer: Индексатор шарда
+        """
+        if self._indexing_task is not None and not self._indexing_task.done():
+            if indexer not in self._index_queue:
+                self._index_queue.append(indexer)
+            return
+        self._indexing_task = self.app.create_background_task(self._index_directory_async(indexer))
+    
+    async def _index_workspace_async(self) -> None:
+        """Поставить в очередь непроиндексированные шарды рабочего пространства"""
+        try:
+            await asyncio.sleep(self.PREWARM_DELAY)
+            loop = asyncio.get_running_loop()
+            # Открытие хранилищ читает их с диска - не в потоке UI
+            pending = await loop.run_in_executor(
+                None,
+                lambda: [scope.indexer for scope in self.workspace.shards() if not scope.indexer.is_indexed()]
+            )
+            for indexer in pending:
+                self._queue_indexing(indexer)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.error('Failed to prepare workspace shards: %s', e, exc_info=True)
+    
+    def _toggle_workspace_root(self) -> None:
+        """Добавить текущую директорию в рабочее пространство или убрать её"""
+        current_path = self.file_tree_pane.tree.current_path
+        name = os.path.basename(current_path) or current_path
+        if self.workspace.remove_root(current_path):
+            self._set_status(f'{name} убран из рабочего пространства ({len(self.workspace)} корней)')
+            return
+        if not self.workspace.add_root(current_path):
+            return
+        self._set_status(f'{name} добавлен в рабочее пространство ({len(self.workspace)} корней)')
+        try:
+            from seditor.search.registry import registry
+            indexer = registry.scope_for(current_path).indexer
+            if not indexer.is_indexed():
+                self._queue_indexing(indexer)
+        except Exception as e:
+            logger.error('Failed to index workspace root: %s', e)
+            self._set_status('Ошибка создания индексатора')
+    
+    def _on_indexing_progress(self, snapshot: ProgressSnapshot) -> None:
+        """
+        Обновить статус индексации (вызывается в потоке цикла событий)
+        
+        Args:
+            snapshot: Агрегированное состояние прогресса
+        """
+        self._indexing_progress = snapshot
+        self._set_status(snapshot.format())
     
     def _perform_search(self, query: str) -> None:
         """
@@ -741,27 +1116,49 @@ class AppPTK:
         Args:
             query: Поисковый запрос
         """
-        if self.semantic_indexer is None:
+        if self.semantic_indexer is None and not len(self.workspace):
             self.command_palette.set_search_results([])
             return
         
         try:
-            results = self.semantic_indexer.search(query, top_k=10)
+            if len(self.workspace):
+                # Параллельный поиск по шардам корней и индексу текущей директории
+                from seditor.search.registry import IndexScope
+                extra = ()
+                if self.semantic_indexer is not None:
+                    extra = (IndexScope(self.semantic_indexer, self._search_prefix),)
+                results = self.workspace.search(query, top_k=10, extra=extra)
+            else:
+                results = self.semantic_indexer.search(query, top_k=10, path_prefix=self._search_prefix)
             self.command_palette.set_search_results(results)
         except Exception as e:
-            logger.error(f'Search failed: {e}')
+            logger.error('Search failed: %s', e)
             self.command_palette.set_search_results([])
     
+    def _get_search_preview(self, path: str) -> Optional[str]:
+        """Фрагмент найденного файла для палитры"""
+        if len(self.workspace):
+            return self.workspace.get_snippet(path, max_lines=self.PREVIEW_LINES)
+        if self.semantic_indexer is None:
+            return None
+        return self.semantic_indexer.get_snippet(path, max_lines=self.PREVIEW_LINES)
+    
     def _manual_reindex(self) -> None:
         """Ручная переиндексация текущей директории"""
         current_path = self.file_tree_pane.tree.current_path
         
-        # Пересоздаём индексатор
+        self._cancel_indexing()
+        
+        # Внутри проиндексированного корня переиндексируется корень (повторный
+        # проход инкрементальный), поиск остаётся ограничен текущей директорией
         try:
-            self.semantic_indexer = SemanticIndexer(current_path)
-            logger.info(f'Recreated semantic indexer for reindexing: {current_path}')
+            from seditor.search.registry import registry
+            scope = registry.scope_for(current_path)
+            self.semantic_indexer = scope.indexer
+            self._search_prefix = scope.prefix
+            logger.info('Reindexing %s', scope.indexer.root_path)
         except Exception as e:
-            logger.error(f'Failed to create indexer: {e}')
+            logger.error('Failed to create indexer: %s', e)
             self._set_status('Ошибка создания индексатора')
             return
         
@@ -778,6 +1175,39 @@ class AppPTK:
             self._autosave_task.cancel()
         self.app.exit()
 
+    def _register_memory_estimators(self) -> None:
+        """Зарегистрировать оценщики памяти подсистем"""
+        def indexer_usage(key: str) -> int:
+            if self.semantic_indexer is None:
+                return 0
+            return self.semantic_indexer.memory_usage()[key]
+        
+        self.memory.register('модель', lambda: indexer_usage('model'))
+        self.memory.register('индекс', lambda: indexer_usage('vectors'))
+        self.memory.register('дерево', lambda: self.file_tree_pane.tree.memory_usage()[1])
+        self.memory.register('буфер', self.editor_pane.memory_usage)
+    
+    def _enforce_memory_limits(self) -> None:
+        """Выгрузить простаивающую модель и забыть давно свёрнутые поддеревья"""
+        limits = self.memory_limits
+        if self.semantic_indexer is not None and limits.model_idle_seconds > 0:
+            self.semantic_indexer.release_if_idle(limits.model_idle_seconds)
+        freed = self.file_tree_pane.tree.prune(
+            max_idle=limits.tree_idle_seconds,
+            max_nodes=limits.tree_max_nodes,
+        )
+        if freed:
+            logger.info('Pruned %d file tree nodes', freed)
+    
+    async def _maintenance_loop(self) -> None:
+        """Периодическое применение лимитов памяти"""
+        try:
+            while self._running:
+                await asyncio.sleep(self.MAINTENANCE_INTERVAL)
+                self._enforce_memory_limits()
+        except asyncio.CancelledError:
+            pass
+    
     async def _autosave_loop(self) -> None:
         try:
             while self._running:
@@ -797,7 +1227,16 @@ class AppPTK:
             self._running = False
             if self._autosave_task and not self._autosave_task.done():
                 self._autosave_task.cancel()
+            # Поток индексации дописывает текущий батч и сохраняет контрольную точку
+            self._cancel_indexing()
+            self.workspace.close()
             try:
                 self._save_if_needed('Сохранено при выходе')
             except Exception as exc:  # noqa: BLE001
                 logger.error('Не удалось сохранить при выходе: %s', exc, exc_info=True)
+            self._finish_profiling()
+            if self._metrics_file:
+                try:
+                    metrics.dump_json(self._metrics_file)
+                except OSError as exc:
+                    logger.error('Не удалось сохранить метрики: %s', exc)
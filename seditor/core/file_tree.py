@@ -4,14 +4,19 @@
 """
 
 import os
-from typing import Optional, List
+import sys
+import time
+from typing import Optional, List, Tuple
 from seditor.utils.file_utils import scan_directory, normalize_path
+from seditor.utils.ignore import IgnoreMatcher, get_ignore_matcher
+from seditor.utils.metrics import metrics
 
 
 class FileNode:
     """Узел дерева файлов"""
 
-    def __init__(self, name: str, path: str, is_dir: bool, parent: Optional['FileNode'] = None):
+    def __init__(self, name: str, path: str, is_dir: bool, parent: Optional['FileNode'] = None,
+                 ignore: Optional[IgnoreMatcher] = None):
         """
         Инициализация узла
 
@@ -20,14 +25,17 @@ class FileNode:
             path: Полный путь
             is_dir: True если директория, False если файл
             parent: Родительский узел
+            ignore: Правила исключения (по умолчанию - правила родителя)
         """
         self.name = name
         self.path = path
         self.is_dir = is_dir
         self.parent = parent
+        self.ignore = ignore if ignore is not None or parent is None else parent.ignore
         self.children: List['FileNode'] = []
         self.expanded = False  # Развёрнута ли директория
         self.scanned = False  # Сканировались ли дети
+        self.last_visited = 0.0  # Когда директорию последний раз разворачивали (time.monotonic)
 
     def get_depth(self) -> int:
         """Получить уровень вложенности узла (0 - корень)"""
@@ -38,13 +46,14 @@ class FileNode:
             node = node.parent
         return depth
 
+    @metrics.timed('tree.scan_children')
     def scan_children(self) -> None:
         """Сканировать дочерние элементы"""
         if not self.is_dir or self.scanned:
             return
 
         try:
-            items = scan_directory(self.path)
+            items = scan_directory(self.path, self.ignore)
             self.children = [
                 FileNode(name=name, path=full_path, is_dir=is_dir, parent=self)
                 for name, is_dir, full_path in items
@@ -60,11 +69,18 @@ class FileNode:
             if not self.scanned:
                 self.scan_children()
             self.expanded = True
+            self.last_visited = time.monotonic()
 
     def collapse(self) -> None:
         """Свернуть директорию"""
         if self.is_dir:
             self.expanded = False
+            self.last_visited = time.monotonic()
+
+    def forget_children(self) -> None:
+        """Забыть отсканированных детей (при следующем раскрытии каталог сканируется заново)"""
+        self.children = []
+        self.scanned = False
 
     def toggle(self) -> None:
         """Переключить состояние развёрнутости"""
@@ -77,26 +93,34 @@ class FileNode:
 class FileTree:
     """Дерево файлов"""
 
-    def __init__(self, root_path: str):
+    def __init__(self, root_path: str, respect_ignore: bool = True):
         """
         Инициализация дерева файлов
 
         Args:
             root_path: Путь к корневой директории
+            respect_ignore: Скрывать файлы, исключённые .gitignore/.seditorignore
         """
         normalized_path = normalize_path(root_path)
         if not os.path.isdir(normalized_path):
             normalized_path = os.getcwd()
 
+        self.respect_ignore = respect_ignore
+
         # Создаём корневой узел
-        self.root = FileNode(name=os.path.basename(normalized_path) or normalized_path,
-                            path=normalized_path,
-                            is_dir=True)
+        self.root = self._make_root(normalized_path)
         self.root.expand()  # Корневая директория развёрнута по умолчанию
 
         self.current_path = normalized_path
         self.selected_index = 0  # Индекс выбранного элемента в плоском списке
 
+    def _make_root(self, path: str) -> FileNode:
+        """Создать корневой узел для директории"""
+        return FileNode(name=os.path.basename(path) or path,
+                        path=path,
+                        is_dir=True,
+                        ignore=get_ignore_matcher(path) if self.respect_ignore else None)
+
     def get_visible_items(self) -> List[FileNode]:
         """
         Получить список видимых элементов (все развёрнутые узлы в дереве)
@@ -159,9 +183,7 @@ class FileTree:
             self.current_path = selected.path
             self.selected_index = 0
             # Обновить корневой узел
-            self.root = FileNode(name=os.path.basename(selected.path) or selected.path,
-                                path=selected.path,
-                                is_dir=True)
+            self.root = self._make_root(selected.path)
             self.root.expand()  # Корень всегда развёрнут
             return None
         else:
@@ -187,9 +209,7 @@ class FileTree:
             self.current_path = parent_path
             self.selected_index = 0
             # Обновить корневой узел
-            self.root = FileNode(name=os.path.basename(parent_path) or parent_path,
-                                path=parent_path,
-                                is_dir=True)
+            self.root = self._make_root(parent_path)
             self.root.expand()
 
     def delete_selected(self) -> bool:
@@ -229,6 +249,82 @@ class FileTree:
         except (OSError, PermissionError):
             return False
 
+    def iter_nodes(self):
+        """Обойти все загруженные узлы дерева (включая корень)"""
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(node.children)
+
+    def memory_usage(self) -> Tuple[int, int]:
+        """
+        Оценить память загруженных узлов
+
+        Returns:
+            (количество узлов, примерный размер в байтах)
+        """
+        count = 0
+        size = 0
+        for node in self.iter_nodes():
+            count += 1
+            size += (sys.getsizeof(node) + sys.getsizeof(node.__dict__)
+                     + sys.getsizeof(node.name) + sys.getsizeof(node.path)
+                     + sys.getsizeof(node.children))
+        return count, size
+
+    def prune(self, max_idle: float = 0, max_nodes: int = 0, now: Optional[float] = None) -> int:
+        """
+        Забыть детей свёрнутых директорий, которые давно не посещались
+
+        Видимые узлы не затрагиваются: забываются только поддеревья под
+        свёрнутыми директориями, поэтому выделение и список видимых
+        элементов не меняются.
+
+        Args:
+            max_idle: Забывать поддеревья, свёрнутые дольше max_idle секунд (0 - не забывать по времени)
+            max_nodes: Если узлов больше, забывать самые давние поддеревья до лимита (0 - без лимита)
+            now: Текущее время time.monotonic (для тестов)
+
+        Returns:
+            Количество освобождённых узлов
+        """
+        now = time.monotonic() if now is None else now
+
+        # Свёрнутые отсканированные директории с размером их поддеревьев
+        candidates = []
+        total = 0
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            total += 1
+            if node is not self.root and node.is_dir and node.scanned and not node.expanded:
+                candidates.append(node)
+            else:
+                stack.extend(node.children)
+
+        def subtree_size(node: FileNode) -> int:
+            size = 0
+            pending = list(node.children)
+            while pending:
+                child = pending.pop()
+                size += 1
+                pending.extend(child.children)
+            return size
+
+        sizes = {id(node): subtree_size(node) for node in candidates}
+        total += sum(sizes.values())
+
+        freed = 0
+        candidates.sort(key=lambda node: node.last_visited)
+        for node in candidates:
+            idle = max_idle and now - node.last_visited >= max_idle
+            over_limit = max_nodes and total - freed > max_nodes
+            if idle or over_limit:
+                freed += sizes[id(node)]
+                node.forget_children()
+        return freed
+
     def refresh(self) -> None:
         """Обновить дерево (пересканировать текущую директорию)"""
         self.root.scanned = False
@@ -0,0 +1,246 @@
+# -*- coding: utf-8 -*-
+"""
+Реестр тем: каждая тема компилируется в стиль prompt_toolkit один раз
+"""
+
+import logging
+from typing import Dict, Hashable, List, Tuple
+
+from prompt_toolkit.application import Application
+from prompt_toolkit.filters import Filter
+from prompt_toolkit.styles import (
+    Attrs,
+    BaseStyle,
+    DEFAULT_ATTRS,
+    DynamicStyle,
+    Style,
+    default_pygments_style,
+    default_ui_style,
+    style_from_pygments_cls,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_THEME = 'vscode-dark'
+
+# Подсветка синтаксиса для кастомной темы VS Code Dark+
+VSCODE_DARK_SYNTAX: List[Tuple[str, str]] = [
+    ('pygments.keyword', 'fg:#c586c0'),
+    ('pygments.keyword.namespace', 'fg:#c586c0'),
+    ('pygments.keyword.type', 'fg:#4ec9b0'),
+    ('pygments.name', 'fg:#9cdcfe'),
+    ('pygments.name.builtin', 'fg:#4ec9b0'),
+    ('pygments.name.function', 'fg:#dcdcaa'),
+    ('pygments.name.class', 'fg:#4ec9b0'),
+    ('pygments.name.decorator', 'fg:#dcdcaa'),
+    ('pygments.string', 'fg:#ce9178'),
+    ('pygments.string.doc', 'fg:#6a9955'),
+    ('pygments.number', 'fg:#b5cea8'),
+    ('pygments.comment', 'fg:#6a9955'),
+    ('pygments.comment.single', 'fg:#6a9955'),
+    ('pygments.comment.multiline', 'fg:#6a9955'),
+    ('pygments.operator', 'fg:#d4d4d4'),
+    ('pygments.punctuation', 'fg:#d4d4d4'),
+    ('pygments.literal', 'fg:#569cd6'),
+    ('pygments.literal.string', 'fg:#ce9178'),
+]
+
+# Минимальная подсветка, если тема Pygments не найдена
+FALLBACK_SYNTAX: List[Tuple[str, str]] = [
+    ('pygments.keyword', 'fg:#c586c0'),
+    ('pygments.name.function', 'fg:#dcdcaa'),
+    ('pygments.string', 'fg:#ce9178'),
+    ('pygments.comment', 'fg:#6a9955'),
+]
+
+# Базовые стили для UI
+UI_RULES: List[Tuple[str, str]] = [
+    # Дерево файлов
+    ('tree', 'bg:#1e1e1e fg:#d4d4d4'),
+    ('tree.header', 'fg:#888'),
+    ('tree.text', 'fg:#d4d4d4'),
+    ('tree.selected', 'fg:#d4d4d4'),
+    ('tree.selected.focused', 'bg:#3a3d41 fg:#ffffff'),
+    ('tree.empty', 'fg:#666'),
+    ('separator', 'fg:#444'),
+
+    # Редактор
+    ('editor', 'bg:#1e1e1e fg:#d4d4d4'),
+    ('editor.line-number', '#858585'),
+    ('editor.cursor', 'bg:#aeafad'),
+    ('editor.selection', 'bg:#264f78'),
+
+    # Статус-бар
+    ('status', 'bg:#1b1b1b fg:#d4d4d4'),
+    ('status.label', 'bold'),
+    ('status.separator', 'fg:#555'),
+    ('status.message', 'fg:#9cdcfe'),
+    ('status.hint', 'fg:#888 italic'),
+
+    # Командная палитра
+    ('command_palette', 'bg:#252526 fg:#cccccc'),
+    ('command_palette.header', 'bg:#252526 fg:#ffffff bold'),
+    ('command_palette.separator', 'bg:#252526 fg:#555'),
+    ('command_palette.item', 'bg:#252526 fg:#cccccc'),
+    ('command_palette.item.filename', 'bg:#252526 fg:#ffffff bold'),
+    ('command_palette.item.path', 'bg:#252526 fg:#888'),
+    ('command_palette.selected', 'bg:#094771 fg:#ffffff bold'),
+    ('command_palette.selected.filename', 'bg:#094771 fg:#ffffff bold'),
+    ('command_palette.selected.path', 'bg:#094771 fg:#aaaaaa'),
+    ('command_palette.empty', 'bg:#252526 fg:#888 italic'),
+    ('command_palette.preview', 'bg:#252526 fg:#6a9955 italic'),
+    ('command_palette.input', 'bg:#3c3c3c fg:#cccccc'),
+
+    # Оверлей метрик
+    ('perf_hud', 'bg:#2d2d30 fg:#b5cea8'),
+]
+
+
+def build_theme_rules(theme_id: str) -> List[Tuple[str, str]]:
+    """
+    Собрать полный список правил темы в порядке приоритета
+
+    Включает стили prompt_toolkit по умолчанию, поэтому скомпилированная тема
+    самодостаточна и может использоваться рендерером напрямую.
+
+    Args:
+        theme_id: Идентификатор темы ('vscode-dark' или имя стиля Pygments)
+
+    Returns:
+        Список правил (класс, стиль)
+    """
+    if theme_id == DEFAULT_THEME:
+        pygments_rules: List[Tuple[str, str]] = []
+        syntax_colors = VSCODE_DARK_SYNTAX
+    else:
+        try:
+            from pygments.styles import get_style_by_name
+            pygments_rules = style_from_pygments_cls(get_style_by_name(theme_id)).style_rules
+            syntax_colors = []
+        except Exception:
+            # Если тема не найдена, используем нашу кастомную
+            logger.warning('Pygments style not found: %s', theme_id)
+            pygments_rules = []
+            syntax_colors = FALLBACK_SYNTAX
+
+    return (
+        list(default_ui_style().style_rules)
+        + list(default_pygments_style().style_rules)
+        + list(pygments_rules)
+        + UI_RULES
+        + syntax_colors
+    )
+
+
+class CompiledTheme(BaseStyle):
+    """Скомпилированная тема с кэшем атрибутов по строке стиля"""
+
+    def __init__(self, theme_id: str, rules: List[Tuple[str, str]]):
+        """
+        Args:
+            theme_id: Идентификатор темы
+            rules: Полный список правил (см. build_theme_rules)
+        """
+        self.theme_id = theme_id
+        self._style = Style(rules)
+        self._attrs_cache: Dict[Tuple[str, Attrs], Attrs] = {}
+
+    @property
+    def style_rules(self) -> List[Tuple[str, str]]:
+        return self._style.style_rules
+
+    def get_attrs_for_style_str(self, style_str: str, default: Attrs = DEFAULT_ATTRS) -> Attrs:
+        key = (style_str, default)
+        attrs = self._attrs_cache.get(key)
+        if attrs is None:
+            attrs = self._style.get_attrs_for_style_str(style_str, default)
+            self._attrs_cache[key] = attrs
+        return attrs
+
+    def invalidation_hash(self) -> Hashable:
+        return ('seditor-theme', self.theme_id)
+
+
+class ThemeRegistry:
+    """Ленивый реестр скомпилированных тем"""
+
+    def __init__(self):
+        self._themes: Dict[str, CompiledTheme] = {}
+
+    def get(self, theme_id: str) -> CompiledTheme:
+        """
+        Получить тему, скомпилировав её при первом обращении
+
+        Args:
+            theme_id: Идентификатор темы
+
+        Returns:
+            CompiledTheme (один и тот же объект при повторных вызовах)
+        """
+        theme = self._themes.get(theme_id)
+        if theme is None:
+            theme = CompiledTheme(theme_id, build_theme_rules(theme_id))
+            self._themes[theme_id] = theme
+        return theme
+
+    def is_compiled(self, theme_id: str) -> bool:
+        """Проверить, скомпилирована ли тема"""
+        return theme_id in self._themes
+
+
+class ThemeStyle(BaseStyle):
+    """
+    Стиль-указатель на активную тему.
+
+    Смена темы - это замена ссылки на CompiledTheme: правила не пересобираются,
+    а кэш атрибутов темы переживает переключения туда и обратно.
+    """
+
+    def __init__(self, registry: ThemeRegistry, theme_id: str = DEFAULT_THEME):
+        """
+        Args:
+            registry: Реестр тем
+            theme_id: Начальная тема
+        """
+        self.registry = registry
+        self._active = registry.get(theme_id)
+
+    @property
+    def theme_id(self) -> str:
+        """Идентификатор активной темы"""
+        return self._active.theme_id
+
+    def activate(self, theme_id: str) -> None:
+        """
+        Сделать тему активной
+
+        Args:
+            theme_id: Идентификатор темы
+        """
+        self._active = self.registry.get(theme_id)
+
+    @property
+    def style_rules(self) -> List[Tuple[str, str]]:
+        return self._active.style_rules
+
+    def get_attrs_for_style_str(self, style_str: str, default: Attrs = DEFAULT_ATTRS) -> Attrs:
+        return self._active.get_attrs_for_style_str(style_str, default)
+
+    def invalidation_hash(self) -> Hashable:
+        return self._active.invalidation_hash()
+
+
+class ThemedApplication(Application):
+    """
+    Application, рендерер которого использует скомпилированную тему напрямую
+
+    Обычный Application сливает свой стиль со стилями по умолчанию в
+    _MergedStyle, который при каждой смене хэша инвалидации (то есть при
+    каждом переключении темы) заново собирает Style из всех правил.
+    Скомпилированные темы уже содержат стили по умолчанию (см.
+    build_theme_rules), поэтому слияние не нужно, и смена темы остаётся
+    заменой указателя с сохранением кэша атрибутов темы.
+    """
+
+    def _create_merged_style(self, include_default_pygments_style: Filter) -> BaseStyle:
+        return DynamicStyle(lambda: self.style)
@@ -2,21 +2,115 @@
 Точка входа приложения seditor
 """
 
-import sys
-from seditor.core.app_ptk import AppPTK
+import time
 
+_START_TIME = time.perf_counter()
 
-def main():
+import argparse  # noqa: E402
+import os  # noqa: E402
+import sys  # noqa: E402
+
+from seditor.utils.logging_setup import setup_logging, shutdown_logging  # noqa: E402
+
+# Переменная окружения для фонового прогрева модели поиска
+PREWARM_ENV = 'SEDITOR_PREWARM'
+# Переменная окружения с путём для сохранения метрик при выходе
+METRICS_ENV = 'SEDITOR_METRICS_FILE'
+# Допустимые значения --log-level
+LOG_LEVELS = ('DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL')
+
+
+def _parse_args(argv=None) -> argparse.Namespace:
+    """Разобрать аргументы командной строки"""
+    parser = argparse.ArgumentParser(prog='seditor', description='Терминальный редактор seditor')
+    parser.add_argument(
+        '--log-level',
+        default=None,
+        type=str.upper,
+        choices=LOG_LEVELS,
+        help='Уровень логирования (DEBUG, INFO, WARNING, ERROR); по умолчанию $SEDITOR_LOG_LEVEL или INFO',
+    )
+    parser.add_argument(
+        '--log-file',
+        default=None,
+        help='Файл лога; по умолчанию $SEDITOR_LOG_FILE или ~/.local/state/seditor/seditor.log',
+    )
+    parser.add_argument(
+        '--profile-startup',
+        action='store_true',
+        help='После выхода вывести время импортов, создания UI и первого кадра',
+    )
+    parser.add_argument(
+        '--prewarm',
+        action='store_true',
+        default=os.environ.get(PREWARM_ENV, '') not in ('', '0'),
+        help='Загрузить модель семантического поиска в фоне после запуска UI '
+             f'(также ${PREWARM_ENV}=1)',
+    )
+    parser.add_argument(
+        '--metrics-out',
+        default=os.environ.get(METRICS_ENV),
+        help=f'Сохранить метрики производительности в JSON при выходе (также ${METRICS_ENV})',
+    )
+    parser.add_argument(
+        '--root',
+        action='append',
+        default=[],
+        metavar='PATH',
+        help='Дополнительный корень рабочего пространства для поиска (можно несколько раз; '
+             'также $SEDITOR_WORKSPACE через двоеточие)',
+    )
+    # Подкоманды без интерфейса; без подкоманды запускается редактор
+    from seditor.cli import add_commands
+    add_commands(parser.add_subparsers(dest='command', metavar='{index,search}'))
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
     """Главная функция приложения"""
-    # Проверка, что запущено в терминале
+    args = _parse_args(argv)
+
+    if args.command is not None:
+        setup_logging(level=args.log_level, log_file=args.log_file)
+        try:
+            return args.handler(args)
+        finally:
+            shutdown_logging()
+
+    # Проверка, что запущено в терминале (нужна только редактору)
     if not sys.stdin.isatty():
         print("Ошибка: seditor должен быть запущен в терминале (не через pipe/redirect).")
-        print("Используйте: poetry run seditor")
+        print("Используйте: poetry run seditor (или seditor index / seditor search без интерфейса)")
         sys.exit(1)
     
-    app = AppPTK()
-    app.run()
+    setup_logging(level=args.log_level, log_file=args.log_file)
+
+    profiler = None
+    if args.profile_startup:
+        from seditor.utils.startup_profiler import StartupProfiler
+        profiler = StartupProfiler(_START_TIME)
+        profiler.import_module('prompt_toolkit')
+        profiler.import_module('pygments.lexers')
+        profiler.import_module('seditor.core.app_ptk')
+
+    # UI импортируется только после разбора аргументов и проверки терминала
+    from seditor.core.app_ptk import AppPTK
+
+    try:
+        if profiler:
+            with profiler.stage('AppPTK()'):
+                app = AppPTK(prewarm=args.prewarm, metrics_file=args.metrics_out,
+                             workspace_roots=args.root)
+            profiler.attach(app.app)
+        else:
+            app = AppPTK(prewarm=args.prewarm, metrics_file=args.metrics_out,
+                         workspace_roots=args.root)
+        app.run()
+    finally:
+        shutdown_logging()
+        if profiler:
+            print(profiler.report(), file=sys.stderr)
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
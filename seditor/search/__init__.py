@@ -3,7 +3,17 @@
 Модуль семантического поиска по файлам
 """
 
-from seditor.search.semantic_indexer import SemanticIndexer
-
 __all__ = ['SemanticIndexer']
 
+# Переменная окружения для выбора хранилища индекса: chroma, int8, binary, ivf
+# (здесь, а не в semantic_indexer: разбор аргументов не должен импортировать индексатор)
+INDEX_MODE_ENV = 'SEDITOR_INDEX_MODE'
+INDEX_MODES = ('chroma', 'int8', 'binary', 'ivf')
+
+
+def __getattr__(name):
+    # Ленивый импорт: пакет не загружается при старте редактора
+    if name == 'SemanticIndexer':
+        from seditor.search.semantic_indexer import SemanticIndexer
+        return SemanticIndexer
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
@@ -0,0 +1,239 @@
+# -*- coding: utf-8 -*-
+"""
+Приближённый поиск ближайших соседей: IVF-индекс на NumPy
+
+Векторы разбиваются на nlist кластеров k-means (грубый квантователь). Запрос
+сравнивается с центроидами, и точные расстояния считаются только для
+векторов из nprobe ближайших кластеров. nprobe - ручка полнота/скорость:
+больше кластеров - выше полнота и медленнее поиск.
+
+Вставка назначает вектор ближайшему центроиду, удаление помечает строку;
+когда индекс вырастает в несколько раз относительно обучающей выборки,
+центроиды переобучаются. Пока векторов мало, поиск точный.
+"""
+
+import logging
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from seditor.search.vector_store import RowVectorStore, locked, stage_array
+
+logger = logging.getLogger(__name__)
+
+# Переменная окружения с числом просматриваемых кластеров
+NPROBE_ENV = 'SEDITOR_ANN_NPROBE'
+
+
+def kmeans(vectors: np.ndarray, clusters: int, iterations: int = 10, seed: int = 0) -> np.ndarray:
+    """
+    Кластеризация k-means (алгоритм Ллойда)
+
+    Args:
+        vectors: Матрица векторов (n, d)
+        clusters: Количество кластеров
+        iterations: Количество итераций
+        seed: Зерно для выбора начальных центроидов
+
+    Returns:
+        Центроиды (clusters, d)
+    """
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), size=clusters, replace=False)].copy()
+    for _ in range(iterations):
+        assignment = nearest_centroids(vectors, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, vectors)
+        counts = np.bincount(assignment, minlength=clusters)
+        filled = counts > 0
+        centroids[filled] = sums[filled] / counts[filled, None]
+        # Пустой кластер получает случайный вектор, чтобы не терять список
+        empty = np.flatnonzero(~filled)
+        if len(empty):
+            centroids[empty] = vectors[rng.choice(len(vectors), size=len(empty), replace=False)]
+    return centroids
+
+
+def nearest_centroids(vectors: np.ndarray, centroids: np.ndarray, chunk: int = 8192) -> np.ndarray:
+    """Номер ближайшего центроида для каждого вектора (пачками, чтобы ограничить память)"""
+    centroid_norms = (centroids * centroids).sum(axis=1)
+    result = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), chunk):
+        block = vectors[start:start + chunk]
+        # ||x - c||^2 = ||x||^2 - 2 x.c + ||c||^2, ||x||^2 не влияет на argmin
+        result[start:start + chunk] = np.argmin(centroid_norms - 2.0 * block @ centroids.T, axis=1)
+    return result
+
+
+class IVFVectorStore(RowVectorStore):
+    """Векторное хранилище с инвертированными списками по кластерам k-means"""
+
+    KIND = 'ivf'
+
+    # Меньше этого числа векторов поиск точный, центроиды не обучаются
+    TRAIN_MIN = 2048
+    # Векторов обучающей выборки на кластер
+    SAMPLES_PER_CLUSTER = 32
+    # Переобучение, когда индекс вырос во столько раз с последнего обучения
+    RETRAIN_GROWTH = 4
+    DEFAULT_NPROBE = 8
+
+    def __init__(self, directory: str, dimension: Optional[int] = None,
+                 nprobe: Optional[int] = None, nlist: Optional[int] = None):
+        """
+        Args:
+            directory: Директория хранилища (создаётся при необходимости)
+            dimension: Размерность векторов (по умолчанию определяется при первой вставке)
+            nprobe: Сколько ближайших кластеров просматривать (по умолчанию $SEDITOR_ANN_NPROBE или 8)
+            nlist: Количество кластеров (по умолчанию ~4*sqrt(n) при обучении)
+        """
+        self.nprobe = nprobe or int(os.environ.get(NPROBE_ENV, self.DEFAULT_NPROBE))
+        self.nlist = nlist
+        self._vectors: Optional[np.ndarray] = None
+        self._lists: Optional[np.ndarray] = None  # кластер строки (-1 - не назначен)
+        self._centroids: Optional[np.ndarray] = None
+        self._trained_size = 0
+        # Строки, отсортированные по кластерам, и границы кластеров (строятся лениво)
+        self._inverted: Optional[Tuple[np.ndarray, np.ndarray]] = None
+        super().__init__(directory, dimension)
+
+    def _row_arrays(self) -> Dict[str, Tuple[tuple, type]]:
+        return {
+            '_vectors': ((self.dimension or 0,), np.float32),
+            '_lists': ((), np.int32),
+        }
+
+    @property
+    def is_trained(self) -> bool:
+        """Обучены ли центроиды"""
+        return self._centroids is not None
+
+    @locked
+    def upsert(self, ids, embeddings, metadatas=None, documents=None) -> None:
+        """
+        Добавить или обновить векторы
+
+        Args:
+            ids: Идентификаторы
+            embeddings: Векторы
+            metadatas: Метаданные
+            documents: Игнорируются - тексты в хранилище не сохраняются
+        """
+        if not len(ids):
+            return
+        vectors = self._check_vectors(embeddings)
+        rows = self._assign_rows(ids, metadatas)
+        self._vectors[rows] = vectors
+        if self._centroids is not None:
+            self._lists[rows] = nearest_centroids(vectors, self._centroids)
+        else:
+            self._lists[rows] = -1
+        self._inverted = None
+
+    def train(self) -> None:
+        """
+        Обучить центроиды на текущих векторах и перераспределить строки по кластерам
+
+        Вызывается пишущим потоком (при сохранении индекса): k-means и распределение
+        строк считаются без блокировки хранилища, поэтому поиск из потока UI в это
+        время идёт по прежним спискам или точным перебором. Строки, добавленные
+        за время обучения, распределяются при подмене центроидов.
+        """
+        with self._lock:
+            size = self._size
+            alive = np.flatnonzero(self._alive[:size])
+            if len(alive) == 0:
+                return
+            nlist = self.nlist or max(1, int(4 * np.sqrt(len(alive))))
+            nlist = min(nlist, len(alive))
+            rng = np.random.default_rng(0)
+            sample_size = min(len(alive), nlist * self.SAMPLES_PER_CLUSTER)
+            sample = self._vectors[np.sort(rng.choice(alive, size=sample_size, replace=False))]
+            vectors = self._vectors[:size]
+        started = time.perf_counter()
+        centroids = kmeans(sample, nlist)
+        lists = nearest_centroids(vectors, centroids)
+        with self._lock:
+            self._centroids = centroids
+            self._lists[:size] = lists
+            if self._size > size:
+                self._lists[size:self._size] = nearest_centroids(self._vectors[size:self._size], centroids)
+            self._trained_size = len(alive)
+            self._inverted = None
+            self._dirty = True
+        logger.info('IVF index trained: %d vectors, %d lists in %.0f ms', len(alive), nlist,
+                    (time.perf_counter() - started) * 1000)
+
+    def _maybe_train(self) -> None:
+        count = self.count()
+        if self._centroids is None:
+            if count >= self.TRAIN_MIN:
+                self.train()
+        elif count > self._trained_size * self.RETRAIN_GROWTH:
+            self.train()
+
+    def _inverted_lists(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Строки, отсортированные по кластерам, и смещения начала каждого кластера"""
+        if self._inverted is None:
+            lists = self._lists[:self._size]
+            order = np.argsort(lists, kind='stable').astype(np.int32)
+            bounds = np.searchsorted(lists[order], np.arange(len(self._centroids) + 1))
+            self._inverted = (order, bounds)
+        return self._inverted
+
+    def _candidate_rows(self, query: np.ndarray, n_results: int) -> np.ndarray:
+        """Строки из nprobe ближайших кластеров (кластеров больше, если кандидатов мало)"""
+        centroid_distances = ((self._centroids - query) ** 2).sum(axis=1)
+        order, bounds = self._inverted_lists()
+        probes = np.argsort(centroid_distances)
+        chunks = []
+        found = 0
+        for probed, cluster in enumerate(probes):
+            if probed >= self.nprobe and found >= n_results:
+                break
+            chunk = order[bounds[cluster]:bounds[cluster + 1]]
+            chunks.append(chunk)
+            found += len(chunk)
+        return np.concatenate(chunks) if chunks else np.empty(0, dtype=np.int32)
+
+    def _query_one(self, query: np.ndarray, n_results: int):
+        # Центроиды обучаются только при сохранении: до этого поиск точный
+        if self._centroids is None:
+            rows = np.flatnonzero(self._alive[:self._size])
+        else:
+            rows = self._candidate_rows(query, n_results)
+            rows = rows[self._alive[rows]]
+        diff = self._vectors[rows] - query
+        distances = (diff * diff).sum(axis=1)
+        if len(rows) > n_results:
+            top = np.argpartition(distances, n_results - 1)[:n_results]
+        else:
+            top = np.arange(len(rows))
+        top = top[np.argsort(distances[top])]
+        return rows[top].tolist(), distances[top]
+
+    # --- сохранение ------------------------------------------------------
+
+    def flush(self) -> None:
+        """Обучить центроиды при необходимости и сохранить индекс"""
+        self._maybe_train()
+        super().flush()
+
+    def _meta(self) -> dict:
+        return {'trained_size': self._trained_size}
+
+    def _load_meta(self, meta: dict) -> None:
+        self._trained_size = meta.get('trained_size', 0)
+        if self._trained_size and os.path.exists(self._path('centroids.npy')):
+            with self._open_data('centroids.npy', meta) as f:
+                self._centroids = np.load(f)
+
+    def _save_files(self) -> List[str]:
+        if self._centroids is None:
+            return []
+        return [stage_array(self._path('centroids.npy'), self._centroids)]
+
+    def _compact_rows(self, keep: List[int]) -> None:
+        self._inverted = None
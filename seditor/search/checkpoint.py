@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+"""
+Контрольные точки индексации
+
+Файл состояния в .seditor/ хранит для каждого обработанного файла его
+mtime, размер, id записи индекса (хэш содержимого) и SHA блоба git, а
+также признак завершённости. Индекс считается готовым только после успешного окончания
+прохода; прерванная (отменой или падением) индексация продолжается со
+следующего запуска: файлы с неизменными mtime и размером не перечитываются,
+а содержимое, уже лежащее в хранилище, не эмбеддится повторно.
+"""
+
+import json
+import logging
+import os
+import time
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class IndexCheckpoint:
+    """Состояние индексации одного хранилища"""
+
+    FORMAT_VERSION = 1
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Файл состояния (читается, если существует)
+        """
+        self.path = path
+        self.complete = False
+        self.updated = 0.0
+        # Относительный путь -> [mtime_ns, размер, id записи, SHA блоба git (если известен)]
+        self.files: Dict[str, List] = {}
+        self._load()
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                state = json.load(f)
+            if state.get('version') != self.FORMAT_VERSION:
+                logger.warning('Index checkpoint format mismatch in %s, ignoring', self.path)
+                return
+            self.complete = bool(state.get('complete'))
+            self.updated = state.get('updated', 0.0)
+            self.files = state.get('files', {})
+        except (OSError, ValueError) as e:
+            logger.warning('Failed to load index checkpoint %s: %s', self.path, e)
+
+    def save(self) -> None:
+        """Атомарно записать состояние на диск"""
+        self.updated = time.time()
+        state = {
+            'version': self.FORMAT_VERSION,
+            'complete': self.complete,
+            'updated': self.updated,
+            'files': self.files,
+        }
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    @staticmethod
+    def entry(stat: os.stat_result, content_id: str, blob: Optional[str] = None) -> List:
+        """Запись о файле для контрольной точки"""
+        if blob:
+            return [stat.st_mtime_ns, stat.st_size, content_id, blob]
+        return [stat.st_mtime_ns, stat.st_size, content_id]
+
+    def lookup(self, relative_path: str, stat: os.stat_result, blob: Optional[str] = None) -> Optional[str]:
+        """
+        id записи файла, если он не менялся с контрольной точки
+
+        Файл считается неизменённым, если совпадают mtime и размер или, когда
+        известен SHA блоба из индекса git, совпадает SHA (например, после
+        переключения веток туда и обратно).
+
+        Args:
+            relative_path: Путь относительно корня индексации
+            stat: Текущий os.stat файла
+            blob: SHA содержимого по индексу git (None - неизвестен)
+
+        Returns:
+            id записи или None
+        """
+        entry = self.files.get(relative_path)
+        if not entry:
+            return None
+        if entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size:
+            return entry[2]
+        if blob and len(entry) > 3 and entry[3] == blob:
+            return entry[2]
+        return None
+
+    def begin(self) -> None:
+        """Отметить начало прохода: индекс не готов, пока проход не завершён"""
+        if self.complete:
+            self.complete = False
+            self.save()
+
+    def checkpoint(self, processed: Dict[str, List]) -> None:
+        """
+        Сохранить промежуточное состояние
+
+        Args:
+            processed: Файлы, обработанные в текущем проходе и уже сохранённые в хранилище
+        """
+        self.files.update(processed)
+        self.save()
+
+    def finish(self, processed: Dict[str, List]) -> None:
+        """
+        Отметить индекс готовым
+
+        Args:
+            processed: Все файлы прохода (остальные записи забываются)
+        """
+        self.files = dict(processed)
+        self.complete = True
+        self.save()
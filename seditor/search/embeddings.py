@@ -0,0 +1,260 @@
+# -*- coding: utf-8 -*-
+"""
+Провайдеры эмбеддингов: модель sentence-transformers и лёгкий хэширующий эмбеддер
+"""
+
+import hashlib
+import importlib.util
+import logging
+import os
+import re
+import threading
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Переменная окружения для выбора провайдера: auto, minilm, hash
+EMBEDDER_ENV = 'SEDITOR_EMBEDDER'
+
+_TOKEN_RE = re.compile(r'[A-Za-z_][A-Za-z0-9_]*|[^\W\d_]+|\d+')
+_CAMEL_RE = re.compile(r'[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|\d+')
+
+
+class EmbeddingProvider:
+    """Базовый интерфейс провайдера эмбеддингов"""
+
+    # Короткое имя провайдера (используется в имени коллекции индекса)
+    name = 'base'
+    dimension = 0
+
+    def load(self) -> 'EmbeddingProvider':
+        """
+        Подготовить провайдер к работе (загрузить веса и т.п.)
+
+        Returns:
+            self, чтобы можно было писать provider = get_embedding_provider().load()
+        """
+        return self
+
+    def is_loaded(self) -> bool:
+        """Загружены ли ресурсы провайдера"""
+        return True
+
+    def unload(self) -> None:
+        """Освободить ресурсы (следующий encode загрузит их заново)"""
+    
+    def memory_usage(self) -> int:
+        """Примерный объём памяти загруженных ресурсов в байтах"""
+        return 0
+
+    def encode(self, texts: List[str], show_progress_bar: bool = False):
+        """
+        Получить эмбеддинги текстов
+
+        Args:
+            texts: Список текстов
+            show_progress_bar: Для совместимости с SentenceTransformer.encode
+
+        Returns:
+            numpy.ndarray формы (len(texts), dimension), float32
+        """
+        raise NotImplementedError
+
+
+class SentenceTransformerEmbedder(EmbeddingProvider):
+    """Модель all-MiniLM-L6-v2 из sentence-transformers"""
+
+    name = 'minilm'
+    MODEL_NAME = 'all-MiniLM-L6-v2'
+    dimension = 384
+
+    def __init__(self, model_name: str = MODEL_NAME):
+        self.model_name = model_name
+        self._model = None
+        self._lock = threading.Lock()
+
+    def load(self) -> 'SentenceTransformerEmbedder':
+        with self._lock:
+            if self._model is None:
+                from sentence_transformers import SentenceTransformer
+                logger.info('Loading sentence-transformers model %s...', self.model_name)
+                self._model = SentenceTransformer(self.model_name)
+                self.dimension = self._model.get_sentence_embedding_dimension()
+                logger.info('Model loaded successfully')
+        return self
+
+    def is_loaded(self) -> bool:
+        return self._model is not None
+
+    def unload(self) -> None:
+        with self._lock:
+            if self._model is not None:
+                logger.info('Unloading sentence-transformers model %s', self.model_name)
+            self._model = None
+    
+    def memory_usage(self) -> int:
+        model = self._model
+        if model is None:
+            return 0
+        return sum(p.numel() * p.element_size() for p in model.parameters())
+
+    def encode(self, texts: List[str], show_progress_bar: bool = False):
+        model = self._model
+        if model is None:
+            model = self.load()._model
+        return model.encode(texts, show_progress_bar=show_progress_bar)
+
+
+class HashingEmbedder(EmbeddingProvider):
+    """
+    Детерминированный эмбеддер на хэшах токенов.
+
+    Текст разбивается на токены (идентификаторы дополнительно делятся по
+    camelCase и snake_case), каждый токен хэшируется в несколько пар
+    (измерение, знак) - разреженная случайная проекция мешка слов. Вес токена
+    логарифмический по частоте, результат нормируется по L2. Не требует
+    torch и весов модели: подходит для тестов, бенчмарков и лёгкого режима.
+    """
+
+    name = 'hash'
+
+    # Сколько измерений получает каждый токен
+    NONZEROS_PER_TOKEN = 4
+    # Примерный размер записи кэша токенов (строка + два кортежа)
+    CACHE_ENTRY_BYTES = 300
+
+    def __init__(self, dimension: int = 384):
+        self.dimension = dimension
+        self._token_cache: Dict[str, tuple] = {}
+
+    @staticmethod
+    def tokenize(text: str) -> List[str]:
+        """
+        Разбить текст на токены
+
+        Args:
+            text: Исходный текст
+
+        Returns:
+            Токены в нижнем регистре (идентификаторы и их части)
+        """
+        tokens = []
+        for word in _TOKEN_RE.findall(text):
+            lowered = word.lower()
+            tokens.append(lowered)
+            parts = [p for chunk in word.split('_') for p in _CAMEL_RE.findall(chunk)]
+            if len(parts) > 1:
+                tokens.extend(p.lower() for p in parts)
+        return tokens
+
+    def unload(self) -> None:
+        self._token_cache = {}
+    
+    def memory_usage(self) -> int:
+        return len(self._token_cache) * self.CACHE_ENTRY_BYTES
+    
+    def _token_projection(self, token: str) -> tuple:
+        """Измерения и знаки токена (кэшируются)"""
+        projection = self._token_cache.get(token)
+        if projection is None:
+            digest = hashlib.blake2b(token.encode('utf-8'), digest_size=4 * self.NONZEROS_PER_TOKEN).digest()
+            buckets = []
+            signs = []
+            for i in range(self.NONZEROS_PER_TOKEN):
+                value = int.from_bytes(digest[4 * i:4 * i + 4], 'little')
+                buckets.append((value >> 1) % self.dimension)
+                signs.append(1.0 if value & 1 else -1.0)
+            projection = (tuple(buckets), tuple(signs))
+            if len(self._token_cache) < 500_000:
+                self._token_cache[token] = projection
+        return projection
+
+    def encode(self, texts: List[str], show_progress_bar: bool = False):
+        import numpy as np
+
+        vectors = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for row, text in enumerate(texts):
+            counts: Dict[str, int] = {}
+            for token in self.tokenize(text):
+                counts[token] = counts.get(token, 0) + 1
+            if not counts:
+                continue
+            buckets = []
+            values = []
+            for token, count in counts.items():
+                token_buckets, token_signs = self._token_projection(token)
+                weight = 1.0 + np.log(count)
+                buckets.extend(token_buckets)
+                values.extend(sign * weight for sign in token_signs)
+            np.add.at(vectors[row], buckets, values)
+
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+
+PROVIDERS = {
+    SentenceTransformerEmbedder.name: SentenceTransformerEmbedder,
+    HashingEmbedder.name: HashingEmbedder,
+}
+
+# Экземпляры провайдеров общие для процесса: модель загружается один раз
+_shared: Dict[str, EmbeddingProvider] = {}
+_shared_lock = threading.Lock()
+
+
+def resolve_provider_name(name: Optional[str] = None) -> str:
+    """
+    Определить имя провайдера
+
+    Args:
+        name: 'auto', 'minilm', 'hash' или None (берётся из SEDITOR_EMBEDDER, затем 'auto')
+
+    Returns:
+        Конкретное имя провайдера; для 'auto' - 'minilm', если установлен
+        sentence-transformers, иначе 'hash'
+    """
+    name = (name or os.environ.get(EMBEDDER_ENV) or 'auto').lower()
+    if name == 'auto':
+        return 'minilm' if importlib.util.find_spec('sentence_transformers') else 'hash'
+    if name not in PROVIDERS:
+        raise ValueError(f'Неизвестный провайдер эмбеддингов: {name}')
+    return name
+
+
+def get_embedding_provider(name: Optional[str] = None) -> EmbeddingProvider:
+    """
+    Получить общий экземпляр провайдера эмбеддингов
+
+    Args:
+        name: Имя провайдера (см. resolve_provider_name)
+
+    Returns:
+        Экземпляр EmbeddingProvider (ресурсы загружаются лениво)
+    """
+    name = resolve_provider_name(name)
+    with _shared_lock:
+        provider = _shared.get(name)
+        if provider is None:
+            provider = PROVIDERS[name]()
+            _shared[name] = provider
+        return provider
+
+
+def prewarm(name: Optional[str] = None) -> bool:
+    """
+    Заранее загрузить провайдер и тяжёлые зависимости поиска
+
+    Вызывается в фоне после запуска UI, чтобы первая индексация или поиск
+    не платили за импорт torch/sentence-transformers/chromadb.
+
+    Returns:
+        True если провайдер загружен, False если зависимости недоступны
+    """
+    try:
+        if importlib.util.find_spec('chromadb'):
+            import chromadb  # noqa: F401
+        get_embedding_provider(name).load()
+        return True
+    except Exception as e:
+        logger.warning('Search prewarm skipped: %s', e)
+        return False
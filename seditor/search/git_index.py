@@ -0,0 +1,293 @@
+# -*- coding: utf-8 -*-
+"""
+Чтение файла .git/index без запуска git
+
+Индекс git хранит для каждого отслеживаемого файла путь, закэшированные
+данные stat и SHA блоба. Этого достаточно, чтобы перечислить файлы
+репозитория без обхода дерева и понять, не изменилось ли содержимое файла,
+не читая его: если stat файла совпадает с сохранённым в индексе, его
+содержимое - это блоб с известным SHA.
+
+Поддерживаются версии индекса 2, 3 и 4 (сжатие путей) и репозитории с
+SHA-1 и SHA-256.
+"""
+
+import os
+import struct
+from typing import Dict, List, NamedTuple, Optional
+
+# Биты поля flags записи
+_FLAG_EXTENDED = 0x4000
+_FLAG_STAGE = 0x3000
+_NAME_MASK = 0x0FFF
+# Биты расширенных флагов (версия 3+)
+_EXT_SKIP_WORKTREE = 0x4000
+_EXT_INTENT_TO_ADD = 0x2000
+
+# Типы объектов в поле mode
+_MODE_TYPE_MASK = 0o170000
+_MODE_REGULAR = 0o100000
+
+# Фиксированная часть записи: 10 полей по 4 байта (ctime, mtime, dev, ino, mode, uid, gid, size)
+_STAT_FORMAT = struct.Struct('>10I')
+
+
+class GitIndexError(ValueError):
+    """Файл индекса повреждён или имеет неподдерживаемый формат"""
+
+
+class GitIndexEntry(NamedTuple):
+    """Отслеживаемый файл из индекса git"""
+
+    path: str  # путь относительно корня репозитория, разделитель '/'
+    mtime_s: int
+    mtime_ns: int  # наносекунды (0, если git собран без их поддержки)
+    size: int
+    sha: str  # SHA блоба (hex)
+
+    def matches_stat(self, stat: os.stat_result) -> bool:
+        """Совпадает ли stat файла с закэшированным в индексе"""
+        if self.size != (stat.st_size & 0xFFFFFFFF):
+            return False
+        if self.mtime_s != int(stat.st_mtime_ns // 1_000_000_000) & 0xFFFFFFFF:
+            return False
+        return self.mtime_ns == 0 or self.mtime_ns == stat.st_mtime_ns % 1_000_000_000
+
+
+def find_git_dir(root: str) -> Optional[str]:
+    """
+    Найти директорию git репозитория
+
+    Поддерживается и файл .git со ссылкой 'gitdir: ...' (worktree, подмодули).
+
+    Args:
+        root: Корень рабочей копии
+
+    Returns:
+        Путь к директории git или None
+    """
+    dot_git = os.path.join(root, '.git')
+    if os.path.isdir(dot_git):
+        return dot_git
+    try:
+        with open(dot_git, encoding='utf-8') as f:
+            line = f.readline().strip()
+    except OSError:
+        return None
+    if line.startswith('gitdir:'):
+        git_dir = line[len('gitdir:'):].strip()
+        return os.path.normpath(os.path.join(root, git_dir))
+    return None
+
+
+def head_commit(root: str) -> Optional[str]:
+    """
+    SHA коммита HEAD без запуска git
+
+    Ветка ищется среди отдельных файлов refs/ и в packed-refs (в worktree -
+    в общей директории репозитория).
+
+    Args:
+        root: Корень рабочей копии
+
+    Returns:
+        SHA коммита (hex) или None, если репозитория нет или в нём нет коммитов
+    """
+    git_dir = find_git_dir(root)
+    if git_dir is None:
+        return None
+    try:
+        with open(os.path.join(git_dir, 'HEAD'), encoding='utf-8') as f:
+            head = f.read().strip()
+    except OSError:
+        return None
+    if not head.startswith('ref:'):
+        return head or None
+    ref = head[len('ref:'):].strip()
+
+    common_dir = git_dir
+    try:
+        with open(os.path.join(git_dir, 'commondir'), encoding='utf-8') as f:
+            common_dir = os.path.normpath(os.path.join(git_dir, f.read().strip()))
+    except OSError:
+        pass
+    for directory in dict.fromkeys((git_dir, common_dir)):
+        try:
+            with open(os.path.join(directory, ref), encoding='utf-8') as f:
+                return f.read().strip() or None
+        except OSError:
+            continue
+    try:
+        with open(os.path.join(common_dir, 'packed-refs'), encoding='utf-8') as f:
+            for line in f:
+                sha, _, name = line.strip().partition(' ')
+                if name == ref:
+                    return sha
+    except OSError:
+        pass
+    return None
+
+
+def _hash_size(git_dir: str) -> int:
+    """Длина SHA объектов репозитория в байтах (20 - SHA-1, 32 - SHA-256)"""
+    try:
+        with open(os.path.join(git_dir, 'config'), encoding='utf-8') as f:
+            for line in f:
+                key, _, value = line.partition('=')
+                if key.strip().lower() == 'objectformat' and value.strip().lower() == 'sha256':
+                    return 32
+    except OSError:
+        pass
+    return 20
+
+
+def _read_varint(data: bytes, offset: int):
+    """Число переменной длины из индекса версии 4 (кодировка offset из pack-файлов)"""
+    byte = data[offset]
+    offset += 1
+    value = byte & 0x7F
+    while byte & 0x80:
+        byte = data[offset]
+        offset += 1
+        value = ((value + 1) << 7) | (byte & 0x7F)
+    return value, offset
+
+
+def parse_index(data: bytes, hash_size: int = 20) -> List[GitIndexEntry]:
+    """
+    Разобрать содержимое файла индекса
+
+    Записи конфликтов (стадии 1-3), файлы вне рабочей копии (skip-worktree,
+    intent-to-add), символьные ссылки и подмодули пропускаются.
+
+    Args:
+        data: Содержимое .git/index
+        hash_size: Длина SHA в байтах
+
+    Returns:
+        Записи обычных файлов в порядке индекса
+    """
+    if len(data) < 12 or data[:4] != b'DIRC':
+        raise GitIndexError('Нет сигнатуры DIRC')
+    version, count = struct.unpack_from('>II', data, 4)
+    if version not in (2, 3, 4):
+        raise GitIndexError(f'Неподдерживаемая версия индекса: {version}')
+
+    entries = []
+    offset = 12
+    previous = b''
+    fixed = _STAT_FORMAT.size + hash_size + 2
+    try:
+        for _ in range(count):
+            start = offset
+            (_, _, mtime_s, mtime_ns, _, _, mode, _, _, size) = _STAT_FORMAT.unpack_from(data, offset)
+            offset += _STAT_FORMAT.size
+            sha = data[offset:offset + hash_size].hex()
+            offset += hash_size
+            flags, = struct.unpack_from('>H', data, offset)
+            offset += 2
+            extended = 0
+            if flags & _FLAG_EXTENDED:
+                extended, = struct.unpack_from('>H', data, offset)
+                offset += 2
+
+            if version == 4:
+                strip, offset = _read_varint(data, offset)
+                end = data.index(b'\0', offset)
+                path = previous[:len(previous) - strip] + data[offset:end]
+                offset = end + 1
+            else:
+                name_length = flags & _NAME_MASK
+                if name_length < _NAME_MASK:
+                    end = offset + name_length
+                else:
+                    end = data.index(b'\0', offset)
+                path = data[offset:end]
+                # Запись дополняется NUL до длины, кратной 8
+                entry_length = fixed + (2 if flags & _FLAG_EXTENDED else 0) + len(path)
+                offset = start + (entry_length + 8) // 8 * 8
+            previous = path
+
+            if flags & _FLAG_STAGE or extended & (_EXT_SKIP_WORKTREE | _EXT_INTENT_TO_ADD):
+                continue
+            if mode & _MODE_TYPE_MASK != _MODE_REGULAR:
+                continue
+            entries.append(GitIndexEntry(path.decode('utf-8', 'surrogateescape'),
+                                         mtime_s, mtime_ns, size, sha))
+    except (struct.error, ValueError, IndexError) as e:
+        raise GitIndexError(f'Повреждённый индекс: {e}') from e
+    return entries
+
+
+class GitIndex:
+    """Отслеживаемые файлы рабочей копии по данным .git/index"""
+
+    def __init__(self, repo_root: str, git_dir: Optional[str] = None):
+        """
+        Args:
+            repo_root: Корень рабочей копии
+            git_dir: Директория git (по умолчанию определяется по repo_root)
+
+        Raises:
+            GitIndexError: Индекс не найден или не разбирается
+        """
+        self.repo_root = os.path.abspath(repo_root)
+        git_dir = git_dir or find_git_dir(self.repo_root)
+        if git_dir is None:
+            raise GitIndexError(f'{self.repo_root} не является git-репозиторием')
+        index_path = os.path.join(git_dir, 'index')
+        try:
+            with open(index_path, 'rb') as f:
+                data = f.read()
+                # Файлы, изменённые не раньше записи индекса, git считает
+                # ненадёжными ("racy"): их закэшированному stat верить нельзя
+                self._index_mtime_ns = os.fstat(f.fileno()).st_mtime_ns
+        except OSError as e:
+            raise GitIndexError(f'Не удалось прочитать {index_path}: {e}') from e
+        self.entries: Dict[str, GitIndexEntry] = {
+            entry.path: entry for entry in parse_index(data, _hash_size(git_dir))
+        }
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def tracked_under(self, root: str) -> Dict[str, GitIndexEntry]:
+        """
+        Отслеживаемые файлы внутри директории
+
+        Args:
+            root: Директория внутри рабочей копии
+
+        Returns:
+            Путь относительно root (с os.sep) -> запись индекса
+        """
+        root = os.path.abspath(root)
+        if root == self.repo_root:
+            prefix = ''
+        elif root.startswith(self.repo_root + os.sep):
+            prefix = os.path.relpath(root, self.repo_root).replace(os.sep, '/') + '/'
+        else:
+            return {}
+        result = {}
+        for path, entry in self.entries.items():
+            if path.startswith(prefix):
+                relative = path[len(prefix):]
+                result[relative.replace('/', os.sep) if os.sep != '/' else relative] = entry
+        return result
+
+    def blob_sha(self, entry: GitIndexEntry, stat: os.stat_result) -> Optional[str]:
+        """
+        SHA содержимого файла, если индексу можно верить для текущего stat
+
+        Args:
+            entry: Запись индекса
+            stat: Текущий os.stat файла
+
+        Returns:
+            SHA блоба или None, если файл изменён после записи индекса
+        """
+        if not entry.matches_stat(stat):
+            return None
+        if stat.st_mtime_ns >= self._index_mtime_ns:
+            return None
+        return entry.sha
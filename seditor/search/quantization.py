@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+"""
+Квантованное векторное хранилище (int8 / бинарные коды) с доранжированием
+
+В памяти хранятся только компактные коды: int8 со скалярным масштабом на
+вектор (в 4 раза меньше float32) или по одному биту на измерение (в 32 раза
+меньше). Поиск сначала отбирает кандидатов по кодам, затем точные расстояния
+для кандидатов считаются по полным float32-векторам, которые читаются лениво
+из файла через memory map.
+
+Хранилище повторяет подмножество API коллекции chromadb (count, upsert,
+query, get, delete), поэтому SemanticIndexer работает с ним так же, как с
+коллекцией Chroma.
+"""
+
+import os
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from seditor.search.vector_store import RowVectorStore, TornReadError, locked
+
+
+class QuantizedVectorStore(RowVectorStore):
+    """Векторное хранилище с квантованными кодами и float32-векторами на диске"""
+
+    MODES = ('int8', 'binary')
+
+    # Во сколько раз больше кандидатов отбирается по кодам перед доранжированием
+    RERANK_FACTOR = {'int8': 4, 'binary': 16}
+
+    VECTORS_FILE = 'vectors.f32'
+
+    def __init__(self, directory: str, mode: str = 'int8', dimension: Optional[int] = None,
+                 rerank_factor: Optional[int] = None):
+        """
+        Args:
+            directory: Директория хранилища (создаётся при необходимости)
+            mode: 'int8' или 'binary'
+            dimension: Размерность векторов (по умолчанию определяется при первой вставке)
+            rerank_factor: Множитель числа кандидатов для доранжирования
+        """
+        if mode not in self.MODES:
+            raise ValueError(f'Неизвестный режим квантования: {mode}')
+        self.mode = mode
+        self.rerank_factor = rerank_factor or self.RERANK_FACTOR[mode]
+        self._codes: Optional[np.ndarray] = None
+        self._scales: Optional[np.ndarray] = None
+        self._norms: Optional[np.ndarray] = None
+        self._mmap: Optional[np.memmap] = None
+        super().__init__(directory, dimension)
+
+    @property
+    def kind(self) -> str:
+        """Тип хранилища - режим квантования (индексы int8 и binary несовместимы)"""
+        return self.mode
+
+    @property
+    def code_width(self) -> int:
+        """Ширина кода одного вектора в байтах"""
+        dimension = self.dimension or 0
+        if self.mode == 'binary':
+            return (dimension + 7) // 8
+        return dimension
+
+    def _row_arrays(self) -> Dict[str, Tuple[tuple, type]]:
+        return {
+            '_codes': ((self.code_width,), np.uint8 if self.mode == 'binary' else np.int8),
+            '_scales': ((), np.float32),
+            '_norms': ((), np.float32),
+        }
+
+    def _encode(self, vectors: np.ndarray):
+        """
+        Квантовать векторы
+
+        Returns:
+            (коды, масштабы) - для бинарного режима масштабы равны 1
+        """
+        if self.mode == 'binary':
+            return np.packbits(vectors > 0, axis=1), np.ones(len(vectors), dtype=np.float32)
+        scales = np.abs(vectors).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        codes = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+        return codes, scales.astype(np.float32)
+
+    def _vectors(self) -> np.memmap:
+        """Полные векторы на диске (memory map переоткрывается при росте файла)"""
+        if self._mmap is None or self._mmap.shape[0] < self._size:
+            self._mmap = np.memmap(self._path(self.VECTORS_FILE), dtype=np.float32,
+                                   mode='r', shape=(self._size, self.dimension))
+        return self._mmap
+
+    def _write_vectors(self, rows: List[int], vectors: np.ndarray) -> None:
+        """Записать полные векторы в строки файла (строки за концом файла дописываются)"""
+        row_bytes = self.dimension * 4
+        path = self._path(self.VECTORS_FILE)
+        with open(path, 'r+b' if os.path.exists(path) else 'w+b') as f:
+            for row, vector in zip(rows, vectors):
+                f.seek(row * row_bytes)
+                f.write(vector.tobytes())
+
+    @locked
+    def upsert(self, ids, embeddings, metadatas=None, documents=None) -> None:
+        """
+        Добавить или обновить векторы
+
+        Args:
+            ids: Идентификаторы
+            embeddings: Векторы
+            metadatas: Метаданные (словари с простыми значениями)
+            documents: Игнорируются - тексты в хранилище не сохраняются
+        """
+        if not len(ids):
+            return
+        vectors = self._check_vectors(embeddings)
+        rows = self._assign_rows(ids, metadatas)
+        codes, scales = self._encode(vectors)
+        self._codes[rows] = codes
+        self._scales[rows] = scales
+        self._norms[rows] = (vectors * vectors).sum(axis=1)
+        self._write_vectors(rows, vectors)
+
+    def _query_one(self, query: np.ndarray, n_results: int):
+        size = self._size
+        alive = self._alive[:size]
+
+        # 1. Отбор кандидатов по кодам
+        if self.mode == 'binary':
+            # Асимметричная оценка: запрос остаётся float, код - знаки ±1.
+            # Для каждого байта кода заранее считается сумма компонент запроса
+            # по его единичным битам, и скалярное произведение собирается
+            # из ширины кода табличных выборок без распаковки битов.
+            approx = -self._binary_dot(query, self._codes[:size])
+        else:
+            dots = self._codes[:size].astype(np.float32) @ query
+            approx = self._norms[:size] - 2.0 * self._scales[:size] * dots
+        approx[~alive] = np.inf
+
+        candidates = min(len(self._positions), n_results * self.rerank_factor)
+        if candidates < size:
+            rows = np.argpartition(approx, candidates - 1)[:candidates]
+        else:
+            rows = np.flatnonzero(alive)
+        rows = np.sort(rows)  # последовательное чтение из memory map
+
+        # 2. Доранжирование по полным векторам
+        full = np.asarray(self._vectors()[rows])
+        diff = full - query
+        exact = (diff * diff).sum(axis=1)
+        order = np.argsort(exact)[:n_results]
+        return rows[order].tolist(), exact[order]
+
+    def _binary_dot(self, query: np.ndarray, codes: np.ndarray) -> np.ndarray:
+        """Скалярные произведения запроса с векторами знаков, заданными битами"""
+        padded = np.zeros(self.code_width * 8, dtype=np.float32)
+        padded[:self.dimension] = query
+        # tables[j, b] - сумма компонент запроса по единичным битам байта b на позиции j
+        tables = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).astype(np.float32)
+        tables = padded.reshape(-1, 8) @ tables.T
+        positive = tables[np.arange(self.code_width), codes].sum(axis=1)
+        return 2.0 * positive - query.sum()
+
+    def _load_meta(self, meta: dict) -> None:
+        # Векторы отображаются сразу: заменённый позже файл не подменит их под прочитанным meta
+        if not self._size:
+            return
+        with self._open_data(self.VECTORS_FILE, meta) as f:
+            if os.fstat(f.fileno()).st_size < self._size * self.dimension * 4:
+                raise TornReadError(f'{self.VECTORS_FILE} is shorter than {self._size} rows')
+            self._mmap = np.memmap(f, dtype=np.float32, mode='r', shape=(self._size, self.dimension))
+
+    def _data_files(self) -> List[str]:
+        return [self.VECTORS_FILE]
+
+    def _compact_rows(self, keep: List[int]) -> None:
+        """
+        Записать файл векторов без удалённых строк
+
+        Новый файл встаёт на место вместе с новым meta.json (см. RowVectorStore.flush):
+        до этого на диске остаётся согласованная пара из старых meta.json и векторов.
+        """
+        vectors = np.asarray(self._vectors()[keep], dtype=np.float32)
+        self._mmap = None
+        vectors.tofile(self._path(self.VECTORS_FILE + '.tmp'))
+
+    def _save_files(self) -> List[str]:
+        # Сжатый файл векторов ждёт фиксации, пока не встанет на место
+        if os.path.exists(self._path(self.VECTORS_FILE + '.tmp')):
+            return [self._path(self.VECTORS_FILE)]
+        return []
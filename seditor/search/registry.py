@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+"""
+Реестр индексаторов процесса
+
+Один индексатор на корень: повторный вход в директорию не создаёт новый
+индексатор и не открывает хранилище заново, а провайдер эмбеддингов
+(и загруженная модель) общий для всех индексаторов процесса. Для
+поддиректории уже проиндексированного корня используется индекс корня с
+фильтром по префиксу пути, а не отдельный .seditor/ внутри поддиректории.
+"""
+
+import logging
+import os
+import threading
+from typing import TYPE_CHECKING, Callable, Dict, NamedTuple, Optional
+
+if TYPE_CHECKING:
+    from seditor.search.semantic_indexer import SemanticIndexer
+
+logger = logging.getLogger(__name__)
+
+
+class IndexScope(NamedTuple):
+    """Индекс и часть, в которой искать"""
+
+    indexer: 'SemanticIndexer'
+    prefix: Optional[str] = None  # поддиректория относительно корня индекса (None - весь индекс)
+
+    @property
+    def directory(self) -> str:
+        """Директория, которую покрывает область поиска"""
+        if self.prefix is None:
+            return self.indexer.root_path
+        return os.path.join(self.indexer.root_path, self.prefix)
+
+    def search(self, query: str, top_k: int = 10):
+        """Поиск внутри области (см. SemanticIndexer.search)"""
+        return self.indexer.search(query, top_k=top_k, path_prefix=self.prefix)
+
+
+def _has_saved_index(directory: str) -> bool:
+    """Есть ли в директории сохранённое состояние индексации"""
+    try:
+        names = os.listdir(os.path.join(directory, '.seditor'))
+    except OSError:
+        return False
+    return any(name.startswith('index_state_') for name in names)
+
+
+def _covers(indexer: 'SemanticIndexer', prefix: str) -> bool:
+    """Есть ли в индексе файлы внутри поддиректории (недостроенный индекс покрывает всё)"""
+    checkpoint = indexer.checkpoint
+    if not checkpoint.complete:
+        return True
+    prefix = prefix + os.sep
+    return any(path.startswith(prefix) for path in checkpoint.files)
+
+
+class IndexerRegistry:
+    """Индексаторы процесса по корням"""
+
+    def __init__(self, factory: Optional[Callable[[str], 'SemanticIndexer']] = None):
+        """
+        Args:
+            factory: Создание индексатора по корню (по умолчанию SemanticIndexer(root))
+        """
+        self._factory = factory
+        self._indexers: Dict[str, 'SemanticIndexer'] = {}
+        self._lock = threading.Lock()
+        # Растёт при каждом изменении набора индексаторов (для кэшей областей поиска)
+        self.generation = 0
+
+    def __len__(self) -> int:
+        return len(self._indexers)
+
+    def __contains__(self, root: str) -> bool:
+        return os.path.abspath(root) in self._indexers
+
+    def get(self, root: str) -> 'SemanticIndexer':
+        """
+        Индексатор корня (создаётся при первом обращении)
+
+        Args:
+            root: Корень индексации
+
+        Returns:
+            Общий для процесса SemanticIndexer этого корня
+        """
+        root = os.path.abspath(root)
+        with self._lock:
+            indexer = self._indexers.get(root)
+            if indexer is None:
+                if self._factory is not None:
+                    indexer = self._factory(root)
+                else:
+                    from seditor.search.semantic_indexer import SemanticIndexer
+                    indexer = SemanticIndexer(root)
+                self._indexers[root] = indexer
+                self.generation += 1
+                logger.info('Registered semantic indexer for: %s', root)
+            return indexer
+
+    def find_scope(self, directory: str) -> Optional[IndexScope]:
+        """
+        Найти существующий индекс, покрывающий директорию
+
+        Проверяются сама директория и её родители: индексаторы реестра и
+        индексы, сохранённые на диске в прошлых сессиях. Родительский индекс
+        подходит, если в нём есть файлы внутри директории (вложенный
+        git-репозиторий, например, в индекс родителя не попадает) или он
+        ещё строится.
+
+        Args:
+            directory: Директория, в которой нужно искать
+
+        Returns:
+            IndexScope или None, если директорию не покрывает ни один индекс
+        """
+        directory = os.path.abspath(directory)
+        candidate = directory
+        while True:
+            if candidate in self._indexers or _has_saved_index(candidate):
+                indexer = self.get(candidate)
+                if candidate == directory:
+                    return IndexScope(indexer)
+                prefix = os.path.relpath(directory, candidate)
+                if _covers(indexer, prefix):
+                    return IndexScope(indexer, prefix)
+            parent = os.path.dirname(candidate)
+            if parent == candidate:
+                return None
+            candidate = parent
+
+    def scope_for(self, directory: str) -> IndexScope:
+        """Область поиска для директории: покрывающий индекс или новый индекс с корнем в ней"""
+        return self.find_scope(directory) or IndexScope(self.get(directory))
+
+    def clear(self) -> None:
+        """Забыть все индексаторы"""
+        with self._lock:
+            self._indexers.clear()
+            self.generation += 1
+
+
+# Общий реестр процесса
+registry = IndexerRegistry()
@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+"""
+Порядок и темп фоновой индексации
+
+Файлы индексируются не в порядке обхода дерева, а по приоритету: сначала
+директория открытого файла, затем недавно изменённые файлы, затем файлы в
+раскрытых узлах дерева, затем остальные. Поиск работает по частичному
+индексу, поэтому самые вероятные цели появляются в выдаче первыми.
+
+Темп индексации подстраивается под пользователя: пока он печатает, батчи
+эмбеддингов откладываются, а torch ограничивается одним потоком, чтобы не
+отнимать ядра у интерфейса.
+"""
+
+import heapq
+import logging
+import os
+import sys
+import threading
+import time
+from typing import Callable, List, NamedTuple, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Сколько миллисекунд без нажатий клавиш считать простоем
+IDLE_MS_ENV = 'SEDITOR_INDEX_IDLE_MS'
+
+
+class IndexPriorities(NamedTuple):
+    """Что индексировать в первую очередь"""
+
+    focus_dirs: Tuple[str, ...] = ()  # директории открытых файлов
+    expanded_dirs: Tuple[str, ...] = ()  # раскрытые узлы дерева
+    recent_limit: int = 500  # сколько недавно изменённых файлов поднимать
+
+
+def prioritize_files(files: Sequence[str], priorities: IndexPriorities,
+                     mtime: Callable[[str], float]) -> List[str]:
+    """
+    Упорядочить файлы для индексации
+
+    Порядок: файлы прямо в focus_dirs; recent_limit самых недавно изменённых;
+    файлы внутри expanded_dirs; остальные. Внутри групп (кроме недавних,
+    которые идут от новых к старым) исходный порядок сохраняется.
+
+    Args:
+        files: Абсолютные пути файлов
+        priorities: Приоритеты
+        mtime: Время изменения файла (вызывается для файлов вне focus_dirs)
+
+    Returns:
+        Те же файлы в порядке индексации
+    """
+    focus = {os.path.abspath(d) for d in priorities.focus_dirs}
+    expanded = {os.path.abspath(d) for d in priorities.expanded_dirs}
+
+    first = []
+    others = []
+    for path in files:
+        (first if os.path.dirname(path) in focus else others).append(path)
+
+    recent = []
+    if priorities.recent_limit > 0 and others:
+        recent = heapq.nlargest(priorities.recent_limit, others, key=mtime)
+        chosen = set(recent)
+        others = [path for path in others if path not in chosen]
+
+    under_expanded = []
+    rest = []
+    for path in others:
+        directory = os.path.dirname(path)
+        # Подъём по родителям до корня: раскрытых узлов немного, проверка - по множеству
+        while directory not in expanded:
+            parent = os.path.dirname(directory)
+            if parent == directory:
+                break
+            directory = parent
+        (under_expanded if directory in expanded else rest).append(path)
+
+    return first + recent + under_expanded + rest
+
+
+class IdleThrottle:
+    """
+    Кооперативный планировщик фоновой индексации
+
+    Интерфейс отмечает нажатия клавиш (touch), поток индексации перед каждым
+    батчем вызывает wait_idle: пока с последнего нажатия прошло меньше
+    idle_ms, батч откладывается. Чтобы непрерывный набор не останавливал
+    индексацию совсем, пауза ограничена max_pause, после чего батч идёт с
+    ограниченным числом потоков torch. В простое ограничение снимается.
+    """
+
+    DEFAULT_IDLE_MS = 300
+    # Максимальная пауза перед батчем, секунды
+    MAX_PAUSE = 2.0
+    # Потоки torch во время набора
+    BUSY_THREADS = 1
+
+    def __init__(self, idle_ms: Optional[int] = None, max_pause: float = MAX_PAUSE,
+                 busy_threads: int = BUSY_THREADS):
+        """
+        Args:
+            idle_ms: Простой после нажатия, мс (по умолчанию - из SEDITOR_INDEX_IDLE_MS);
+                0 отключает паузы и ограничение потоков
+            max_pause: Максимальная пауза перед одним батчем, секунды
+            busy_threads: Потоки torch во время набора
+        """
+        if idle_ms is None:
+            try:
+                idle_ms = int(os.environ.get(IDLE_MS_ENV, self.DEFAULT_IDLE_MS))
+            except ValueError:
+                idle_ms = self.DEFAULT_IDLE_MS
+        self.idle_seconds = max(idle_ms, 0) / 1000.0
+        self.max_pause = max_pause
+        self.busy_threads = busy_threads
+        # time.monotonic() последнего нажатия; чтение и запись float атомарны
+        self._last_activity = float('-inf')
+        self._threads_before: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def touch(self) -> None:
+        """Отметить активность пользователя (вызывается на каждое нажатие)"""
+        self._last_activity = time.monotonic()
+
+    def idle_for(self) -> float:
+        """Сколько секунд прошло с последнего нажатия"""
+        return time.monotonic() - self._last_activity
+
+    def is_idle(self) -> bool:
+        """Пользователь не печатал последние idle_ms"""
+        return self.idle_for() >= self.idle_seconds
+
+    def wait_idle(self, cancel_event: Optional[threading.Event] = None) -> float:
+        """
+        Дождаться простоя перед очередным батчем (вызывается из потока индексации)
+
+        Args:
+            cancel_event: Событие отмены прерывает ожидание
+
+        Returns:
+            Длительность паузы, секунды
+        """
+        if self.idle_seconds <= 0:
+            return 0.0
+        if self.is_idle():
+            self._limit_threads(False)
+            return 0.0
+        started = time.monotonic()
+        deadline = started + self.max_pause
+        while True:
+            remaining = self.idle_seconds - self.idle_for()
+            now = time.monotonic()
+            if remaining <= 0 or now >= deadline:
+                break
+            delay = min(remaining, deadline - now)
+            if cancel_event is not None:
+                if cancel_event.wait(delay):
+                    break
+            else:
+                time.sleep(delay)
+        paused = time.monotonic() - started
+        # Набор продолжается и после паузы - батч идёт с ограничением потоков
+        self._limit_threads(not self.is_idle())
+        return paused
+
+    def release(self) -> None:
+        """Снять ограничение потоков (конец индексации)"""
+        self._limit_threads(False)
+
+    def _limit_threads(self, busy: bool) -> None:
+        """
+        Ограничить или восстановить число потоков torch
+
+        torch не импортируется ради этого: если модель не загружена, делать нечего.
+        """
+        torch = sys.modules.get('torch')
+        if torch is None:
+            return
+        with self._lock:
+            if busy and self._threads_before is None:
+                self._threads_before = torch.get_num_threads()
+                if self._threads_before > self.busy_threads:
+                    torch.set_num_threads(self.busy_threads)
+                    logger.debug('Torch threads limited to %d while typing', self.busy_threads)
+            elif not busy and self._threads_before is not None:
+                torch.set_num_threads(self._threads_before)
+                logger.debug('Torch threads restored to %d', self._threads_before)
+                self._threads_before = None
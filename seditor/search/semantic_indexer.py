@@ -4,14 +4,82 @@
 """
 
 import os
+import json
 import logging
-from typing import List, Tuple, Optional, Callable
+import functools
+import threading
+import time
+from typing import Dict, List, Tuple, Optional, Callable, Union
 from pathlib import Path
 import hashlib
 
+from seditor.search import INDEX_MODE_ENV, INDEX_MODES
+from seditor.search.checkpoint import IndexCheckpoint
+from seditor.search.embeddings import EmbeddingProvider, get_embedding_provider
+from seditor.search.git_index import GitIndex, GitIndexEntry, GitIndexError
+from seditor.search.scheduler import IdleThrottle, IndexPriorities, prioritize_files
+from seditor.search.snippets import read_snippet
+from seditor.search.sniff import SKIP_TOO_LARGE, SNIFF_SIZE, format_skip_counts, sniff_head, sniff_name
+from seditor.utils.metrics import metrics
+from seditor.utils.ignore import find_repository_root, get_ignore_matcher
+
 logger = logging.getLogger(__name__)
 
 
+# Переменная окружения: '0' отключает чтение .git/index (stat и SHA блобов)
+GIT_INDEX_ENV = 'SEDITOR_GIT_INDEX'
+# Переменная окружения: '1' - перечислять только отслеживаемые файлы по .git/index, без обхода дерева
+GIT_TRACKED_ONLY_ENV = 'SEDITOR_GIT_TRACKED_ONLY'
+
+
+def copies_label(count: int) -> str:
+    """
+    Подпись о числе копий файла
+    
+    Args:
+        count: Количество других файлов с тем же содержимым
+        
+    Returns:
+        Строка вида '(+1 копия)', '(+3 копии)', '(+5 копий)'
+    """
+    if count % 10 == 1 and count % 100 != 11:
+        word = 'копия'
+    elif count % 10 in (2, 3, 4) and count % 100 not in (12, 13, 14):
+        word = 'копии'
+    else:
+        word = 'копий'
+    return f'(+{count} {word})'
+
+
+def get_duplicate_paths(metadata: dict) -> List[str]:
+    """
+    Относительные пути других файлов с тем же содержимым
+    
+    Args:
+        metadata: Метаданные записи индекса
+        
+    Returns:
+        Список путей (пустой, если дубликатов нет)
+    """
+    raw = metadata.get('duplicates')
+    return json.loads(raw) if raw else []
+
+
+def _uses_model(func: Callable) -> Callable:
+    """Отметить метод как использующий модель (модель не выгружается, пока он выполняется)"""
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        with self._usage_lock:
+            self._active_calls += 1
+        try:
+            return func(self, *args, **kwargs)
+        finally:
+            with self._usage_lock:
+                self._active_calls -= 1
+                self._last_used = time.monotonic()
+    return wrapper
+
+
 class SemanticIndexer:
     """Индексатор файлов с использованием векторных эмбеддингов"""
     
@@ -39,14 +107,39 @@ class SemanticIndexer:
     # Размер частичного чтения (50KB)
     PARTIAL_READ_SIZE = 50 * 1024
     
-    def __init__(self, root_path: str):
+    # Размер блока при хэшировании содержимого файла (256KB)
+    HASH_CHUNK_SIZE = 256 * 1024
+    
+    # Как часто сохранять контрольную точку индексации (секунды)
+    CHECKPOINT_INTERVAL = 10.0
+    # Во сколько раз больше кандидатов запрашивать при поиске в поддиректории
+    PREFIX_OVERFETCH = 4
+    # Файлов в батче эмбеддинга по умолчанию
+    BATCH_SIZE = 10
+    # Сколько файлов читать параллельно за один заход (при workers > 1)
+    READ_CHUNK = 256
+    
+    def __init__(self, root_path: str, embedder: Union[EmbeddingProvider, str, None] = None,
+                 index_mode: Optional[str] = None):
         """
         Инициализация индексатора
         
         Args:
             root_path: Корневой путь проекта для индексации
+            embedder: Провайдер эмбеддингов или его имя ('minilm', 'hash', 'auto');
+                по умолчанию выбирается через SEDITOR_EMBEDDER
+            index_mode: Хранилище индекса: 'chroma', 'int8' или 'binary' (квантованные коды
+                с доранжированием), 'ivf' (приближённый поиск по кластерам);
+                по умолчанию SEDITOR_INDEX_MODE или 'chroma'
         """
         self.root_path = os.path.abspath(root_path)
+        self.index_mode = (index_mode or os.environ.get(INDEX_MODE_ENV) or 'chroma').lower()
+        if self.index_mode not in INDEX_MODES:
+            raise ValueError(f'Неизвестный режим индекса: {self.index_mode}')
+        if isinstance(embedder, EmbeddingProvider):
+            self.embedder = embedder
+        else:
+            self.embedder = get_embedding_provider(embedder)
         self.seditor_dir = os.path.join(self.root_path, '.seditor')
         self.chroma_dir = os.path.join(self.seditor_dir, 'chroma_db')
         
@@ -54,11 +147,31 @@ class SemanticIndexer:
         self._model = None
         self._collection = None
         self._client = None
+        self._checkpoint = None
+        
+        # Неизменённые файлы по .git/index (SEDITOR_GIT_INDEX=0 - только контрольная точка);
+        # список файлов без обхода дерева - по явному SEDITOR_GIT_TRACKED_ONLY=1
+        self.use_git_index = os.environ.get(GIT_INDEX_ENV, '1') != '0'
+        self.git_tracked_only = os.environ.get(GIT_TRACKED_ONLY_ENV, '0') == '1'
+        self._git_index: Optional[GitIndex] = None
+        self._git_entries: Dict[str, GitIndexEntry] = {}
+        
+        # Учёт использования модели для выгрузки при простое
+        self._usage_lock = threading.Lock()
+        self._active_calls = 0
+        self._last_used = time.monotonic()
+        
+        # Метаданные результатов последнего search() (для ленивых фрагментов)
+        self._result_metadata: Dict[str, dict] = {}
+        
+        # Пропущенные при последней индексации файлы: причина -> количество
+        self.skip_counts: Dict[str, int] = {}
+        self._skip_lock = threading.Lock()
         
         # Создаём служебную директорию
         os.makedirs(self.seditor_dir, exist_ok=True)
         
-        logger.info(f'SemanticIndexer initialized for: {self.root_path}')
+        logger.info('SemanticIndexer initialized for: %s', self.root_path)
     
     def _init_model(self):
         """Ленивая инициализация модели эмбеддингов"""
@@ -66,14 +179,92 @@ class SemanticIndexer:
             return
         
         try:
-            from sentence_transformers import SentenceTransformer
-            logger.info('Loading sentence-transformers model...')
-            self._model = SentenceTransformer('all-MiniLM-L6-v2')
-            logger.info('Model loaded successfully')
+            self._model = self.embedder.load()
         except Exception as e:
-            logger.error(f'Failed to load model: {e}')
+            logger.error('Failed to load model: %s', e)
             raise
     
+    @property
+    def collection_name(self) -> str:
+        """
+        Имя коллекции для текущего провайдера эмбеддингов
+        
+        Векторы разных провайдеров несовместимы, поэтому у каждого своя
+        коллекция; для модели по умолчанию сохраняется прежнее имя 'files'.
+        """
+        if self.embedder.name == 'minilm':
+            return 'files'
+        return f'files_{self.embedder.name}_{self.embedder.dimension}'
+    
+    @property
+    def checkpoint(self) -> IndexCheckpoint:
+        """Состояние индексации текущего хранилища (читается при первом обращении)"""
+        if self._checkpoint is None:
+            path = os.path.join(self.seditor_dir, f'index_state_{self.collection_name}_{self.index_mode}.json')
+            self._checkpoint = IndexCheckpoint(path)
+        return self._checkpoint
+    
+    def _init_store(self):
+        """Ленивая инициализация векторного хранилища выбранного режима"""
+        if self.index_mode == 'chroma':
+            self._init_chroma()
+        else:
+            self._init_numpy_store()
+    
+    def _init_numpy_store(self):
+        """Ленивая инициализация собственного хранилища (квантованного или IVF)"""
+        if self._client is not None:
+            return
+        self._collection = self._client = self._open_numpy_store()
+    
+    @property
+    def store_directory(self) -> str:
+        """Директория собственного хранилища (режимы int8, binary, ivf)"""
+        return os.path.join(self.seditor_dir, f'{self.collection_name}_{self.index_mode}')
+    
+    def _open_numpy_store(self):
+        """Открыть собственное хранилище с диска"""
+        directory = self.store_directory
+        logger.info('Opening %s index at: %s', self.index_mode, directory)
+        if self.index_mode == 'ivf':
+            from seditor.search.ann import IVFVectorStore
+            return IVFVectorStore(directory)
+        from seditor.search.quantization import QuantizedVectorStore
+        return QuantizedVectorStore(directory, mode=self.index_mode)
+    
+    def reload(self) -> None:
+        """
+        Перечитать хранилище и контрольную точку с диска
+        
+        Нужно, когда индекс записывает другой процесс. Новое хранилище
+        открывается рядом со старым и подменяет его одним присваиванием,
+        поэтому можно вызывать из фонового потока: параллельный поиск
+        не видит полуоткрытого состояния.
+        """
+        self._checkpoint = None
+        if self._client is None:
+            return
+        if self.index_mode == 'chroma':
+            # Chroma кэширует состояние клиента по пути - сбрасываем кэш и открываем заново
+            clear_cache = getattr(self._client, 'clear_system_cache', None)
+            if clear_cache is not None:
+                clear_cache()
+            self._client = None
+            self._init_chroma()
+        else:
+            store = self._open_numpy_store()
+            if store.load_failed:
+                # Индекс переписывается другим процессом - остаётся прежнее состояние
+                logger.warning('Keeping the previous index for %s until the next reload', self.root_path)
+                return
+            self._collection = self._client = store
+    
+    def _flush_store(self):
+        """Сохранить хранилище на диск (Chroma сохраняет сама)"""
+        flush = getattr(self._collection, 'flush', None)
+        if flush is not None:
+            flush()
+    
     def _init_chroma(self):
         """Ленивая инициализация ChromaDB"""
         if self._client is not None:
@@ -82,24 +273,24 @@ class SemanticIndexer:
         try:
             import chromadb
             
-            logger.info(f'Initializing ChromaDB at: {self.chroma_dir}')
+            logger.info('Initializing ChromaDB at: %s', self.chroma_dir)
             
             # Используем новый API ChromaDB (PersistentClient)
             self._client = chromadb.PersistentClient(path=self.chroma_dir)
             
             # Получаем или создаём коллекцию
             try:
-                self._collection = self._client.get_collection(name="files")
-                logger.info(f'Loaded existing collection with {self._collection.count()} documents')
+                self._collection = self._client.get_collection(name=self.collection_name)
+                logger.info('Loaded existing collection with %s documents', self._collection.count())
             except Exception:
                 self._collection = self._client.create_collection(
-                    name="files",
+                    name=self.collection_name,
                     metadata={"description": "Indexed source files"}
                 )
                 logger.info('Created new collection')
             
         except Exception as e:
-            logger.error(f'Failed to initialize ChromaDB: {e}')
+            logger.error('Failed to initialize ChromaDB: %s', e)
             raise
     
     def _should_index_file(self, file_path: str) -> bool:
@@ -119,61 +310,259 @@ class SemanticIndexer:
         
         # Проверка размера
         try:
-            size = os.path.getsize(file_path)
-            if size > self.MAX_FILE_SIZE:
+            if os.path.getsize(file_path) > self.MAX_FILE_SIZE:
+                self._record_skip(SKIP_TOO_LARGE)
                 return False
         except OSError:
             return False
         
         return True
     
+    def _record_skip(self, reason: str) -> None:
+        """Учесть пропущенный файл"""
+        with self._skip_lock:
+            self.skip_counts[reason] = self.skip_counts.get(reason, 0) + 1
+        metrics.inc(f'indexer.skipped.{reason}')
+    
     def _read_file_content(self, file_path: str) -> Optional[str]:
         """
         Прочитать содержимое файла
         
+        Сначала проверяются имя и первые SNIFF_SIZE байт: бинарные,
+        минифицированные и сгенерированные файлы не дочитываются.
+        
         Args:
             file_path: Путь к файлу
             
         Returns:
-            Содержимое файла или None при ошибке
+            Содержимое файла или None при ошибке или пропуске
         """
         try:
+            reason = sniff_name(os.path.basename(file_path))
+            if reason is not None:
+                self._record_skip(reason)
+                return None
+            
             size = os.path.getsize(file_path)
+            # Большие файлы читаются частично
+            limit = size if size <= self.MAX_FULL_READ_SIZE else self.PARTIAL_READ_SIZE
             
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                if size <= self.MAX_FULL_READ_SIZE:
-                    # Читаем целиком
-                    return f.read()
-                else:
-                    # Читаем частично
-                    return f.read(self.PARTIAL_READ_SIZE)
+            with open(file_path, 'rb') as f:
+                head = f.read(min(SNIFF_SIZE, limit))
+                reason = sniff_head(head, complete=size <= SNIFF_SIZE)
+                if reason is not None:
+                    self._record_skip(reason)
+                    return None
+                data = head + f.read(max(0, limit - len(head)))
+            return data.decode('utf-8', errors='ignore')
         except Exception as e:
-            logger.warning(f'Failed to read file {file_path}: {e}')
+            logger.warning('Failed to read file %s: %s', file_path, e)
             return None
     
-    def _get_file_id(self, file_path: str) -> str:
+    def _get_content_id(self, file_path: str) -> str:
         """
-        Получить уникальный ID для файла
+        Получить ID записи индекса по содержимому файла
+        
+        Хэшируется весь файл потоково, а не прочитанная для эмбеддинга часть:
+        большие файлы с общим началом не должны схлопываться в одну запись.
         
         Args:
             file_path: Путь к файлу
             
         Returns:
-            Уникальный ID (hash от пути)
+            Хэш содержимого (одинаковые файлы получают один ID)
         """
-        relative_path = os.path.relpath(file_path, self.root_path)
-        return hashlib.md5(relative_path.encode()).hexdigest()
+        digest = hashlib.blake2b(digest_size=16)
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(self.HASH_CHUNK_SIZE), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+    
+    @staticmethod
+    def _store_metadata(metadata: dict) -> dict:
+        """Метаданные для хранилища: список дубликатов сериализуется в строку"""
+        stored = {key: value for key, value in metadata.items() if key != '_duplicates'}
+        duplicates = metadata.get('_duplicates') or []
+        if duplicates:
+            stored['duplicates'] = json.dumps(sorted(duplicates), ensure_ascii=False)
+            stored['duplicate_count'] = len(duplicates)
+        return stored
+    
+    def _upsert_batch(self, ids: List[str], documents: List[str], metadatas: List[dict]) -> None:
+        """Получить эмбеддинги батча и записать их в хранилище"""
+        try:
+            # Создаём эмбеддинги
+            embeddings = self._model.encode(documents, show_progress_bar=False)
+            
+            # Добавляем в коллекцию (upsert для обновления существующих).
+            # Тексты не сохраняются: фрагменты читаются из файлов при показе
+            self._collection.upsert(
+                ids=ids,
+                embeddings=embeddings.tolist(),
+                metadatas=[self._store_metadata(m) for m in metadatas]
+            )
+        except Exception as e:
+            logger.error('Failed to index batch: %s', e)
+    
+    def _fragment_bounds(self, size: int, content: Optional[str]) -> dict:
+        """
+        Границы проиндексированного фрагмента файла
+        
+        Args:
+            size: Размер файла
+            content: Прочитанный текст (None - файл не перечитывался, строки неизвестны)
+            
+        Returns:
+            byte_start/byte_end и, если известен текст, line_start/line_end
+        """
+        bounds = {
+            'byte_start': 0,
+            'byte_end': size if size <= self.MAX_FULL_READ_SIZE else min(size, self.PARTIAL_READ_SIZE),
+        }
+        if content is not None:
+            bounds['line_start'] = 1
+            bounds['line_end'] = content.count('\n') + (0 if content.endswith('\n') else 1)
+        return bounds
+    
+    def _index_batch(self, batch: List[tuple]) -> None:
+        """
+        Записать батч в хранилище
+        
+        Эмбеддинги считаются только для содержимого, которого ещё нет в
+        хранилище (например, после прерванной индексации); у остальных
+        записей обновляются метаданные.
+        
+        Args:
+            batch: Кортежи (id записи, путь, содержимое или None, метаданные)
+        """
+        try:
+            found = self._collection.get(ids=[item[0] for item in batch], include=['metadatas'])
+            stored = dict(zip(found['ids'], found['metadatas']))
+        except Exception as e:
+            logger.error('Failed to look up stored entries: %s', e)
+            stored = {}
+        
+        if stored:
+            reused = [item for item in batch if item[0] in stored]
+            for content_id, _, _, metadata in reused:
+                # Строки неперечитанного файла берутся из прежней записи
+                if 'line_end' not in metadata:
+                    previous = stored[content_id] or {}
+                    for key in ('line_start', 'line_end'):
+                        if key in previous:
+                            metadata[key] = previous[key]
+            try:
+                self._collection.update(ids=[item[0] for item in reused],
+                                        metadatas=[self._store_metadata(item[3]) for item in reused])
+            except Exception as e:
+                logger.error('Failed to update stored entries: %s', e)
+            metrics.inc('indexer.reused_entries', len(reused))
+        
+        ids, documents, metadatas = [], [], []
+        for content_id, file_path, content, metadata in batch:
+            if content_id in stored:
+                continue
+            if content is None:
+                content = self._read_file_content(file_path)
+                if not content:
+                    continue
+            ids.append(content_id)
+            documents.append(content)
+            metadatas.append(metadata)
+        if ids:
+            self._upsert_batch(ids, documents, metadatas)
+    
+    def _record_duplicates(self, unique: Dict[str, dict]) -> None:
+        """Дописать в метаданные записей пути файлов с тем же содержимым"""
+        ids = [content_id for content_id, metadata in unique.items() if metadata['_duplicates']]
+        if not ids:
+            return
+        try:
+            self._collection.update(ids=ids, metadatas=[self._store_metadata(unique[i]) for i in ids])
+        except Exception as e:
+            logger.error('Failed to record duplicates: %s', e)
+    
+    def _remove_stale(self, current_ids: set) -> None:
+        """Удалить записи, содержимого которых больше нет (изменённые и удалённые файлы)"""
+        try:
+            existing = self._collection.get(include=[])['ids']
+            stale = [item_id for item_id in existing if item_id not in current_ids]
+            for start in range(0, len(stale), 1000):
+                self._collection.delete(ids=stale[start:start + 1000])
+            if stale:
+                logger.info('Removed %d stale index entries', len(stale))
+        except Exception as e:
+            logger.error('Failed to remove stale entries: %s', e)
+    
+    def _load_git_index(self) -> Optional[Dict[str, GitIndexEntry]]:
+        """
+        Отслеживаемые файлы из .git/index
+        
+        Returns:
+            Путь относительно корня индексации -> запись индекса git, или None,
+            если это не git-репозиторий, быстрый путь выключен или индекс не читается
+        """
+        self._git_index = None
+        if not self.use_git_index:
+            return None
+        repo_root = find_repository_root(self.root_path)
+        if repo_root is None:
+            return None
+        try:
+            self._git_index = GitIndex(repo_root)
+        except GitIndexError as e:
+            logger.warning('Git index unavailable, walking the tree: %s', e)
+            return None
+        return self._git_index.tracked_under(self.root_path)
+    
+    @staticmethod
+    def _file_mtime(file_path: str) -> float:
+        """
+        Время изменения файла для приоритета недавно изменённых
+        
+        Всегда через stat: в индексе git - время на момент git add, правки
+        после него там не видны.
+        """
+        try:
+            return os.path.getmtime(file_path)
+        except OSError:
+            return 0.0
     
     def _collect_files(self) -> List[str]:
         """
         Собрать список файлов для индексации
         
+        Дерево обходится с учётом правил исключения; .git/index читается для
+        определения неизменённых файлов. С SEDITOR_GIT_TRACKED_ONLY=1 файлы
+        берутся из .git/index без обхода дерева - неотслеживаемые файлы
+        тогда не индексируются.
+        
         Returns:
             Список путей к файлам
         """
         files = []
         
-        for root, dirs, filenames in os.walk(self.root_path):
+        tracked = self._load_git_index()
+        self._git_entries = tracked or {}
+        if tracked is not None and self.git_tracked_only:
+            # Отслеживаемые файлы git не исключает, но .seditorignore применяется
+            ignore = get_ignore_matcher(self.root_path)
+            project_rules = ignore.has_project_rules
+            for relative_path in tracked:
+                if any(part in self.IGNORE_DIRS for part in relative_path.split(os.sep)[:-1]):
+                    continue
+                file_path = os.path.join(self.root_path, relative_path)
+                if project_rules and ignore.is_ignored(file_path, False):
+                    continue
+                # Размер из индекса git - на момент git add, проверяется настоящий
+                if self._should_index_file(file_path):
+                    files.append(file_path)
+            logger.info('Using git index: %d tracked files', len(tracked))
+            return files
+        
+        # Исключённые .gitignore/.seditorignore директории не обходятся вовсе
+        ignore = get_ignore_matcher(self.root_path)
+        for root, dirs, filenames in ignore.walk(self.root_path):
             # Фильтруем директории для игнорирования
             dirs[:] = [d for d in dirs if d not in self.IGNORE_DIRS]
             
@@ -184,98 +573,208 @@ class SemanticIndexer:
         
         return files
     
-    def index_directory(self, progress_callback: Optional[Callable[[int, int], None]] = None) -> int:
+    @staticmethod
+    def _wait_idle(throttle: Optional[IdleThrottle], cancel_event: Optional[threading.Event]) -> None:
+        """Отложить батч, пока пользователь печатает"""
+        if throttle is None:
+            return
+        paused = throttle.wait_idle(cancel_event)
+        if paused > 0:
+            metrics.observe('indexer.idle_wait', paused * 1000)
+    
+    def _prepare_file(self, file_path: str, checkpoint: IndexCheckpoint) -> tuple:
+        """
+        Узнать id записи файла: по контрольной точке или прочитав содержимое
+        
+        Returns:
+            (file_path, stat, blob, content_id, content); content - None, если файл
+            не перечитывался, content_id - None, если файл не индексируется
+        """
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return file_path, None, None, None, None
+        
+        # SHA содержимого из индекса git, если stat файла совпадает с закэшированным
+        relative_path = os.path.relpath(file_path, self.root_path)
+        blob = None
+        git_entry = self._git_entries.get(relative_path)
+        if git_entry is not None:
+            blob = self._git_index.blob_sha(git_entry, stat)
+        
+        # Файл не менялся с контрольной точки - id известен без чтения
+        content = None
+        content_id = checkpoint.lookup(relative_path, stat, blob)
+        if content_id is None:
+            content = self._read_file_content(file_path)
+            if content is not None and len(content.strip()) > 0:
+                try:
+                    content_id = self._get_content_id(file_path)
+                except OSError as e:
+                    logger.warning('Failed to hash file %s: %s', file_path, e)
+                    content = None
+        return file_path, stat, blob, content_id, content
+    
+    def _prepare_files(self, files: List[str], checkpoint: IndexCheckpoint, workers: int):
+        """
+        Подготовить файлы по порядку (см. _prepare_file)
+        
+        При workers > 1 файлы читаются и хэшируются в пуле потоков заходами по
+        READ_CHUNK файлов: порядок сохраняется, в памяти - не больше одного захода.
+        """
+        if workers <= 1:
+            for file_path in files:
+                yield self._prepare_file(file_path, checkpoint)
+            return
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='index-read') as executor:
+            for start in range(0, len(files), self.READ_CHUNK):
+                chunk = files[start:start + self.READ_CHUNK]
+                yield from executor.map(lambda path: self._prepare_file(path, checkpoint), chunk)
+    
+    @metrics.timed('indexer.index_directory')
+    @_uses_model
+    def index_directory(self, progress_callback: Optional[Callable[[int, int], None]] = None,
+                        cancel_event: Optional[threading.Event] = None,
+                        priorities: Optional[IndexPriorities] = None,
+                        throttle: Optional[IdleThrottle] = None,
+                        batch_size: Optional[int] = None, workers: int = 1) -> int:
         """
         Индексировать директорию
         
+        Проход возобновляемый: состояние периодически сохраняется в .seditor/,
+        а индекс помечается готовым только в конце. Неизменённые с контрольной
+        точки файлы не перечитываются, уже сохранённое содержимое не эмбеддится.
+        
         Args:
             progress_callback: Функция для отслеживания прогресса (current, total)
+            cancel_event: Событие отмены: текущий батч дописывается, состояние
+                сохраняется, и индексация прекращается
+            priorities: Что индексировать в первую очередь (по умолчанию - порядок обхода);
+                поиск по уже проиндексированной части работает во время индексации
+            throttle: Планировщик, откладывающий батчи, пока пользователь печатает
+            batch_size: Файлов в батче эмбеддинга (по умолчанию BATCH_SIZE)
+            workers: Потоков чтения и хэширования файлов (1 - в потоке индексации)
             
         Returns:
-            Количество проиндексированных файлов
+            Количество проиндексированных файлов (при отмене - до момента отмены)
         """
         # Инициализируем модель и БД
         self._init_model()
-        self._init_chroma()
+        self._init_store()
+        checkpoint = self.checkpoint
+        checkpoint.begin()
         
         # Собираем файлы
+        self.skip_counts = {}
         files = self._collect_files()
+        if priorities is not None:
+            files = prioritize_files(files, priorities, self._file_mtime)
         total_files = len(files)
         
-        logger.info(f'Found {total_files} files to index')
+        logger.info('Found %s files to index', total_files)
         
         if total_files == 0:
             return 0
         
         indexed_count = 0
         
+        # Одинаковое содержимое эмбеддится один раз: id записи - хэш содержимого,
+        # остальные пути с тем же содержимым хранятся в метаданных записи
+        unique: Dict[str, dict] = {}
+        
+        # Файлы, чьи записи уже переданы в хранилище, и файлы текущего батча:
+        # относительный путь -> [mtime_ns, размер, id записи]
+        processed: Dict[str, list] = {}
+        pending: Dict[str, list] = {}
+        last_checkpoint = time.monotonic()
+        cancelled = False
+        
         # Обрабатываем файлы батчами для эффективности
-        batch_size = 10
-        batch_ids = []
-        batch_documents = []
-        batch_metadatas = []
+        batch_size = batch_size or self.BATCH_SIZE
+        batch = []
         
-        for idx, file_path in enumerate(files):
-            # Читаем содержимое
-            content = self._read_file_content(file_path)
-            if content is None or len(content.strip()) == 0:
-                continue
+        prepared = self._prepare_files(files, checkpoint, workers)
+        for idx, (file_path, stat, blob, content_id, content) in enumerate(prepared):
+            if cancel_event is not None and cancel_event.is_set():
+                cancelled = True
+                break
             
-            # Подготавливаем метаданные
             relative_path = os.path.relpath(file_path, self.root_path)
-            file_id = self._get_file_id(file_path)
-            
-            metadata = {
-                'path': file_path,
-                'relative_path': relative_path,
-                'name': os.path.basename(file_path),
-                'extension': os.path.splitext(file_path)[1],
-                'size': os.path.getsize(file_path),
-                'timestamp': os.path.getmtime(file_path)
-            }
-            
-            batch_ids.append(file_id)
-            batch_documents.append(content)
-            batch_metadatas.append(metadata)
+            if content_id is not None:
+                indexed_count += 1
+                pending[relative_path] = checkpoint.entry(stat, content_id, blob)
+                
+                existing = unique.get(content_id)
+                if existing is not None:
+                    existing['_duplicates'].append(relative_path)
+                else:
+                    metadata = {
+                        'path': file_path,
+                        'relative_path': relative_path,
+                        'name': os.path.basename(file_path),
+                        'extension': os.path.splitext(file_path)[1],
+                        'size': stat.st_size,
+                        'timestamp': stat.st_mtime,
+                        'content_hash': content_id,
+                        '_duplicates': [],
+                    }
+                    metadata.update(self._fragment_bounds(stat.st_size, content))
+                    unique[content_id] = metadata
+                    batch.append((content_id, file_path, content, metadata))
             
-            # Когда батч заполнен или это последний файл
-            if len(batch_ids) >= batch_size or idx == total_files - 1:
-                try:
-                    # Создаём эмбеддинги
-                    embeddings = self._model.encode(batch_documents, show_progress_bar=False)
-                    
-                    # Добавляем в коллекцию (upsert для обновления существующих)
-                    self._collection.upsert(
-                        ids=batch_ids,
-                        embeddings=embeddings.tolist(),
-                        documents=batch_documents,
-                        metadatas=batch_metadatas
-                    )
-                    
-                    indexed_count += len(batch_ids)
-                    
-                    # Очищаем батч
-                    batch_ids = []
-                    batch_documents = []
-                    batch_metadatas = []
-                    
-                except Exception as e:
-                    logger.error(f'Failed to index batch: {e}')
+            if len(batch) >= batch_size:
+                self._wait_idle(throttle, cancel_event)
+                self._index_batch(batch)
+                batch = []
+                processed.update(pending)
+                pending = {}
+                if time.monotonic() - last_checkpoint >= self.CHECKPOINT_INTERVAL:
+                    self._flush_store()
+                    checkpoint.checkpoint(processed)
+                    last_checkpoint = time.monotonic()
             
             # Обновляем прогресс
             if progress_callback:
                 progress_callback(idx + 1, total_files)
+        prepared.close()
+        
+        if batch:
+            self._wait_idle(throttle, cancel_event)
+            self._index_batch(batch)
+        processed.update(pending)
+        if throttle is not None:
+            throttle.release()
+        
+        if cancelled:
+            self._flush_store()
+            checkpoint.checkpoint(processed)
+            logger.info('Indexing cancelled after %d of %d files, checkpoint saved', idx, total_files)
+            return indexed_count
         
-        logger.info(f'Indexed {indexed_count} files')
+        self._record_duplicates(unique)
+        self._remove_stale(set(unique))
+        metrics.inc('indexer.duplicate_files', indexed_count - len(unique))
+        logger.info('Unique contents: %d of %d files', len(unique), indexed_count)
+        if self.skip_counts:
+            logger.info('Skipped files: %s', format_skip_counts(self.skip_counts))
+        
+        self._flush_store()
+        checkpoint.finish(processed)
+        logger.info('Indexed %s files', indexed_count)
         return indexed_count
     
-    def search(self, query: str, top_k: int = 10) -> List[Tuple[str, str, float]]:
+    @metrics.timed('indexer.search')
+    @_uses_model
+    def search(self, query: str, top_k: int = 10,
+               path_prefix: Optional[str] = None) -> List[Tuple[str, str, float]]:
         """
         Поиск файлов по семантическому запросу
         
         Args:
             query: Текстовый запрос пользователя
             top_k: Количество результатов
+            path_prefix: Искать только в этой поддиректории (путь относительно корня индекса)
             
         Returns:
             Список кортежей (file_path, file_name, score)
@@ -285,7 +784,7 @@ class SemanticIndexer:
         
         # Инициализируем модель и БД
         self._init_model()
-        self._init_chroma()
+        self._init_store()
         
         # Проверяем, есть ли документы в коллекции
         if self._collection.count() == 0:
@@ -293,48 +792,190 @@ class SemanticIndexer:
             return []
         
         try:
-            # Создаём эмбеддинг для запроса
-            query_embedding = self._model.encode([query], show_progress_bar=False)[0]
-            
-            # Ищем в коллекции
-            results = self._collection.query(
-                query_embeddings=[query_embedding.tolist()],
-                n_results=min(top_k, self._collection.count())
-            )
-            
-            # Форматируем результаты
-            search_results = []
+            query_embedding = self.encode_query(query)
+        except Exception as e:
+            logger.error('Search failed: %s', e)
+            return []
+        metadata: Dict[str, dict] = {}
+        search_results = self.search_vector(query_embedding, top_k, path_prefix, metadata=metadata)
+        self._result_metadata = metadata
+        # Поиск идёт на каждое изменение запроса: аргументы не собираются без DEBUG
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug('Search for "%s" returned %d results', query, len(search_results))
+        return search_results
+    
+    @_uses_model
+    def encode_query(self, query: str) -> List[float]:
+        """
+        Эмбеддинг запроса (его можно переиспользовать для нескольких индексов с одной моделью)
+        
+        Args:
+            query: Текст запроса
             
-            if results and results['metadatas'] and len(results['metadatas']) > 0:
-                metadatas = results['metadatas'][0]
-                distances = results['distances'][0] if 'distances' in results else [0] * len(metadatas)
-                
-                for metadata, distance in zip(metadatas, distances):
-                    file_path = metadata.get('path', '')
-                    file_name = metadata.get('name', os.path.basename(file_path))
-                    
-                    # Конвертируем distance в score (меньше distance = выше score)
-                    score = 1.0 / (1.0 + distance)
-                    
-                    search_results.append((file_path, file_name, score))
+        Returns:
+            Вектор запроса
+        """
+        self._init_model()
+        return self._model.encode([query], show_progress_bar=False)[0].tolist()
+    
+    def search_vector(self, query_embedding: List[float], top_k: int = 10,
+                      path_prefix: Optional[str] = None,
+                      metadata: Optional[Dict[str, dict]] = None) -> List[Tuple[str, str, float]]:
+        """
+        Поиск по готовому эмбеддингу запроса
+        
+        Общего состояния не меняет: можно вызывать параллельно из нескольких потоков.
+        
+        Args:
+            query_embedding: Вектор запроса (см. encode_query)
+            top_k: Количество результатов
+            path_prefix: Искать только в этой поддиректории (путь относительно корня индекса)
+            metadata: Словарь, куда записываются метаданные найденных файлов по пути
+                (для get_snippet)
             
-            logger.info(f'Search for "{query}" returned {len(search_results)} results')
+        Returns:
+            Список кортежей (file_path, file_name, score), по убыванию score
+        """
+        self._init_store()
+        total = self._collection.count()
+        if total == 0:
+            return []
+        
+        try:
+            # С фильтром по поддиректории запрашиваем больше кандидатов и
+            # удваиваем запрос, пока не наберётся top_k или не кончится индекс
+            n_results = min(top_k if path_prefix is None else top_k * self.PREFIX_OVERFETCH, total)
+            while True:
+                results = self._collection.query(query_embeddings=[query_embedding], n_results=n_results)
+                found: Dict[str, dict] = {}
+                search_results = self._format_results(results, path_prefix, found)
+                if len(search_results) >= top_k or n_results >= total:
+                    break
+                n_results = min(n_results * 2, total)
+            search_results = search_results[:top_k]
+            if metadata is not None:
+                metadata.update((path, found[path]) for path, _, _ in search_results)
             return search_results
-            
         except Exception as e:
-            logger.error(f'Search failed: {e}')
+            logger.error('Search failed: %s', e)
             return []
     
+    def _format_results(self, results: dict, path_prefix: Optional[str] = None,
+                        found: Optional[Dict[str, dict]] = None) -> List[Tuple[str, str, float]]:
+        """
+        Результаты запроса к хранилищу в виде (file_path, file_name, score)
+        
+        Args:
+            results: Ответ query() хранилища
+            path_prefix: Оставить только файлы внутри этой поддиректории; для записи,
+                чьи копии лежат и внутри, и снаружи, показывается копия внутри
+            found: Словарь для метаданных результатов по пути
+        """
+        search_results = []
+        if not results or not results['metadatas'] or len(results['metadatas']) == 0:
+            return search_results
+        
+        metadatas = results['metadatas'][0]
+        distances = results['distances'][0] if 'distances' in results else [0] * len(metadatas)
+        prefix = None if path_prefix is None else os.path.normpath(path_prefix) + os.sep
+        
+        for metadata, distance in zip(metadatas, distances):
+            file_path = metadata.get('path', '')
+            file_name = metadata.get('name', os.path.basename(file_path))
+            duplicate_count = metadata.get('duplicate_count', 0)
+            if prefix is not None:
+                candidates = [metadata.get('relative_path', '')] + get_duplicate_paths(metadata)
+                inside = [path for path in candidates if path.startswith(prefix)]
+                if not inside:
+                    continue
+                file_path = os.path.join(self.root_path, inside[0])
+                file_name = os.path.basename(file_path)
+                duplicate_count = len(inside) - 1
+            if found is not None:
+                found[file_path] = metadata
+            
+            # Файлы с тем же содержимым показываются одной записью
+            if duplicate_count:
+                file_name = f'{file_name} {copies_label(duplicate_count)}'
+            
+            # Конвертируем distance в score (меньше distance = выше score)
+            score = 1.0 / (1.0 + distance)
+            
+            search_results.append((file_path, file_name, score))
+        return search_results
+    
+    def get_snippet(self, file_path: str, max_lines: int = 2,
+                    metadata: Optional[dict] = None) -> Optional[str]:
+        """
+        Фрагмент найденного файла для предпросмотра (читается из файла)
+        
+        Args:
+            file_path: Путь из результата последнего поиска
+            max_lines: Количество непустых строк
+            metadata: Метаданные записи из search_vector (по умолчанию - из последнего search)
+            
+        Returns:
+            Текст фрагмента или None, если файл недоступен
+        """
+        if metadata is None:
+            metadata = self._result_metadata.get(file_path, {})
+        return read_snippet(file_path, metadata.get('byte_start', 0), metadata.get('byte_end'),
+                            max_lines=max_lines)
+    
+    def memory_usage(self) -> dict:
+        """
+        Оценить память индексатора
+        
+        Returns:
+            {'model': байты загруженной модели, 'vectors': оценка размера векторов индекса}
+        """
+        vectors = 0
+        if self._collection is not None:
+            try:
+                if hasattr(self._collection, 'memory_usage'):
+                    vectors = self._collection.memory_usage()
+                else:
+                    vectors = self._collection.count() * self.embedder.dimension * 4
+            except Exception:
+                vectors = 0
+        return {'model': self.embedder.memory_usage(), 'vectors': vectors}
+    
+    def release_if_idle(self, idle_seconds: float, now: Optional[float] = None) -> bool:
+        """
+        Выгрузить модель эмбеддингов, если она не использовалась idle_seconds секунд
+        
+        Модель загрузится заново при следующей индексации или поиске.
+        
+        Args:
+            idle_seconds: Порог простоя в секундах
+            now: Текущее время time.monotonic (для тестов)
+            
+        Returns:
+            True если модель выгружена
+        """
+        now = time.monotonic() if now is None else now
+        with self._usage_lock:
+            if self._active_calls or self._model is None:
+                return False
+            if now - self._last_used < idle_seconds:
+                return False
+            self._model = None
+            self.embedder.unload()
+        logger.info('Embedding model unloaded after %.0fs idle', now - self._last_used)
+        return True
+    
     def is_indexed(self) -> bool:
         """
         Проверить, проиндексирована ли директория
         
+        Индекс прерванного прохода готовым не считается.
+        
         Returns:
-            True если есть проиндексированные файлы
+            True если последний проход индексации завершён и в индексе есть файлы
         """
         try:
-            self._init_chroma()
-            return self._collection.count() > 0
+            self._init_store()
+            return self.checkpoint.complete and self._collection.count() > 0
         except Exception:
             return False
     
@@ -346,7 +987,7 @@ class SemanticIndexer:
             Количество документов в коллекции
         """
         try:
-            self._init_chroma()
+            self._init_store()
             return self._collection.count()
         except Exception:
             return 0
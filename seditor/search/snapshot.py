@@ -0,0 +1,394 @@
+# -*- coding: utf-8 -*-
+"""
+Переносимые снимки индекса
+
+Снимок - один файл с индексом репозитория на определённом коммите: его
+можно построить один раз в CI и раздать как артефакт. Формат - ZIP:
+
+- manifest.json: формат и версия снимка, коммит, провайдер эмбеддингов,
+  режим индекса, порядок байтов;
+- checkpoint.json: контрольная точка индексации (пути относительные);
+- store/*: файлы хранилища. Текстовые (meta.json) сжаты deflate, массивы
+  (.npy, vectors.f32) записаны без сжатия: они плохо сжимаются, а
+  распаковка заняла бы больше времени, чем копирование.
+
+Импорт - копирование файлов в .seditor/ с заменой абсолютных путей, из
+снимка напрямую хранилище не читается. Затем обычный проход индексации
+догоняет локальные отличия: файлы, чей SHA блоба в индексе git совпадает с
+записанным в снимке, не перечитываются, а уже имеющееся в хранилище
+содержимое не эмбеддится повторно.
+
+Поддерживаются собственные хранилища (режимы int8, binary, ivf); в режиме
+chroma экспорт и импорт завершаются SnapshotError.
+"""
+
+import argparse
+import json
+import logging
+import os
+import shutil
+import sys
+import time
+import zipfile
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+from seditor.search import INDEX_MODES
+from seditor.search.git_index import find_git_dir, head_commit
+
+if TYPE_CHECKING:
+    from seditor.search.semantic_indexer import SemanticIndexer
+
+logger = logging.getLogger(__name__)
+
+# Директория с готовыми снимками: используется при первом открытии репозитория
+SNAPSHOT_DIR_ENV = 'SEDITOR_SNAPSHOT_DIR'
+
+SNAPSHOT_FORMAT = 'seditor-index-snapshot'
+SNAPSHOT_SUFFIX = '.snapshot'
+SNAPSHOT_MODES = ('int8', 'binary', 'ivf')
+
+MANIFEST = 'manifest.json'
+CHECKPOINT = 'checkpoint.json'
+STORE_PREFIX = 'store/'
+
+# Постоянная дата записей: снимок одного индекса побайтно воспроизводим
+_ZIP_DATE = (1980, 1, 1, 0, 0, 0)
+
+
+class SnapshotError(ValueError):
+    """Снимок повреждён или не подходит индексатору"""
+
+
+def snapshot_name(commit: Optional[str]) -> str:
+    """Имя файла снимка для коммита"""
+    return f'seditor-index-{(commit or "worktree")[:12]}{SNAPSHOT_SUFFIX}'
+
+
+def repository_id(root: str) -> str:
+    """
+    Идентификатор репозитория для подбора снимка
+
+    Returns:
+        URL remote origin из конфигурации git или имя корневой директории
+    """
+    git_dir = find_git_dir(root)
+    if git_dir is not None:
+        try:
+            section = None
+            with open(os.path.join(git_dir, 'config'), encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if line.startswith('['):
+                        section = line
+                    elif section == '[remote "origin"]' and line.startswith('url'):
+                        return line.partition('=')[2].strip()
+        except OSError:
+            pass
+    return os.path.basename(os.path.abspath(root))
+
+
+class Snapshot:
+    """Открытый для чтения снимок"""
+
+    FORMAT_VERSION = 1
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Файл снимка
+
+        Raises:
+            SnapshotError: Не снимок или неподдерживаемая версия
+        """
+        self.path = path
+        try:
+            self._zip = zipfile.ZipFile(path)
+            self.manifest = json.loads(self._zip.read(MANIFEST))
+        except (OSError, KeyError, ValueError, zipfile.BadZipFile) as e:
+            raise SnapshotError(f'Не удалось прочитать снимок {path}: {e}') from e
+        if self.manifest.get('format') != SNAPSHOT_FORMAT:
+            raise SnapshotError(f'{path} не является снимком индекса')
+        if self.manifest.get('version') != self.FORMAT_VERSION:
+            raise SnapshotError(f'Неподдерживаемая версия снимка: {self.manifest.get("version")}')
+
+    def __enter__(self) -> 'Snapshot':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._zip.close()
+
+    @property
+    def commit(self) -> Optional[str]:
+        return self.manifest.get('commit')
+
+    def store_files(self) -> List[str]:
+        """Имена файлов хранилища"""
+        return [name[len(STORE_PREFIX):] for name in self._zip.namelist() if name.startswith(STORE_PREFIX)]
+
+    def read(self, name: str) -> bytes:
+        """Содержимое записи (с проверкой CRC)"""
+        return self._zip.read(name)
+
+
+def _check_mode(indexer: 'SemanticIndexer') -> None:
+    """Снимки есть только у собственных хранилищ"""
+    if indexer.index_mode not in SNAPSHOT_MODES:
+        raise SnapshotError(f'Снимки не поддерживаются в режиме {indexer.index_mode}: '
+                            f'нужен один из {", ".join(SNAPSHOT_MODES)}')
+
+
+def export_snapshot(indexer: 'SemanticIndexer', path: Optional[str] = None,
+                    commit: Optional[str] = None) -> str:
+    """
+    Сохранить индекс в снимок
+
+    Args:
+        indexer: Индексатор с завершённым индексом
+        path: Файл или директория снимка (по умолчанию - .seditor/ с именем по коммиту)
+        commit: Коммит, на котором построен индекс (по умолчанию HEAD)
+
+    Returns:
+        Путь к созданному снимку
+
+    Raises:
+        SnapshotError: Режим индекса не поддерживается или индекс не завершён
+    """
+    _check_mode(indexer)
+    indexer._init_store()
+    indexer._flush_store()
+    if not indexer.checkpoint.complete:
+        raise SnapshotError('Индекс не завершён: сначала проиндексируйте репозиторий')
+
+    commit = commit or head_commit(indexer.root_path)
+    if path is None:
+        path = indexer.seditor_dir
+    if os.path.isdir(path):
+        path = os.path.join(path, snapshot_name(commit))
+
+    manifest = {
+        'format': SNAPSHOT_FORMAT,
+        'version': Snapshot.FORMAT_VERSION,
+        'commit': commit,
+        'repository': repository_id(indexer.root_path),
+        'created': time.time(),
+        'embedder': indexer.embedder.name,
+        'dimension': indexer.embedder.dimension,
+        'collection': indexer.collection_name,
+        'index_mode': indexer.index_mode,
+        'byteorder': sys.byteorder,
+        'sep': os.sep,
+        'files': len(indexer.checkpoint.files),
+    }
+    directory = indexer.store_directory
+    tmp_path = path + '.tmp'
+    with zipfile.ZipFile(tmp_path, 'w') as archive:
+        archive.writestr(zipfile.ZipInfo(MANIFEST, date_time=_ZIP_DATE),
+                         json.dumps(manifest, ensure_ascii=False, indent=1), zipfile.ZIP_DEFLATED)
+        with open(indexer.checkpoint.path, 'rb') as f:
+            archive.writestr(zipfile.ZipInfo(CHECKPOINT, date_time=_ZIP_DATE), f.read(), zipfile.ZIP_DEFLATED)
+        for name in sorted(os.listdir(directory)):
+            source = os.path.join(directory, name)
+            if name.endswith('.tmp') or not os.path.isfile(source):
+                continue
+            member = STORE_PREFIX + name
+            if name.endswith('.json'):
+                with open(source, 'rb') as f:
+                    archive.writestr(zipfile.ZipInfo(member, date_time=_ZIP_DATE), f.read(),
+                                     zipfile.ZIP_DEFLATED)
+                continue
+            size = os.path.getsize(source)
+            info = zipfile.ZipInfo(member, date_time=_ZIP_DATE)
+            info.compress_type = zipfile.ZIP_STORED
+            with open(source, 'rb') as src, archive.open(info, 'w', force_zip64=size > zipfile.ZIP64_LIMIT) as dst:
+                shutil.copyfileobj(src, dst, 1024 * 1024)
+    os.replace(tmp_path, path)
+    logger.info('Exported index snapshot %s (%d files, commit %s)', path, manifest['files'], commit)
+    return path
+
+
+def _relocate(relative: str, sep: str) -> str:
+    """Относительный путь снимка в разделителях текущей системы"""
+    return relative.replace(sep, os.sep) if sep != os.sep else relative
+
+
+def import_snapshot(indexer: 'SemanticIndexer', path: str) -> dict:
+    """
+    Загрузить индекс из снимка
+
+    Хранилище индексатора заменяется содержимым снимка, абсолютные пути
+    переписываются под корень индексатора. Индекс остаётся незавершённым:
+    следующий проход индексации догоняет локальные изменения.
+
+    Args:
+        indexer: Индексатор репозитория
+        path: Файл снимка
+
+    Returns:
+        Манифест снимка
+
+    Raises:
+        SnapshotError: Снимок повреждён или построен другой моделью / в другом режиме
+    """
+    _check_mode(indexer)
+    with Snapshot(path) as snapshot:
+        manifest = snapshot.manifest
+        expected = {
+            'collection': indexer.collection_name,
+            'index_mode': indexer.index_mode,
+            'dimension': indexer.embedder.dimension,
+            'byteorder': sys.byteorder,
+        }
+        for key, value in expected.items():
+            if manifest.get(key) != value:
+                raise SnapshotError(f'Снимок не подходит: {key}={manifest.get(key)!r}, нужно {value!r}')
+
+        sep = manifest.get('sep', '/')
+        directory = indexer.store_directory
+        staging = directory + '.import'
+        shutil.rmtree(staging, ignore_errors=True)
+        os.makedirs(staging)
+        try:
+            for name in snapshot.store_files():
+                target = os.path.join(staging, os.path.basename(name))
+                if name == 'meta.json':
+                    # Абсолютные пути записей - под корень этой машины
+                    meta = json.loads(snapshot.read(STORE_PREFIX + name))
+                    # inode файлов данных при копировании меняются
+                    meta.pop('files', None)
+                    for metadata in meta.get('metadatas', []):
+                        if metadata and 'relative_path' in metadata:
+                            metadata['relative_path'] = _relocate(metadata['relative_path'], sep)
+                            metadata['path'] = os.path.join(indexer.root_path, metadata['relative_path'])
+                        if metadata and metadata.get('duplicates') and sep != os.sep:
+                            duplicates = [_relocate(rel, sep) for rel in json.loads(metadata['duplicates'])]
+                            metadata['duplicates'] = json.dumps(duplicates, ensure_ascii=False)
+                    with open(target, 'w', encoding='utf-8') as f:
+                        json.dump(meta, f, ensure_ascii=False)
+                    continue
+                with snapshot._zip.open(STORE_PREFIX + name) as src, open(target, 'wb') as dst:
+                    shutil.copyfileobj(src, dst, 1024 * 1024)
+            state = json.loads(snapshot.read(CHECKPOINT))
+        except (OSError, KeyError, ValueError, zipfile.BadZipFile) as e:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise SnapshotError(f'Не удалось распаковать снимок {path}: {e}') from e
+
+    shutil.rmtree(directory, ignore_errors=True)
+    os.replace(staging, directory)
+
+    checkpoint = indexer.checkpoint
+    checkpoint.files = {_relocate(rel, sep): entry for rel, entry in state.get('files', {}).items()}
+    checkpoint.complete = False
+    checkpoint.save()
+    indexer.reload()
+    logger.info('Imported index snapshot %s (commit %s, %s files)', path, manifest.get('commit'),
+                manifest.get('files'))
+    return manifest
+
+
+def find_snapshot(indexer: 'SemanticIndexer', directory: Optional[str] = None) -> Optional[str]:
+    """
+    Подобрать снимок для репозитория
+
+    Сначала ищется снимок текущего HEAD, затем самый свежий снимок того же
+    репозитория с подходящими моделью и режимом индекса.
+
+    Args:
+        indexer: Индексатор репозитория
+        directory: Директория со снимками (по умолчанию SEDITOR_SNAPSHOT_DIR)
+
+    Returns:
+        Путь к снимку или None
+    """
+    directory = directory or os.environ.get(SNAPSHOT_DIR_ENV)
+    if not directory or not os.path.isdir(directory):
+        return None
+    exact = os.path.join(directory, snapshot_name(head_commit(indexer.root_path)))
+    candidates: Dict[str, float] = {}
+    repository = repository_id(indexer.root_path)
+    for name in os.listdir(directory):
+        if not name.endswith(SNAPSHOT_SUFFIX):
+            continue
+        path = os.path.join(directory, name)
+        try:
+            with Snapshot(path) as snapshot:
+                manifest = snapshot.manifest
+        except SnapshotError:
+            continue
+        if (manifest.get('repository') == repository
+                and manifest.get('collection') == indexer.collection_name
+                and manifest.get('index_mode') == indexer.index_mode):
+            candidates[path] = manifest.get('created', 0.0)
+    if exact in candidates:
+        return exact
+    return max(candidates, key=candidates.get) if candidates else None
+
+
+def restore_snapshot(indexer: 'SemanticIndexer', directory: Optional[str] = None) -> Optional[dict]:
+    """
+    Загрузить подходящий снимок, если локального индекса ещё нет
+
+    Returns:
+        Манифест загруженного снимка или None
+    """
+    if indexer.index_mode not in SNAPSHOT_MODES:
+        if directory or os.environ.get(SNAPSHOT_DIR_ENV):
+            logger.warning('Index snapshots are not supported in %s mode, ignoring %s',
+                           indexer.index_mode, SNAPSHOT_DIR_ENV)
+        return None
+    if indexer.checkpoint.files:
+        return None
+    path = find_snapshot(indexer, directory)
+    if path is None:
+        return None
+    try:
+        return import_snapshot(indexer, path)
+    except SnapshotError as e:
+        logger.warning('Failed to import snapshot: %s', e)
+        return None
+
+
+def _parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog='python -m seditor.search.snapshot',
+                                     description='Снимки индекса seditor')
+    parser.add_argument('action', choices=('export', 'import'), help='Действие')
+    parser.add_argument('root', help='Корень репозитория')
+    parser.add_argument('snapshot', nargs='?',
+                        help='Файл снимка (для export - файл или директория, по умолчанию .seditor/)')
+    parser.add_argument('--embedder', help='Провайдер эмбеддингов')
+    parser.add_argument('--index-mode', type=str.lower, choices=INDEX_MODES,
+                        help='Режим индекса (как у редактора: по умолчанию $SEDITOR_INDEX_MODE)')
+    parser.add_argument('--catch-up', action='store_true', help='После импорта догнать локальные изменения')
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    """Экспорт и импорт снимков из командной строки (например, в CI)"""
+    args = _parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s - %(message)s')
+    from seditor.search.semantic_indexer import SemanticIndexer
+    indexer = SemanticIndexer(args.root, embedder=args.embedder, index_mode=args.index_mode)
+    try:
+        # Режим chroma проверяется до индексации: снимок из него всё равно не получится
+        _check_mode(indexer)
+        if args.action == 'export':
+            if not indexer.is_indexed():
+                indexer.index_directory()
+            print(export_snapshot(indexer, args.snapshot))
+        else:
+            if not args.snapshot:
+                print('Не указан файл снимка', file=sys.stderr)
+                return 2
+            import_snapshot(indexer, args.snapshot)
+            if args.catch_up:
+                indexer.index_directory()
+    except SnapshotError as e:
+        print(f'Ошибка: {e}', file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""
+Быстрая проверка начала файла перед индексацией
+
+По первым килобайтам (в байтах, без декодирования) отсеиваются бинарные,
+минифицированные и сгенерированные файлы, чтобы не тратить на них
+вычисление эмбеддингов.
+"""
+
+from typing import Dict, Optional
+
+# Причины пропуска файла
+SKIP_BINARY = 'binary'
+SKIP_MINIFIED = 'minified'
+SKIP_GENERATED = 'generated'
+SKIP_TOO_LARGE = 'too_large'
+
+SKIP_LABELS = {
+    SKIP_BINARY: 'бинарные',
+    SKIP_MINIFIED: 'минифицированные',
+    SKIP_GENERATED: 'сгенерированные',
+    SKIP_TOO_LARGE: 'большие',
+}
+
+# Сколько байт начала файла проверяется
+SNIFF_SIZE = 8 * 1024
+
+# Доля управляющих байтов, начиная с которой файл считается бинарным
+MAX_CONTROL_RATIO = 0.3
+
+# Строка длиннее - признак минификации
+MAX_LINE_LENGTH = 3000
+
+# Средняя длина строки на образце не короче MIN_AVERAGE_SAMPLE байт
+MAX_AVERAGE_LINE_LENGTH = 500
+MIN_AVERAGE_SAMPLE = 4 * 1024
+
+# Маркеры сгенерированного кода ищутся в первых строках
+GENERATED_MARKER_LINES = 5
+GENERATED_MARKERS = (
+    b'@generated',
+    b'do not edit',
+    b'code generated by',
+    b'auto-generated',
+    b'autogenerated',
+)
+
+# Файлы, сгенерированные по имени (lock-файлы менеджеров пакетов)
+GENERATED_NAMES = frozenset({
+    'package-lock.json', 'npm-shrinkwrap.json', 'composer.lock', 'poetry.lock',
+    'Cargo.lock', 'Pipfile.lock', 'pnpm-lock.yaml', 'yarn.lock', 'Gemfile.lock',
+})
+GENERATED_SUFFIXES = ('_pb2.py', '_pb2_grpc.py', '.pb.go', '.g.dart')
+MINIFIED_SUFFIXES = ('.min.js', '.min.css', '.min.mjs')
+
+# Байты, обычные для текста: печатные, пробельные, \b, \f, ESC и всё от 0x80 (UTF-8)
+_TEXT_BYTES = bytes({7, 8, 9, 10, 12, 13, 27} | set(range(0x20, 0x100)) - {0x7f})
+
+
+def sniff_name(name: str) -> Optional[str]:
+    """
+    Причина пропуска по имени файла
+
+    Args:
+        name: Имя файла (без директории)
+
+    Returns:
+        SKIP_MINIFIED, SKIP_GENERATED или None
+    """
+    lowered = name.lower()
+    if lowered.endswith(MINIFIED_SUFFIXES):
+        return SKIP_MINIFIED
+    if name in GENERATED_NAMES or lowered.endswith(GENERATED_SUFFIXES):
+        return SKIP_GENERATED
+    return None
+
+
+def sniff_head(head: bytes, complete: bool = False) -> Optional[str]:
+    """
+    Причина пропуска по первым байтам файла
+
+    Args:
+        head: Первые байты файла (обычно SNIFF_SIZE)
+        complete: head содержит файл целиком
+
+    Returns:
+        SKIP_BINARY, SKIP_MINIFIED, SKIP_GENERATED или None
+    """
+    if not head:
+        return None
+    if b'\0' in head:
+        return SKIP_BINARY
+    control = len(head.translate(None, _TEXT_BYTES))
+    if control > len(head) * MAX_CONTROL_RATIO:
+        return SKIP_BINARY
+
+    lines = head.split(b'\n')
+    if not complete and len(lines) > 1 and len(lines[-1]) < MAX_LINE_LENGTH:
+        # Последняя строка образца обрезана - в средней длине не учитывается
+        lines.pop()
+    if max(len(line) for line in lines) > MAX_LINE_LENGTH:
+        return SKIP_MINIFIED
+    if len(head) >= MIN_AVERAGE_SAMPLE and len(head) / len(lines) > MAX_AVERAGE_LINE_LENGTH:
+        return SKIP_MINIFIED
+
+    first_lines = b'\n'.join(lines[:GENERATED_MARKER_LINES]).lower()
+    if any(marker in first_lines for marker in GENERATED_MARKERS):
+        return SKIP_GENERATED
+    return None
+
+
+def format_skip_counts(counts: Dict[str, int]) -> str:
+    """
+    Краткая сводка пропущенных файлов
+
+    Args:
+        counts: Причина -> количество
+
+    Returns:
+        Строка вида 'бинарные 3, минифицированные 1' (пустая, если пропусков нет)
+    """
+    return ', '.join(f'{SKIP_LABELS.get(reason, reason)} {count}'
+                     for reason, count in sorted(counts.items()) if count)
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+"""
+Ленивое чтение фрагментов проиндексированных файлов
+
+Индекс хранит только эмбеддинги и метаданные (путь, байтовые и строковые
+границы фрагмента, хэш содержимого); текст для предпросмотра читается из
+исходного файла в момент показа.
+"""
+
+from typing import Optional
+
+# Сколько байт фрагмента читается для предпросмотра
+SNIPPET_READ_SIZE = 4096
+
+
+def read_snippet(path: str, byte_start: int = 0, byte_end: Optional[int] = None,
+                 max_lines: int = 2, max_width: int = 120) -> Optional[str]:
+    """
+    Прочитать первые непустые строки фрагмента файла
+
+    Args:
+        path: Путь к файлу
+        byte_start: Начало фрагмента в байтах
+        byte_end: Конец фрагмента (None - до конца файла)
+        max_lines: Сколько непустых строк вернуть
+        max_width: Максимальная длина строки (длинные обрезаются с '…')
+
+    Returns:
+        Строки через '\\n' или None, если файл не читается
+    """
+    size = SNIPPET_READ_SIZE
+    if byte_end is not None:
+        size = max(0, min(size, byte_end - byte_start))
+    try:
+        with open(path, 'rb') as f:
+            f.seek(byte_start)
+            data = f.read(size)
+    except OSError:
+        return None
+
+    lines = []
+    for line in data.decode('utf-8', errors='ignore').splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        if len(line) > max_width:
+            line = line[:max_width - 1] + '…'
+        lines.append(line)
+        if len(lines) >= max_lines:
+            break
+    return '\n'.join(lines)
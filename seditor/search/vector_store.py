@@ -0,0 +1,440 @@
+# -*- coding: utf-8 -*-
+"""
+Основа векторных хранилищ на NumPy с API коллекции chromadb
+
+Записи занимают строки массивов; удаление помечает строку мёртвой, а при
+сохранении мёртвые строки вычищаются. Идентификаторы и метаданные хранятся
+в meta.json, массивы строк - в .npy-файлах рядом.
+
+Публичные методы сериализуются блокировкой хранилища: поиск из потока UI
+идёт по частичному индексу, пока поток индексации добавляет записи.
+
+meta.json записывает номера inode файлов данных, с которыми он сохранён:
+читатель из другого процесса, заставший сохранение между заменой meta.json
+и файлов данных, видит несовпадение и перечитывает индекс.
+"""
+
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def locked(method):
+    """Выполнять метод хранилища под его блокировкой"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+def stage_array(path: str, array: np.ndarray) -> str:
+    """
+    Записать массив в path + '.tmp' (на место он встаёт при фиксации сохранения)
+
+    Returns:
+        path
+    """
+    with open(path + '.tmp', 'wb') as f:
+        np.save(f, array)
+    return path
+
+
+class TornReadError(Exception):
+    """Файлы хранилища прочитаны из разных сохранений (запись шла одновременно с чтением)"""
+
+
+class RowVectorStore:
+    """Базовое хранилище: идентификаторы, метаданные и растущие массивы строк"""
+
+    # Тип хранилища в meta.json (индекс другого типа не загружается)
+    KIND = 'base'
+    FORMAT_VERSION = 1
+    META_FILE = 'meta.json'
+    # Попыток чтения, если оно пересеклось с сохранением в другом процессе
+    LOAD_ATTEMPTS = 5
+    LOAD_RETRY_DELAY = 0.05  # seconds
+
+    def __init__(self, directory: str, dimension: Optional[int] = None):
+        """
+        Args:
+            directory: Директория хранилища (создаётся при необходимости)
+            dimension: Размерность векторов (по умолчанию определяется при первой вставке)
+        """
+        self.directory = directory
+        self.dimension = dimension
+
+        self._ids: List[Optional[str]] = []  # id по строке (None - удалён)
+        self._metadatas: List[Optional[dict]] = []
+        self._positions: Dict[str, int] = {}
+        self._alive: Optional[np.ndarray] = None
+        self._size = 0  # занятые строки (включая удалённые)
+        self._dirty = False
+        self._recovered = False  # остатки прерванного сохранения убраны пишущим хранилищем
+        # Индекс на диске не удалось прочитать согласованным: хранилище пустое
+        self.load_failed = False
+        self._lock = threading.RLock()
+
+        os.makedirs(directory, exist_ok=True)
+        self._load()
+
+    # --- точки расширения ------------------------------------------------
+
+    def _row_arrays(self) -> Dict[str, Tuple[tuple, type]]:
+        """Массивы строк подкласса: имя атрибута -> (форма строки, dtype)"""
+        return {}
+
+    def _query_one(self, query: np.ndarray, n_results: int) -> Tuple[List[int], np.ndarray]:
+        """Номера строк и расстояния ближайших векторов"""
+        raise NotImplementedError
+
+    def _meta(self) -> dict:
+        """Дополнительные поля meta.json"""
+        return {}
+
+    def _load_meta(self, meta: dict) -> None:
+        """
+        Прочитать дополнительные поля meta.json (и связанные файлы через _open_data)
+
+        Raises:
+            TornReadError: Файл из другого сохранения
+        """
+
+    def _data_files(self) -> List[str]:
+        """Файлы подкласса, которые пишутся на месте, а не через _save_files"""
+        return []
+
+    def _save_files(self) -> List[str]:
+        """
+        Записать дополнительные файлы подкласса во временные (путь + '.tmp')
+
+        Returns:
+            Пути файлов, которые встанут на место вместе с meta.json
+        """
+        return []
+
+    def _compact_rows(self, keep: List[int]) -> None:
+        """Дополнительная работа при вычищении строк (например, файлы на диске)"""
+
+    # --- служебное -------------------------------------------------------
+
+    @property
+    def kind(self) -> str:
+        """Тип хранилища, записываемый в meta.json"""
+        return self.KIND
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _allocate(self, rows: int) -> None:
+        """Гарантировать ёмкость массивов строк не меньше rows (ёмкость растёт удвоением)"""
+        capacity = 0 if self._alive is None else self._alive.shape[0]
+        if rows <= capacity:
+            return
+        new_capacity = max(rows, capacity * 2, 64)
+        specs = dict(self._row_arrays(), _alive=((), bool))
+        for name, (shape, dtype) in specs.items():
+            array = np.zeros((new_capacity,) + shape, dtype=dtype)
+            if capacity:
+                array[:capacity] = getattr(self, name)
+            setattr(self, name, array)
+
+    def _check_vectors(self, embeddings) -> np.ndarray:
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        if self.dimension is None:
+            self.dimension = vectors.shape[1]
+        if vectors.shape[1] != self.dimension:
+            raise ValueError(f'Размерность {vectors.shape[1]} не совпадает с {self.dimension}')
+        return vectors
+
+    def _assign_rows(self, ids, metadatas) -> List[int]:
+        """
+        Выделить строки под идентификаторы (существующие переиспользуются)
+
+        Returns:
+            Номера строк в порядке ids
+        """
+        metadatas = metadatas or [{} for _ in ids]
+        rows = []
+        for item_id, metadata in zip(ids, metadatas):
+            row = self._positions.get(item_id)
+            if row is None:
+                row = self._size
+                self._size += 1
+                self._positions[item_id] = row
+                self._ids.append(item_id)
+                self._metadatas.append(metadata)
+            else:
+                self._metadatas[row] = metadata
+            rows.append(row)
+        self._allocate(self._size)
+        self._alive[rows] = True
+        self._dirty = True
+        return rows
+
+    # --- API, совместимый с коллекцией chromadb --------------------------
+
+    @locked
+    def count(self) -> int:
+        """Количество векторов"""
+        return len(self._positions)
+
+    @locked
+    def delete(self, ids) -> None:
+        """Удалить векторы (строки освобождаются при сохранении)"""
+        for item_id in ids:
+            row = self._positions.pop(item_id, None)
+            if row is not None:
+                self._ids[row] = None
+                self._metadatas[row] = None
+                self._alive[row] = False
+                self._dirty = True
+
+    @locked
+    def update(self, ids, embeddings=None, metadatas=None, documents=None) -> None:
+        """
+        Обновить существующие записи (отсутствующие идентификаторы пропускаются)
+
+        Args:
+            ids: Идентификаторы
+            embeddings: Новые векторы (None - оставить прежние)
+            metadatas: Новые метаданные (None - оставить прежние)
+            documents: Игнорируются
+        """
+        present = [i for i, item_id in enumerate(ids) if item_id in self._positions]
+        if not present:
+            return
+        present_ids = [ids[i] for i in present]
+        if metadatas is None:
+            new_metadatas = [self._metadatas[self._positions[item_id]] for item_id in present_ids]
+        else:
+            new_metadatas = [metadatas[i] for i in present]
+        if embeddings is not None:
+            self.upsert(present_ids, [embeddings[i] for i in present], new_metadatas)
+            return
+        for item_id, metadata in zip(present_ids, new_metadatas):
+            self._metadatas[self._positions[item_id]] = metadata
+        self._dirty = True
+
+    @locked
+    def get(self, ids=None, include=None) -> dict:
+        """
+        Получить записи по идентификаторам
+
+        Args:
+            ids: Идентификаторы (None - все записи)
+            include: Для совместимости с chromadb
+
+        Returns:
+            {'ids': [...], 'metadatas': [...]}
+        """
+        if ids is None:
+            rows = sorted(self._positions.values())
+        else:
+            rows = [self._positions[i] for i in ids if i in self._positions]
+        return {
+            'ids': [self._ids[row] for row in rows],
+            'metadatas': [self._metadatas[row] for row in rows],
+        }
+
+    @locked
+    def query(self, query_embeddings, n_results: int = 10) -> dict:
+        """
+        Найти ближайшие векторы (квадрат L2, как у коллекции chromadb по умолчанию)
+
+        Args:
+            query_embeddings: Список векторов запросов
+            n_results: Количество результатов на запрос
+
+        Returns:
+            {'ids': [[...]], 'metadatas': [[...]], 'distances': [[...]]} по запросам
+        """
+        result = {'ids': [], 'metadatas': [], 'distances': []}
+        for query in query_embeddings:
+            if self._positions and n_results > 0:
+                rows, distances = self._query_one(np.asarray(query, dtype=np.float32), n_results)
+            else:
+                rows, distances = [], []
+            result['ids'].append([self._ids[row] for row in rows])
+            result['metadatas'].append([self._metadatas[row] for row in rows])
+            result['distances'].append([float(d) for d in distances])
+        return result
+
+    # --- сохранение ------------------------------------------------------
+
+    def _recover(self, writer: bool) -> None:
+        """
+        Довести до конца или откатить прерванное сохранение
+
+        Замена meta.json - точка фиксации сохранения (см. flush). Если она прошла,
+        оставшиеся временные файлы относятся к новому meta.json и встают на место.
+        Если нет (есть meta.json.tmp), временные файлы удаляет только пишущее
+        хранилище: читатель в другом процессе может застать сохранение в процессе.
+
+        Args:
+            writer: Вызов из flush (хранилище пишет в директорию само)
+        """
+        names = [name for name in os.listdir(self.directory) if name.endswith('.tmp')]
+        committed = (self.META_FILE + '.tmp') not in names
+        if not committed and not writer:
+            return
+        for name in names:
+            path = self._path(name)
+            try:
+                if committed:
+                    os.replace(path, path[:-len('.tmp')])
+                else:
+                    os.remove(path)
+            except FileNotFoundError:
+                pass  # сохранение завершил другой процесс
+        if names:
+            logger.warning('Recovered interrupted save in %s (%s)', self.directory,
+                           'completed' if committed else 'rolled back')
+
+    def _open_data(self, name: str, meta: dict):
+        """
+        Открыть файл данных, проверив, что он из того же сохранения, что и meta
+
+        Returns:
+            Файл, открытый на чтение в двоичном режиме
+
+        Raises:
+            TornReadError: inode файла не совпадает с записанным в meta.json
+        """
+        f = open(self._path(name), 'rb')
+        expected = meta.get('files', {}).get(name)
+        if expected is not None and os.fstat(f.fileno()).st_ino != expected:
+            f.close()
+            raise TornReadError(f'{name} is from another save')
+        return f
+
+    def _load(self) -> None:
+        """
+        Прочитать индекс с диска
+
+        Чтение, пересёкшееся с сохранением в другом процессе, повторяется;
+        если согласованно прочитать не удалось, хранилище остаётся пустым
+        и выставляется load_failed.
+        """
+        for attempt in range(self.LOAD_ATTEMPTS):
+            self._recover(writer=False)
+            try:
+                self._read()
+                return
+            except TornReadError as e:
+                logger.debug('Vector index %s changed while loading (%s), retrying', self.directory, e)
+                self._reset()
+                time.sleep(self.LOAD_RETRY_DELAY * (attempt + 1))
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning('Failed to load vector index %s: %s', self.directory, e)
+                self._reset()
+                return
+        logger.warning('Vector index %s is being rewritten, could not load it consistently', self.directory)
+        self.load_failed = True
+
+    def _read(self) -> None:
+        """Прочитать meta.json и файлы данных того же сохранения"""
+        meta_path = self._path(self.META_FILE)
+        if not os.path.exists(meta_path):
+            return
+        with open(meta_path, encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get('version') != self.FORMAT_VERSION or meta.get('kind') != self.kind:
+            logger.warning('Vector index format mismatch in %s, starting empty', self.directory)
+            return
+        self.dimension = meta['dimension']
+        self._ids = meta['ids']
+        self._metadatas = meta['metadatas']
+        self._size = len(self._ids)
+        for name in self._row_arrays():
+            file_name = name.lstrip('_') + '.npy'
+            with self._open_data(file_name, meta) as f:
+                array = np.load(f)
+            if len(array) != self._size:
+                raise TornReadError(f'{file_name} has {len(array)} rows for {self._size} ids')
+            setattr(self, name, array)
+        self._positions = {item: row for row, item in enumerate(self._ids) if item is not None}
+        self._alive = np.array([item is not None for item in self._ids], dtype=bool)
+        self._load_meta(meta)
+
+    def _reset(self) -> None:
+        """Пустое хранилище (после неудачного чтения)"""
+        self._ids, self._metadatas, self._positions = [], [], {}
+        for name in self._row_arrays():
+            setattr(self, name, None)
+        self._alive = None
+        self._size = 0
+
+    @locked
+    def flush(self) -> None:
+        """
+        Сохранить массивы и метаданные на диск (удалённые строки при этом вычищаются)
+
+        Все файлы сначала пишутся во временные; замена meta.json - точка фиксации,
+        после неё на место встают остальные файлы (см. _recover). В meta.json
+        записываются inode файлов данных этого сохранения (см. _open_data).
+        """
+        if not self._dirty:
+            return
+        if not self._recovered:
+            self._recover(writer=True)
+            self._recovered = True
+        # meta.json.tmp - признак незафиксированного сохранения, создаётся раньше
+        # любых других временных файлов (в том числе при сжатии строк)
+        tmp_path = self._path(self.META_FILE + '.tmp')
+        open(tmp_path, 'w').close()
+        if len(self._positions) < self._size:
+            self._compact()
+        staged = []
+        for name in self._row_arrays():
+            array = getattr(self, name)
+            if array is not None:
+                staged.append(stage_array(self._path(name.lstrip('_') + '.npy'), array[:self._size]))
+        staged.extend(self._save_files())
+        files = {os.path.basename(path): os.stat(path + '.tmp').st_ino for path in staged}
+        for name in self._data_files():
+            if name not in files and os.path.exists(self._path(name)):
+                files[name] = os.stat(self._path(name)).st_ino
+        meta = {
+            'version': self.FORMAT_VERSION,
+            'kind': self.kind,
+            'dimension': self.dimension,
+            'ids': self._ids,
+            'metadatas': self._metadatas,
+            'files': files,
+        }
+        meta.update(self._meta())
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(tmp_path, self._path(self.META_FILE))
+        for path in staged:
+            try:
+                os.replace(path + '.tmp', path)
+            except FileNotFoundError:
+                pass  # на место уже поставил читатель (см. _recover)
+        self._dirty = False
+
+    def _compact(self) -> None:
+        """Убрать удалённые строки"""
+        keep = [row for row, item in enumerate(self._ids) if item is not None]
+        self._compact_rows(keep)
+        for name in self._row_arrays():
+            setattr(self, name, getattr(self, name)[keep])
+        self._alive = np.ones(len(keep), dtype=bool)
+        self._ids = [self._ids[row] for row in keep]
+        self._metadatas = [self._metadatas[row] for row in keep]
+        self._positions = {item: row for row, item in enumerate(self._ids)}
+        self._size = len(keep)
+
+    def memory_usage(self) -> int:
+        """Объём массивов строк в памяти"""
+        return sum(getattr(self, name).nbytes for name in self._row_arrays()
+                   if getattr(self, name) is not None)
@@ -0,0 +1,368 @@
+# -*- coding: utf-8 -*-
+"""
+Индексация в отдельном процессе
+
+Эмбеддинг и запись индекса выполняются в дочернем процессе с пониженным
+приоритетом (nice) и, по желанию, ограничением адресного пространства
+(RLIMIT_AS). Процесс редактора остаётся маленьким, GIL и аллокации torch
+не мешают интерфейсу, а падение нативных библиотек не закрывает редактор.
+
+Протокол - JSON-строки:
+- stdout дочернего процесса: {"event": "progress", "current", "total"},
+  {"event": "checkpoint"} (состояние сохранено на диск - можно перечитать
+  индекс), {"event": "done", "indexed", "cancelled", "skipped"},
+  {"event": "error", "message"};
+- stdin дочернего процесса: "touch" (пользователь печатает), "cancel";
+  конец ввода (редактор закрылся) тоже отменяет индексацию.
+
+Логи дочернего процесса идут в stderr и пересылаются в лог редактора.
+"""
+
+import argparse
+import asyncio
+import collections
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from typing import TYPE_CHECKING, Callable, List, Optional
+
+from seditor.search.scheduler import IdleThrottle, IndexPriorities
+
+if TYPE_CHECKING:
+    from seditor.search.semantic_indexer import SemanticIndexer
+
+logger = logging.getLogger(__name__)
+
+# Режим индексации: 'process' (дочерний процесс) или 'thread' (поток редактора)
+INDEX_WORKER_ENV = 'SEDITOR_INDEX_WORKER'
+# Прибавка к nice дочернего процесса
+INDEX_NICE_ENV = 'SEDITOR_INDEX_NICE'
+# Ограничение адресного пространства дочернего процесса, МБ
+INDEX_MEMORY_ENV = 'SEDITOR_INDEX_MEMORY_MB'
+
+DEFAULT_NICE = 10
+# Как часто дочерний процесс отправляет прогресс, секунды
+WORKER_PROGRESS_INTERVAL = 0.1
+# Интервал контрольных точек в процессе: после каждой редактор перечитывает
+# индекс, поэтому он короче, чем при индексации в потоке
+WORKER_CHECKPOINT_INTERVAL = 3.0
+
+
+class IndexWorkerError(RuntimeError):
+    """Дочерний процесс индексации завершился с ошибкой"""
+
+
+def use_index_process() -> bool:
+    """Индексировать ли в дочернем процессе (SEDITOR_INDEX_WORKER, по умолчанию - да)"""
+    return os.environ.get(INDEX_WORKER_ENV, 'process').lower() != 'thread'
+
+
+def _env_int(name: str, default: Optional[int]) -> Optional[int]:
+    value = os.environ.get(name)
+    if not value:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        logger.warning('Invalid %s=%r, using %s', name, value, default)
+        return default
+
+
+# --- дочерний процесс ------------------------------------------------------
+
+def apply_limits(nice: int = 0, memory_limit_mb: Optional[int] = None) -> None:
+    """
+    Понизить приоритет и ограничить память текущего процесса
+
+    Недоступные на платформе ограничения пропускаются с предупреждением.
+
+    Args:
+        nice: Прибавка к nice
+        memory_limit_mb: Предел адресного пространства (RLIMIT_AS), МБ
+    """
+    if nice:
+        try:
+            os.nice(nice)
+        except (AttributeError, OSError) as e:
+            logger.warning('Failed to lower worker priority: %s', e)
+    if memory_limit_mb:
+        try:
+            import resource
+            limit = memory_limit_mb * 1024 * 1024
+            _, hard = resource.getrlimit(resource.RLIMIT_AS)
+            if hard != resource.RLIM_INFINITY:
+                limit = min(limit, hard)
+            resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+        except (ImportError, ValueError, OSError) as e:
+            logger.warning('Failed to limit worker memory: %s', e)
+
+
+def _emit(event: str, **fields) -> None:
+    """Отправить событие родителю (если редактор уже закрылся - молча)"""
+    fields['event'] = event
+    try:
+        sys.stdout.write(json.dumps(fields, ensure_ascii=False) + '\n')
+        sys.stdout.flush()
+    except OSError:
+        # Канал закрыт: индексация отменится по концу stdin и сохранит контрольную точку
+        sys.stdout = open(os.devnull, 'w')
+
+
+def _read_commands(throttle: IdleThrottle, cancel: threading.Event) -> None:
+    """Читать команды родителя из stdin (поток дочернего процесса)"""
+    for line in sys.stdin:
+        command = line.strip()
+        if command == 'touch':
+            throttle.touch()
+        elif command == 'cancel':
+            break
+    cancel.set()
+
+
+def _parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog='python -m seditor.search.worker',
+                                     description='Дочерний процесс индексации seditor')
+    parser.add_argument('root', help='Корень индексации')
+    parser.add_argument('--embedder', help='Провайдер эмбеддингов')
+    parser.add_argument('--index-mode', help='Режим индекса')
+    parser.add_argument('--nice', type=int, default=0, help='Прибавка к nice')
+    parser.add_argument('--memory-limit-mb', type=int, help='Предел адресного пространства, МБ')
+    parser.add_argument('--focus', action='append', default=[], help='Приоритетная директория')
+    parser.add_argument('--expanded', action='append', default=[], help='Раскрытый узел дерева')
+    parser.add_argument('--log-level', default='WARNING', help='Уровень логирования (в stderr)')
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    """Точка входа дочернего процесса"""
+    args = _parse_args(argv)
+    logging.basicConfig(level=args.log_level, stream=sys.stderr,
+                        format='%(name)s - %(levelname)s - %(message)s')
+    apply_limits(args.nice, args.memory_limit_mb)
+
+    throttle = IdleThrottle()
+    cancel = threading.Event()
+    threading.Thread(target=_read_commands, args=(throttle, cancel),
+                     name='index-worker-commands', daemon=True).start()
+
+    try:
+        from seditor.search.semantic_indexer import SemanticIndexer
+        indexer = SemanticIndexer(args.root, embedder=args.embedder, index_mode=args.index_mode)
+        indexer.CHECKPOINT_INTERVAL = WORKER_CHECKPOINT_INTERVAL
+        checkpoint_saved = indexer.checkpoint.updated
+        last_progress = 0.0
+
+        def progress(current: int, total: int) -> None:
+            nonlocal checkpoint_saved, last_progress
+            # Контрольная точка сохраняется после записи хранилища: родитель может перечитать индекс
+            if indexer.checkpoint.updated != checkpoint_saved:
+                checkpoint_saved = indexer.checkpoint.updated
+                _emit('checkpoint')
+            now = time.monotonic()
+            if current == total or now - last_progress >= WORKER_PROGRESS_INTERVAL:
+                last_progress = now
+                _emit('progress', current=current, total=total)
+
+        priorities = IndexPriorities(focus_dirs=tuple(args.focus), expanded_dirs=tuple(args.expanded))
+        indexed = indexer.index_directory(progress, cancel, priorities, throttle)
+        _emit('done', indexed=indexed, cancelled=cancel.is_set(), skipped=indexer.skip_counts)
+        return 0
+    except Exception as e:
+        logger.exception('Indexing worker failed')
+        _emit('error', message=f'{type(e).__name__}: {e}')
+        return 1
+
+
+# --- процесс редактора -----------------------------------------------------
+
+class IndexWorker:
+    """Дочерний процесс индексации одного индексатора (сторона редактора)"""
+
+    # Как часто пересылать нажатия клавиш, секунды
+    TOUCH_INTERVAL = 0.1
+    # Сколько ждать выхода процесса после отмены, прежде чем завершить его принудительно
+    STOP_TIMEOUT = 10.0
+    # Последних строк stderr в сообщении об ошибке упавшего процесса
+    LOG_TAIL_LINES = 20
+
+    def __init__(self, indexer: 'SemanticIndexer', nice: Optional[int] = None,
+                 memory_limit_mb: Optional[int] = None):
+        """
+        Args:
+            indexer: Индексатор редактора (после индексации перечитывает хранилище с диска)
+            nice: Прибавка к nice (по умолчанию SEDITOR_INDEX_NICE или 10)
+            memory_limit_mb: Предел памяти, МБ (по умолчанию SEDITOR_INDEX_MEMORY_MB, без предела)
+        """
+        self.indexer = indexer
+        self.nice = _env_int(INDEX_NICE_ENV, DEFAULT_NICE) if nice is None else nice
+        self.memory_limit_mb = (_env_int(INDEX_MEMORY_ENV, None)
+                                if memory_limit_mb is None else memory_limit_mb)
+        self._process: Optional[asyncio.subprocess.Process] = None
+        self._last_touch = 0.0
+        # Последние строки stderr - для сообщения об ошибке, если процесс упал
+        self._log_tail: collections.deque = collections.deque(maxlen=self.LOG_TAIL_LINES)
+
+    def command(self, priorities: Optional[IndexPriorities] = None) -> List[str]:
+        """Командная строка дочернего процесса"""
+        command = [
+            sys.executable, '-m', 'seditor.search.worker', self.indexer.root_path,
+            '--embedder', self.indexer.embedder.name,
+            '--index-mode', self.indexer.index_mode,
+            '--nice', str(self.nice),
+            '--log-level', logging.getLevelName(logging.getLogger().getEffectiveLevel()),
+        ]
+        if self.memory_limit_mb:
+            command += ['--memory-limit-mb', str(self.memory_limit_mb)]
+        if priorities is not None:
+            for directory in priorities.focus_dirs:
+                command += ['--focus', directory]
+            for directory in priorities.expanded_dirs:
+                command += ['--expanded', directory]
+        return command
+
+    @staticmethod
+    def _environment() -> dict:
+        """Окружение дочернего процесса: пакет seditor должен импортироваться из любого cwd"""
+        import seditor
+        package_root = os.path.dirname(os.path.dirname(os.path.abspath(seditor.__file__)))
+        env = dict(os.environ)
+        env['PYTHONPATH'] = os.pathsep.join(filter(None, [package_root, env.get('PYTHONPATH')]))
+        return env
+
+    async def run(self, progress_callback: Optional[Callable[[int, int], None]] = None,
+                  priorities: Optional[IndexPriorities] = None) -> int:
+        """
+        Проиндексировать директорию в дочернем процессе
+
+        После каждой контрольной точки и по завершении индексатор редактора
+        перечитывает хранилище, поэтому поиск по частичному индексу работает.
+        Хранилище перечитывается в пуле потоков, а не в цикле событий UI;
+        контрольные точки, пришедшие во время чтения, объединяются.
+        Отмена задачи отменяет и индексацию (процесс сохраняет контрольную точку).
+
+        Args:
+            progress_callback: Функция прогресса (current, total)
+            priorities: Что индексировать в первую очередь
+
+        Returns:
+            Количество проиндексированных файлов
+
+        Raises:
+            IndexWorkerError: Процесс упал или сообщил об ошибке
+        """
+        process = await asyncio.create_subprocess_exec(
+            *self.command(priorities),
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            env=self._environment(),
+        )
+        self._process = process
+        logger.info('Indexing worker started (pid %d, nice +%d)', process.pid, self.nice)
+        stderr_task = asyncio.ensure_future(self._forward_log(process.stderr))
+        loop = asyncio.get_running_loop()
+        reload_task: Optional[asyncio.Future] = None
+        result = None
+        error = None
+        try:
+            async for line in process.stdout:
+                try:
+                    message = json.loads(line)
+                except ValueError:
+                    logger.warning('Unexpected worker output: %r', line[:200])
+                    continue
+                event = message.get('event')
+                if event == 'progress':
+                    if progress_callback:
+                        progress_callback(message['current'], message['total'])
+                elif event == 'checkpoint':
+                    if reload_task is None or reload_task.done():
+                        reload_task = loop.run_in_executor(None, self.indexer.reload)
+                elif event == 'done':
+                    result = message
+                elif event == 'error':
+                    error = message.get('message')
+            return_code = await process.wait()
+            await stderr_task
+        except asyncio.CancelledError:
+            self.cancel()
+            stderr_task.cancel()
+            raise
+        finally:
+            self._process = None
+
+        if reload_task is not None:
+            await reload_task
+        await loop.run_in_executor(None, self.indexer.reload)
+        if result is None:
+            if error is None:
+                error = f'Процесс индексации завершился с кодом {return_code}'
+                if self._log_tail:
+                    error += ':\n' + '\n'.join(self._log_tail)
+            raise IndexWorkerError(error)
+        self.indexer.skip_counts = result.get('skipped', {})
+        logger.info('Indexing worker finished: %s files%s', result['indexed'],
+                    ' (cancelled)' if result.get('cancelled') else '')
+        return result['indexed']
+
+    async def _forward_log(self, stream: asyncio.StreamReader) -> None:
+        """Переслать stderr дочернего процесса в лог редактора"""
+        async for line in stream:
+            text = line.decode('utf-8', 'replace').rstrip()
+            if text:
+                self._log_tail.append(text)
+                logger.info('[worker] %s', text)
+
+    def _send(self, command: str) -> None:
+        process = self._process
+        if process is None or process.stdin is None or process.stdin.is_closing():
+            return
+        try:
+            process.stdin.write(command.encode('ascii') + b'\n')
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def touch(self) -> None:
+        """Сообщить процессу о нажатии клавиши (не чаще TOUCH_INTERVAL)"""
+        now = time.monotonic()
+        if now - self._last_touch >= self.TOUCH_INTERVAL:
+            self._last_touch = now
+            self._send('touch')
+
+    def cancel(self) -> None:
+        """Отменить индексацию: процесс дописывает батч, сохраняет состояние и завершается"""
+        self._send('cancel')
+
+    async def stop(self, timeout: Optional[float] = None) -> None:
+        """
+        Отменить индексацию и дождаться выхода процесса
+
+        Новый проход по тому же хранилищу можно начинать только после этого:
+        иначе в .seditor/ пишут два процесса. Если процесс не вышел за timeout,
+        он завершается принудительно (прерванное сохранение откатывается при
+        следующей записи хранилища).
+
+        Args:
+            timeout: Секунды ожидания (по умолчанию STOP_TIMEOUT)
+        """
+        process = self._process
+        if process is None or process.returncode is not None:
+            return
+        self.cancel()
+        timeout = self.STOP_TIMEOUT if timeout is None else timeout
+        try:
+            await asyncio.wait_for(process.wait(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning('Indexing worker (pid %d) did not stop in %.0f s, killing it', process.pid, timeout)
+            try:
+                process.kill()
+            except ProcessLookupError:
+                pass
+            await process.wait()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+"""
+Рабочее пространство из нескольких корней
+
+У каждого корня свой шард индекса (индексатор из реестра со своим
+хранилищем и контрольной точкой), который строится и обновляется
+независимо. Запрос эмбеддится один раз на модель, затем параллельно
+отправляется во все шарды, а отсортированные ответы шардов сливаются
+k-путевым слиянием в общий top-k. Время ответа каждого шарда сохраняется
+и попадает в метрики. Области поиска корней вычисляются при изменении
+корней или реестра, а не при каждом запросе.
+"""
+
+import heapq
+import itertools
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from seditor.search.registry import IndexerRegistry, IndexScope, registry as default_registry
+from seditor.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Дополнительные корни рабочего пространства (через os.pathsep)
+WORKSPACE_ENV = 'SEDITOR_WORKSPACE'
+
+SearchResult = Tuple[str, str, float]
+
+
+class ShardLatency(NamedTuple):
+    """Ответ шарда на последний запрос"""
+
+    root: str  # директория области поиска
+    milliseconds: float
+    results: int
+    error: Optional[str] = None
+
+
+def merge_results(result_lists: Iterable[Sequence[SearchResult]], top_k: int) -> List[SearchResult]:
+    """
+    k-путевое слияние ответов шардов
+
+    Args:
+        result_lists: Ответы шардов, каждый отсортирован по убыванию score
+        top_k: Количество результатов
+
+    Returns:
+        Общий top-k по убыванию score; файл, найденный несколькими шардами, - один раз
+    """
+    merged = []
+    seen = set()
+    for result in heapq.merge(*result_lists, key=lambda item: -item[2]):
+        if result[0] in seen:
+            continue
+        seen.add(result[0])
+        merged.append(result)
+        if len(merged) >= top_k:
+            break
+    return merged
+
+
+class Workspace:
+    """Корни рабочего пространства и поиск по их шардам"""
+
+    # Потоки параллельного поиска по шардам
+    MAX_WORKERS = 8
+
+    def __init__(self, roots: Iterable[str] = (), registry: Optional[IndexerRegistry] = None):
+        """
+        Args:
+            roots: Корни рабочего пространства
+            registry: Реестр индексаторов (по умолчанию общий реестр процесса)
+        """
+        self.registry = registry if registry is not None else default_registry
+        self.roots: List[str] = []
+        # Области поиска корней и поколение реестра, для которого они вычислены
+        self._shards: Optional[List[IndexScope]] = None
+        self._shards_generation = -1
+        for root in roots:
+            self.add_root(root)
+        self.last_latencies: List[ShardLatency] = []
+        # Путь результата -> шард, который его нашёл, и метаданные записи
+        self._owners: Dict[str, Tuple[IndexScope, dict]] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @classmethod
+    def from_env(cls, roots: Iterable[str] = ()) -> 'Workspace':
+        """Рабочее пространство из roots и SEDITOR_WORKSPACE"""
+        env_roots = [root for root in os.environ.get(WORKSPACE_ENV, '').split(os.pathsep) if root]
+        return cls(itertools.chain(roots, env_roots))
+
+    def __len__(self) -> int:
+        return len(self.roots)
+
+    def add_root(self, root: str) -> bool:
+        """
+        Добавить корень
+
+        Returns:
+            True если корень добавлен (False - уже был или это не директория)
+        """
+        root = os.path.abspath(os.path.expanduser(root))
+        if root in self.roots:
+            return False
+        if not os.path.isdir(root):
+            logger.warning('Workspace root is not a directory: %s', root)
+            return False
+        self.roots.append(root)
+        self.invalidate()
+        return True
+
+    def remove_root(self, root: str) -> bool:
+        """
+        Убрать корень
+
+        Returns:
+            True если корень был в рабочем пространстве
+        """
+        root = os.path.abspath(os.path.expanduser(root))
+        if root not in self.roots:
+            return False
+        self.roots.remove(root)
+        self.invalidate()
+        return True
+
+    def invalidate(self) -> None:
+        """Пересчитать области поиска при следующем запросе (например, после индексации)"""
+        self._shards = None
+
+    def shards(self) -> List[IndexScope]:
+        """
+        Области поиска корней (вложенный корень ищет по индексу родителя)
+
+        Поиск покрывающего индекса обходит родительские директории и
+        контрольные точки, поэтому результат кэшируется до изменения корней
+        или набора индексаторов реестра.
+        """
+        shards = self._shards
+        generation = self.registry.generation
+        if shards is None or self._shards_generation != generation:
+            shards = [self.registry.scope_for(root) for root in self.roots]
+            # scope_for мог зарегистрировать индексаторы корней - поколение после него
+            self._shards, self._shards_generation = shards, self.registry.generation
+        return shards
+
+    def search(self, query: str, top_k: int = 10,
+               extra: Sequence[IndexScope] = ()) -> List[SearchResult]:
+        """
+        Параллельный поиск по всем шардам
+
+        Args:
+            query: Текстовый запрос
+            top_k: Количество результатов
+            extra: Дополнительные области (например, индекс текущей директории)
+
+        Returns:
+            Общий top-k (file_path, file_name, score); время шардов - в last_latencies
+        """
+        if not query or not query.strip():
+            return []
+        scopes = []
+        for scope in itertools.chain(extra, self.shards()):
+            if all(scope.indexer is not other.indexer or scope.prefix != other.prefix for other in scopes):
+                scopes.append(scope)
+        if not scopes:
+            return []
+
+        # Одна модель - один эмбеддинг запроса на все её шарды
+        embeddings = {}
+        for scope in scopes:
+            embedder = scope.indexer.embedder
+            if id(embedder) not in embeddings:
+                embeddings[id(embedder)] = scope.indexer.encode_query(query)
+
+        def search_shard(scope: IndexScope):
+            started = time.perf_counter()
+            error = None
+            # Свои метаданные у каждого запроса: шарды одного индексатора ищут параллельно
+            metadata: Dict[str, dict] = {}
+            try:
+                results = scope.indexer.search_vector(embeddings[id(scope.indexer.embedder)],
+                                                      top_k, scope.prefix, metadata=metadata)
+            except Exception as e:
+                logger.error('Shard search failed for %s: %s', scope.directory, e)
+                results, error = [], str(e)
+            elapsed = (time.perf_counter() - started) * 1000
+            metrics.observe('workspace.shard_search', elapsed)
+            return results, metadata, ShardLatency(scope.directory, elapsed, len(results), error)
+
+        if len(scopes) == 1:
+            answers = [search_shard(scopes[0])]
+        else:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.MAX_WORKERS,
+                                                    thread_name_prefix='shard-search')
+            answers = list(self._executor.map(search_shard, scopes))
+
+        self.last_latencies = [latency for _, _, latency in answers]
+        owners = {}
+        for scope, (results, metadata, _) in zip(scopes, answers):
+            for path, _, _ in results:
+                owners.setdefault(path, (scope, metadata.get(path, {})))
+        self._owners = owners
+        return merge_results([results for results, _, _ in answers], top_k)
+
+    def get_snippet(self, file_path: str, max_lines: int = 2) -> Optional[str]:
+        """Фрагмент найденного файла (у шарда, который его нашёл)"""
+        owner = self._owners.get(file_path)
+        if owner is None:
+            return None
+        scope, metadata = owner
+        return scope.indexer.get_snippet(file_path, max_lines=max_lines, metadata=metadata)
+
+    def format_latencies(self) -> str:
+        """Время ответа шардов для заголовка палитры: 'seditor 4 мс, api 7 мс'"""
+        return ', '.join(
+            f'{os.path.basename(latency.root) or latency.root} {latency.milliseconds:.0f} мс'
+            for latency in self.last_latencies
+        )
+
+    def close(self) -> None:
+        """Остановить потоки поиска"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
@@ -3,60 +3,78 @@
 Управление терминалом - получение размеров, очистка, базовая работа с экраном
 """
 
-from blessed import Terminal
+import shutil
+
+from seditor.terminal.screen import DiffRenderer, ESC, Frame, move_to
 
 
 class TerminalManager:
     """Менеджер терминала для управления экраном и базовыми операциями"""
 
+    CLEAR = ESC + '2J'
+    HOME = ESC + 'H'
+    HIDE_CURSOR = ESC + '?25l'
+    SHOW_CURSOR = ESC + '?25h'
+    ENTER_FULLSCREEN = ESC + '?1049h'
+    EXIT_FULLSCREEN = ESC + '?1049l'
+
     def __init__(self):
         """Инициализация терминала"""
-        self.term = Terminal()
-        self.width = self.term.width
-        self.height = self.term.height
+        self.renderer = DiffRenderer()
+        self.width, self.height = self._query_size()
+
+    @staticmethod
+    def _query_size() -> tuple[int, int]:
+        """Запросить текущие размеры терминала"""
+        size = shutil.get_terminal_size()
+        return size.columns, size.lines
 
     def get_size(self) -> tuple[int, int]:
         """Получить размеры терминала (width, height)"""
-        self.width = self.term.width
-        self.height = self.term.height
+        self.width, self.height = self._query_size()
         return self.width, self.height
 
     def clear(self) -> str:
-        """Очистить экран"""
-        return self.term.clear + self.term.home
+        """Очистить экран (следующий кадр будет выведен целиком)"""
+        self.renderer.invalidate()
+        return self.CLEAR + self.HOME
 
     def move_cursor(self, x: int, y: int) -> str:
         """Переместить курсор в позицию (x, y)"""
-        return self.term.move_xy(x, y)
+        return move_to(x, y)
 
     def hide_cursor(self) -> str:
         """Скрыть курсор"""
-        return self.term.hide_cursor
+        return self.HIDE_CURSOR
 
     def show_cursor(self) -> str:
         """Показать курсор"""
-        return self.term.show_cursor
+        return self.SHOW_CURSOR
 
     def enter_fullscreen(self) -> str:
         """Войти в полноэкранный режим"""
-        return self.term.enter_fullscreen
+        self.renderer.invalidate()
+        return self.ENTER_FULLSCREEN
 
     def exit_fullscreen(self) -> str:
         """Выйти из полноэкранного режима"""
-        return self.term.exit_fullscreen
+        return self.EXIT_FULLSCREEN
 
     def print_at(self, x: int, y: int, text: str) -> str:
         """Вывести текст в позиции (x, y)"""
         return self.move_cursor(x, y) + text
 
-    def get_terminal(self) -> Terminal:
-        """Получить объект терминала для расширенного использования"""
-        return self.term
+    def new_frame(self) -> Frame:
+        """Создать пустой кадр размером с терминал"""
+        return Frame(self.width, self.height)
+
+    def get_renderer(self) -> DiffRenderer:
+        """Получить рендерер с диффом кадров"""
+        return self.renderer
 
     def refresh_size(self) -> None:
         """Обновить размеры терминала"""
-        self.width = self.term.width
-        self.height = self.term.height
+        self.width, self.height = self._query_size()
 
     def has_size_changed(self) -> bool:
         """
@@ -65,8 +83,7 @@ class TerminalManager:
         Returns:
             True если размеры изменились, False иначе
         """
-        new_width = self.term.width
-        new_height = self.term.height
+        new_width, new_height = self._query_size()
         if new_width != self.width or new_height != self.height:
             return True
         return False
@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+"""
+Покадровый вывод с диффом: на терминал уходят только изменившиеся ячейки
+"""
+
+from typing import List, Optional, Tuple
+
+from prompt_toolkit.utils import get_cwidth
+
+ESC = '\x1b['
+RESET = ESC + '0m'
+
+# Ячейка экрана: (текст, SGR-параметры). Вторая половина широкого символа
+# хранится как ('', style) и не выводится отдельно.
+Cell = Tuple[str, str]
+BLANK: Cell = (' ', '')
+
+# Разрыв из неизменившихся ячеек короче этого значения дешевле перепечатать,
+# чем переставлять курсор (ESC[строка;колонкаH - до 9 байт)
+MERGE_GAP = 6
+
+
+def sgr_bg_rgb(r: int, g: int, b: int) -> str:
+    """SGR-параметры фона в 24-битном цвете"""
+    return f'48;2;{r};{g};{b}'
+
+
+def sgr_join(*parts: str) -> str:
+    """Объединить SGR-параметры, пропуская пустые"""
+    return ';'.join(part for part in parts if part)
+
+
+SGR_BOLD = '1'
+
+
+def move_to(x: int, y: int) -> str:
+    """Escape-последовательность перемещения курсора в (x, y), счёт с нуля"""
+    return f'{ESC}{y + 1};{x + 1}H'
+
+
+class Frame:
+    """Кадр: прямоугольная сетка ячеек"""
+
+    def __init__(self, width: int, height: int):
+        """
+        Args:
+            width: Ширина в колонках
+            height: Высота в строках
+        """
+        self.width = max(0, width)
+        self.height = max(0, height)
+        self.rows: List[List[Cell]] = [[BLANK] * self.width for _ in range(self.height)]
+
+    def put(self, x: int, y: int, text: str, style: str = '') -> int:
+        """
+        Записать текст в строку y начиная с колонки x (с обрезкой по краю)
+
+        Args:
+            x: Колонка
+            y: Строка
+            text: Текст (широкие символы занимают две ячейки)
+            style: SGR-параметры
+
+        Returns:
+            Колонка после последнего записанного символа
+        """
+        if not 0 <= y < self.height:
+            return x
+        row = self.rows[y]
+        for char in text:
+            width = get_cwidth(char)
+            if width == 0:
+                # Комбинируемый символ / вариационный селектор - к предыдущей ячейке
+                if 0 < x <= self.width:
+                    prev = x - 1
+                    while prev > 0 and row[prev][0] == '':
+                        prev -= 1
+                    row[prev] = (row[prev][0] + char, row[prev][1])
+                continue
+            if x < 0 or x + width > self.width:
+                break
+            row[x] = (char, style)
+            if width == 2:
+                row[x + 1] = ('', style)
+            x += width
+        return x
+
+    def fill(self, x: int, y: int, width: int, style: str = '', char: str = ' ') -> None:
+        """
+        Заполнить участок строки одним символом
+
+        Args:
+            x: Начальная колонка
+            y: Строка
+            width: Количество ячеек
+            style: SGR-параметры
+            char: Символ заполнения
+        """
+        if not 0 <= y < self.height:
+            return
+        start = max(0, x)
+        end = min(self.width, x + width)
+        row = self.rows[y]
+        for col in range(start, end):
+            row[col] = (char, style)
+
+
+class DiffRenderer:
+    """
+    Рендерер, помнящий предыдущий кадр.
+
+    Для каждой строки находит изменившиеся ячейки, объединяет их в серии
+    (с поглощением коротких неизменённых промежутков) и выводит только эти
+    серии: перемещение курсора + смены SGR + текст.
+    """
+
+    def __init__(self):
+        self._previous: Optional[Frame] = None
+        self.bytes_written = 0
+        self.frames_rendered = 0
+
+    def invalidate(self) -> None:
+        """Забыть предыдущий кадр: следующий будет выведен целиком"""
+        self._previous = None
+
+    def render(self, frame: Frame) -> str:
+        """
+        Получить ANSI-вывод для перехода от предыдущего кадра к новому
+
+        Args:
+            frame: Новый кадр
+
+        Returns:
+            Строка для записи в терминал (пустая, если ничего не изменилось)
+        """
+        previous = self._previous
+        if previous is None or previous.width != frame.width or previous.height != frame.height:
+            previous = None
+
+        output: List[str] = []
+        current_style: Optional[str] = None
+
+        for y, row in enumerate(frame.rows):
+            old_row = previous.rows[y] if previous is not None else None
+            for start, end in self._changed_runs(row, old_row):
+                output.append(move_to(start, y))
+                for x in range(start, end):
+                    char, style = row[x]
+                    if char == '':
+                        continue
+                    if style != current_style:
+                        output.append(ESC + sgr_join('0', style) + 'm')
+                        current_style = style
+                    output.append(char)
+
+        if current_style is not None:
+            output.append(RESET)
+
+        self._previous = frame
+        self.frames_rendered += 1
+        result = ''.join(output)
+        self.bytes_written += len(result.encode('utf-8'))
+        return result
+
+    @staticmethod
+    def _changed_runs(row: List[Cell], old_row: Optional[List[Cell]]) -> List[Tuple[int, int]]:
+        """
+        Найти серии изменившихся ячеек строки
+
+        Args:
+            row: Новая строка
+            old_row: Предыдущая строка (None - вся строка считается изменённой)
+
+        Returns:
+            Список полуинтервалов [start, end)
+        """
+        width = len(row)
+        if old_row is None:
+            return [(0, width)] if width else []
+
+        runs: List[Tuple[int, int]] = []
+        x = 0
+        while x < width:
+            if row[x] == old_row[x]:
+                x += 1
+                continue
+            start = x
+            # Серия не может начинаться со второй половины широкого символа
+            while start > 0 and row[start][0] == '':
+                start -= 1
+            end = x + 1
+            gap = 0
+            x += 1
+            while x < width:
+                if row[x] == old_row[x]:
+                    gap += 1
+                    if gap >= MERGE_GAP:
+                        break
+                else:
+                    gap = 0
+                    end = x + 1
+                x += 1
+            # Широкий символ выводится целиком
+            while end < width and row[end][0] == '':
+                end += 1
+            if runs and start <= runs[-1][1]:
+                runs[-1] = (runs[-1][0], max(end, runs[-1][1]))
+            else:
+                runs.append((start, end))
+            x = end
+        return runs
@@ -5,15 +5,18 @@
 
 import os
 from pathlib import Path
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 
+from seditor.utils.ignore import IgnoreMatcher
 
-def scan_directory(directory: str) -> List[Tuple[str, bool, str]]:
+
+def scan_directory(directory: str, ignore: Optional[IgnoreMatcher] = None) -> List[Tuple[str, bool, str]]:
     """
     Сканировать директорию и получить список файлов и директорий
 
     Args:
         directory: Путь к директории для сканирования
+        ignore: Правила исключения (.gitignore и др.); None - не применять
 
     Returns:
         Список кортежей (имя, is_directory, полный_путь)
@@ -28,6 +31,11 @@ def scan_directory(directory: str) -> List[Tuple[str, bool, str]]:
             full_path = os.path.join(directory, item)
             is_dir = os.path.isdir(full_path)
 
+            if ignore is not None:
+                rel_path = ignore.relative(full_path)
+                if rel_path and ignore.is_ignored_entry(rel_path, is_dir):
+                    continue
+
             items.append((item, is_dir, full_path))
     except PermissionError:
         # Нет прав для чтения директории
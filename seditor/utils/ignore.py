@@ -0,0 +1,405 @@
+# -*- coding: utf-8 -*-
+"""
+Сопоставление путей с правилами .gitignore
+
+Поддерживаются вложенные .gitignore, .git/info/exclude и проектный
+.seditorignore (с тем же синтаксисом и наивысшим приоритетом). Шаблоны
+компилируются в регулярные выражения один раз при чтении файла; файл без
+отрицаний (!) проверяется одним объединённым выражением. Общий матчер корня
+перечитывает правила, если при повторном запросе изменился один из файлов;
+проверка делается не чаще раза в IgnoreMatcher.REFRESH_INTERVAL.
+"""
+
+import os
+import re
+import threading
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Проектный файл исключений seditor
+SEDITORIGNORE = '.seditorignore'
+
+# Встроенные правила с наименьшим приоритетом
+DEFAULT_PATTERNS = ('.git/',)
+
+
+def translate_pattern(pattern: str) -> Optional[Tuple[str, bool, bool]]:
+    """
+    Перевести строку .gitignore в регулярное выражение
+
+    Выражение сопоставляется с путём относительно директории файла правил
+    (разделитель '/').
+
+    Args:
+        pattern: Строка файла правил
+
+    Returns:
+        (регулярное выражение, отрицание, только для директорий) или None для
+        пустых строк и комментариев
+    """
+    # Хвостовые пробелы игнорируются, если не экранированы
+    line = pattern.rstrip('\n').rstrip('\r')
+    while line.endswith(' ') and not line.endswith('\\ '):
+        line = line[:-1]
+    if not line or line.startswith('#'):
+        return None
+
+    negated = line.startswith('!')
+    if negated:
+        line = line[1:]
+    elif line.startswith('\\!') or line.startswith('\\#'):
+        line = line[1:]
+
+    dir_only = line.endswith('/')
+    line = line.rstrip('/')
+    if not line:
+        return None
+
+    # Шаблон со слешем в начале или середине привязан к директории файла правил
+    anchored = '/' in line
+    line = line.lstrip('/')
+
+    regex = []
+    i = 0
+    length = len(line)
+    while i < length:
+        char = line[i]
+        if line.startswith('**/', i) and (i == 0 or line[i - 1] == '/'):
+            regex.append('(?:.*/)?')
+            i += 3
+        elif line.startswith('**', i) and i + 2 == length and (i == 0 or line[i - 1] == '/'):
+            regex.append('.*')
+            i += 2
+        elif char == '*':
+            regex.append('[^/]*')
+            i += 1
+        elif char == '?':
+            regex.append('[^/]')
+            i += 1
+        elif char == '[':
+            end = line.find(']', i + 2 if line.startswith('[!', i) or line.startswith('[^', i) else i + 1)
+            if end == -1:
+                regex.append(re.escape(char))
+                i += 1
+                continue
+            body = line[i + 1:end]
+            if body.startswith('!'):
+                body = '^' + body[1:]
+            regex.append('[' + body.replace('\\', '\\\\') + ']')
+            i = end + 1
+        elif char == '\\' and i + 1 < length:
+            regex.append(re.escape(line[i + 1]))
+            i += 2
+        else:
+            regex.append(re.escape(char))
+            i += 1
+
+    prefix = '' if anchored else '(?:.*/)?'
+    return prefix + ''.join(regex), negated, dir_only
+
+
+class IgnoreFile:
+    """Скомпилированные правила одного файла"""
+
+    def __init__(self, patterns: List[str], base: str = ''):
+        """
+        Args:
+            patterns: Строки файла правил
+            base: Директория файла относительно корня ('' - корень)
+        """
+        self.base = base
+        self.rules: List[Tuple['re.Pattern', bool, bool]] = []
+        for pattern in patterns:
+            translated = translate_pattern(pattern)
+            if translated is not None:
+                regex, negated, dir_only = translated
+                self.rules.append((re.compile(regex + r'\Z', re.DOTALL), negated, dir_only))
+
+        # Без отрицаний порядок правил не важен: одно выражение на всё
+        self._combined_any: Optional['re.Pattern'] = None
+        self._combined_dirs: Optional['re.Pattern'] = None
+        if not any(negated for _, negated, _ in self.rules):
+            files = [rule.pattern for rule, _, dir_only in self.rules if not dir_only]
+            dirs = [rule.pattern for rule, _, dir_only in self.rules if dir_only]
+            if files:
+                self._combined_any = re.compile('|'.join(f'(?:{p})' for p in files), re.DOTALL)
+            if dirs:
+                self._combined_dirs = re.compile('|'.join(f'(?:{p})' for p in dirs), re.DOTALL)
+        self._has_negation = self._combined_any is None and self._combined_dirs is None and bool(self.rules)
+
+    def __bool__(self) -> bool:
+        return bool(self.rules)
+
+    def match(self, rel_path: str, is_dir: bool) -> Optional[bool]:
+        """
+        Проверить путь по правилам файла
+
+        Args:
+            rel_path: Путь относительно корня (разделитель '/')
+            is_dir: Является ли путь директорией
+
+        Returns:
+            True - игнорировать, False - явно включён (!), None - правила не сработали
+        """
+        if self.base:
+            if not rel_path.startswith(self.base + '/'):
+                return None
+            rel_path = rel_path[len(self.base) + 1:]
+
+        if not self._has_negation:
+            if self._combined_any is not None and self._combined_any.match(rel_path):
+                return True
+            if is_dir and self._combined_dirs is not None and self._combined_dirs.match(rel_path):
+                return True
+            return None
+
+        # Побеждает последнее сработавшее правило
+        for rule, negated, dir_only in reversed(self.rules):
+            if dir_only and not is_dir:
+                continue
+            if rule.match(rel_path):
+                return not negated
+        return None
+
+
+def _file_stamp(path: str) -> Optional[Tuple[int, int]]:
+    """(mtime_ns, размер) файла правил или None, если файла нет"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _read_patterns(path: str) -> List[str]:
+    try:
+        with open(path, encoding='utf-8', errors='replace') as f:
+            return f.readlines()
+    except OSError:
+        return []
+
+
+def find_repository_root(path: str) -> Optional[str]:
+    """
+    Найти корень git-репозитория, содержащий путь
+
+    Args:
+        path: Файл или директория
+
+    Returns:
+        Директория с .git или None
+    """
+    current = os.path.abspath(path)
+    while True:
+        if os.path.exists(os.path.join(current, '.git')):
+            return current
+        parent = os.path.dirname(current)
+        if parent == current:
+            return None
+        current = parent
+
+
+class IgnoreMatcher:
+    """
+    Правила исключения для дерева директорий
+
+    Приоритет (от высшего): .seditorignore, .gitignore от самой глубокой
+    директории к корню, .git/info/exclude, встроенные правила. Если
+    директория исключена, исключено и всё её содержимое.
+    """
+
+    # Отметки файлов правил проверяются не чаще, чем раз в интервал:
+    # get_ignore_matcher() вызывается при каждом переходе по дереву файлов
+    REFRESH_INTERVAL = 2.0  # seconds
+
+    def __init__(self, root: str, default_patterns=DEFAULT_PATTERNS):
+        """
+        Args:
+            root: Корень (обычно корень git-репозитория)
+            default_patterns: Встроенные правила с наименьшим приоритетом
+        """
+        self.root = os.path.abspath(root)
+        self._defaults = IgnoreFile(list(default_patterns))
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self) -> None:
+        """Прочитать правила корня; .gitignore директорий читаются лениво"""
+        # Отметки для refresh(): существующие файлы правил и директории, где
+        # файла правил нет (его появление меняет mtime директории)
+        self._stamps: Dict[str, Optional[Tuple[int, int]]] = {}
+        self._checked = time.monotonic()
+        self._gitignores: Dict[str, IgnoreFile] = {}
+        self._project = self._read(os.path.join(self.root, SEDITORIGNORE))
+        self._exclude = self._read(os.path.join(self.root, '.git', 'info', 'exclude'))
+
+    def _read(self, path: str, base: str = '') -> IgnoreFile:
+        """Прочитать файл правил и запомнить его отметку (или отметку директории, если файла нет)"""
+        stamp = _file_stamp(path)
+        if stamp is None:
+            path = os.path.dirname(path)
+            stamp = _file_stamp(path)
+            rules = IgnoreFile([], base=base)
+        else:
+            rules = IgnoreFile(_read_patterns(path), base=base)
+        with self._lock:
+            self._stamps[path] = stamp
+        return rules
+
+    def refresh(self) -> bool:
+        """
+        Перечитать правила, если файлы правил изменились, появились или удалены
+
+        С прошлой проверки должно пройти не меньше REFRESH_INTERVAL.
+
+        Returns:
+            True если правила перечитаны
+        """
+        now = time.monotonic()
+        with self._lock:
+            if now - self._checked < self.REFRESH_INTERVAL:
+                return False
+            self._checked = now
+            stamps = list(self._stamps.items())
+        if all(_file_stamp(path) == stamp for path, stamp in stamps):
+            return False
+        self._load()
+        return True
+
+    @property
+    def has_project_rules(self) -> bool:
+        """Есть ли правила в .seditorignore"""
+        return bool(self._project)
+
+    def relative(self, path: str) -> Optional[str]:
+        """
+        Путь относительно корня с разделителем '/'
+
+        Returns:
+            Относительный путь, '' для корня, None если путь вне корня
+        """
+        path = os.path.abspath(path)
+        if path == self.root:
+            return ''
+        if not path.startswith(self.root + os.sep):
+            return None
+        rel_path = path[len(self.root) + 1:]
+        return rel_path.replace(os.sep, '/') if os.sep != '/' else rel_path
+
+    def _gitignore(self, rel_dir: str) -> IgnoreFile:
+        """Правила .gitignore директории (читаются один раз до изменения файла, см. refresh)"""
+        gitignores = self._gitignores
+        rules = gitignores.get(rel_dir)
+        if rules is None:
+            directory = os.path.join(self.root, rel_dir) if rel_dir else self.root
+            rules = self._read(os.path.join(directory, '.gitignore'), base=rel_dir)
+            with self._lock:
+                gitignores[rel_dir] = rules
+        return rules
+
+    def _match_own(self, rel_path: str, is_dir: bool) -> bool:
+        """Проверить путь без учёта исключённых родителей"""
+        result = self._project.match(rel_path, is_dir)
+        if result is not None:
+            return result
+
+        # .gitignore от ближайшей директории к корню
+        rel_dir = rel_path.rpartition('/')[0]
+        while True:
+            rules = self._gitignore(rel_dir)
+            if rules:
+                result = rules.match(rel_path, is_dir)
+                if result is not None:
+                    return result
+            if not rel_dir:
+                break
+            rel_dir = rel_dir.rpartition('/')[0]
+
+        for rules in (self._exclude, self._defaults):
+            result = rules.match(rel_path, is_dir)
+            if result is not None:
+                return result
+        return False
+
+    def is_ignored(self, path: str, is_dir: Optional[bool] = None) -> bool:
+        """
+        Исключён ли путь (с учётом исключённых родительских директорий)
+
+        Args:
+            path: Абсолютный путь
+            is_dir: Директория ли это (None - определить по файловой системе)
+
+        Returns:
+            True если путь исключён; пути вне корня не исключаются
+        """
+        rel_path = self.relative(path)
+        if not rel_path:
+            return False
+        if is_dir is None:
+            is_dir = os.path.isdir(path)
+        parts = rel_path.split('/')
+        for depth in range(1, len(parts)):
+            if self._match_own('/'.join(parts[:depth]), True):
+                return True
+        return self._match_own(rel_path, is_dir)
+
+    def is_ignored_entry(self, rel_path: str, is_dir: bool) -> bool:
+        """
+        Исключён ли элемент при обходе сверху вниз
+
+        Родительские директории уже проверены обходом, поэтому проверяются
+        только правила для самого пути.
+
+        Args:
+            rel_path: Путь относительно корня (разделитель '/')
+            is_dir: Директория ли это
+        """
+        return self._match_own(rel_path, is_dir)
+
+    def walk(self, top: Optional[str] = None) -> Iterator[Tuple[str, List[str], List[str]]]:
+        """
+        Аналог os.walk, не заходящий в исключённые директории
+
+        Сама начальная директория не проверяется: её выбрали явно.
+
+        Args:
+            top: Начальная директория внутри корня (по умолчанию корень)
+
+        Yields:
+            (путь директории, неисключённые поддиректории, неисключённые файлы)
+        """
+        top = os.path.abspath(top or self.root)
+        for dirpath, dirnames, filenames in os.walk(top):
+            rel_dir = self.relative(dirpath)
+            prefix = rel_dir + '/' if rel_dir else ''
+            dirnames[:] = [d for d in dirnames if not self._match_own(prefix + d, True)]
+            yield dirpath, dirnames, [f for f in filenames if not self._match_own(prefix + f, False)]
+
+
+_matchers: Dict[str, IgnoreMatcher] = {}
+_matchers_lock = threading.Lock()
+
+
+def get_ignore_matcher(path: str) -> IgnoreMatcher:
+    """
+    Общий для процесса матчер для пути
+
+    Корнем считается git-репозиторий, содержащий путь, иначе сам путь.
+    Правила перечитываются, если файлы правил изменились с прошлого запроса
+    (проверка не чаще раза в IgnoreMatcher.REFRESH_INTERVAL).
+
+    Args:
+        path: Директория проекта
+
+    Returns:
+        IgnoreMatcher (один на корень)
+    """
+    root = find_repository_root(path) or os.path.abspath(path)
+    with _matchers_lock:
+        matcher = _matchers.get(root)
+        if matcher is None:
+            matcher = IgnoreMatcher(root)
+            _matchers[root] = matcher
+            return matcher
+    matcher.refresh()
+    return matcher
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+Настройка логирования: асинхронная запись через очередь с ротацией файла
+"""
+
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+from typing import Optional, Union
+
+# Переменные окружения для настройки без флагов командной строки
+LOG_LEVEL_ENV = 'SEDITOR_LOG_LEVEL'
+LOG_FILE_ENV = 'SEDITOR_LOG_FILE'
+
+DEFAULT_LEVEL = 'INFO'
+DEFAULT_MAX_BYTES = 5 * 1024 * 1024  # 5MB
+DEFAULT_BACKUP_COUNT = 3
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional[logging.handlers.QueueHandler] = None
+
+
+def default_log_file() -> str:
+    """
+    Путь к файлу лога по умолчанию
+
+    Returns:
+        $XDG_STATE_HOME/seditor/seditor.log (по умолчанию ~/.local/state/seditor/seditor.log)
+    """
+    state_home = os.environ.get('XDG_STATE_HOME') or os.path.join(
+        os.path.expanduser('~'), '.local', 'state'
+    )
+    return os.path.join(state_home, 'seditor', 'seditor.log')
+
+
+def _resolve_level(level: Union[str, int, None]) -> int:
+    """Преобразовать уровень из строки/числа/окружения в числовой уровень logging"""
+    if level is None:
+        level = os.environ.get(LOG_LEVEL_ENV, DEFAULT_LEVEL)
+    if isinstance(level, int):
+        return level
+    resolved = logging.getLevelName(str(level).upper())
+    if not isinstance(resolved, int):
+        raise ValueError(f'Неизвестный уровень логирования: {level}')
+    return resolved
+
+
+def setup_logging(
+    level: Union[str, int, None] = None,
+    log_file: Optional[str] = None,
+    max_bytes: int = DEFAULT_MAX_BYTES,
+    backup_count: int = DEFAULT_BACKUP_COUNT,
+) -> str:
+    """
+    Настроить логирование приложения.
+
+    Корневой логгер получает только QueueHandler: вызовы logger.* из UI-потока
+    и потока индексации лишь кладут запись в очередь, а форматирование и
+    запись в файл с ротацией по размеру выполняет фоновый QueueListener.
+
+    Args:
+        level: Уровень ('DEBUG', 'INFO', ...); по умолчанию из SEDITOR_LOG_LEVEL или INFO
+        log_file: Путь к файлу лога; по умолчанию из SEDITOR_LOG_FILE или default_log_file()
+        max_bytes: Размер файла, после которого выполняется ротация
+        backup_count: Количество хранимых архивных файлов
+
+    Returns:
+        Путь к используемому файлу лога
+    """
+    global _listener, _queue_handler
+
+    shutdown_logging()
+
+    numeric_level = _resolve_level(level)
+    log_file = os.path.abspath(
+        os.path.expanduser(log_file or os.environ.get(LOG_FILE_ENV) or default_log_file())
+    )
+    os.makedirs(os.path.dirname(log_file), exist_ok=True)
+
+    file_handler = logging.handlers.RotatingFileHandler(
+        log_file,
+        maxBytes=max_bytes,
+        backupCount=backup_count,
+        encoding='utf-8',
+        delay=True,
+    )
+    file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    _queue_handler = logging.handlers.QueueHandler(log_queue)
+    _listener = logging.handlers.QueueListener(log_queue, file_handler, respect_handler_level=True)
+
+    root = logging.getLogger()
+    root.addHandler(_queue_handler)
+    root.setLevel(numeric_level)
+    _listener.start()
+
+    return log_file
+
+
+def shutdown_logging() -> None:
+    """Остановить фоновую запись и дописать оставшиеся записи из очереди"""
+    global _listener, _queue_handler
+
+    if _queue_handler is not None:
+        logging.getLogger().removeHandler(_queue_handler)
+        _queue_handler = None
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+atexit.register(shutdown_logging)
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""
+Учёт памяти по подсистемам и лимиты для долгих сессий
+"""
+
+import os
+import sys
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+# Переменные окружения с лимитами
+MODEL_IDLE_ENV = 'SEDITOR_MODEL_IDLE_MINUTES'
+TREE_IDLE_ENV = 'SEDITOR_TREE_IDLE_MINUTES'
+TREE_MAX_NODES_ENV = 'SEDITOR_TREE_MAX_NODES'
+
+
+def format_bytes(size: float) -> str:
+    """
+    Человекочитаемый размер
+
+    Args:
+        size: Размер в байтах
+
+    Returns:
+        Строка вида '512 Б', '1.5 КБ', '87.3 МБ'
+    """
+    for unit in ('Б', 'КБ', 'МБ'):
+        if size < 1024:
+            return f'{size:.0f} {unit}' if unit == 'Б' else f'{size:.1f} {unit}'
+        size /= 1024
+    return f'{size:.1f} ГБ'
+
+
+def process_rss() -> Optional[int]:
+    """
+    Текущий резидентный объём памяти процесса
+
+    Returns:
+        Байты или None, если определить не удалось
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # На macOS ru_maxrss в байтах, в Linux - в килобайтах
+        return peak if sys.platform == 'darwin' else peak * 1024
+    except (ImportError, OSError):
+        return None
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+class MemoryLimits(NamedTuple):
+    """Лимиты памяти (0 отключает соответствующий лимит)"""
+
+    # Через сколько секунд простоя выгружать модель эмбеддингов
+    model_idle_seconds: float = 10 * 60
+    # Через сколько секунд забывать содержимое свёрнутых директорий
+    tree_idle_seconds: float = 5 * 60
+    # Максимум узлов дерева, после которого свёрнутые поддеревья забываются досрочно
+    tree_max_nodes: int = 20000
+
+    @classmethod
+    def from_env(cls) -> 'MemoryLimits':
+        """Лимиты из переменных окружения (минуты и количество узлов)"""
+        defaults = cls()
+        return cls(
+            model_idle_seconds=_env_float(MODEL_IDLE_ENV, defaults.model_idle_seconds / 60) * 60,
+            tree_idle_seconds=_env_float(TREE_IDLE_ENV, defaults.tree_idle_seconds / 60) * 60,
+            tree_max_nodes=int(_env_float(TREE_MAX_NODES_ENV, defaults.tree_max_nodes)),
+        )
+
+
+class MemoryAccountant:
+    """
+    Реестр оценщиков памяти подсистем.
+
+    Оценки приблизительные (размеры объектов Python и тензоров), их задача -
+    показать, какая подсистема растёт, а не совпасть с RSS до байта.
+    """
+
+    def __init__(self):
+        self._estimators: Dict[str, Callable[[], int]] = {}
+
+    def register(self, name: str, estimator: Callable[[], int]) -> None:
+        """
+        Зарегистрировать оценщик подсистемы
+
+        Args:
+            name: Имя подсистемы для отчёта
+            estimator: Функция без аргументов, возвращающая байты
+        """
+        self._estimators[name] = estimator
+
+    def usage(self) -> Dict[str, int]:
+        """
+        Оценка памяти по подсистемам
+
+        Returns:
+            Словарь имя -> байты (ошибки оценщиков дают 0)
+        """
+        result = {}
+        for name, estimator in self._estimators.items():
+            try:
+                result[name] = int(estimator())
+            except Exception:
+                result[name] = 0
+        return result
+
+    def format_report(self) -> str:
+        """Однострочный отчёт для строки статуса"""
+        parts: List[str] = []
+        rss = process_rss()
+        if rss is not None:
+            parts.append(f'RSS {format_bytes(rss)}')
+        parts.extend(f'{name} {format_bytes(size)}' for name, size in self.usage().items())
+        return 'Память: ' + ' | '.join(parts)
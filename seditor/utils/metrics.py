@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+"""
+Лёгкий реестр метрик: счётчики и гистограммы времени выполнения
+"""
+
+import functools
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Deque, Dict, Iterator, Optional
+
+
+class Counter:
+    """Монотонный счётчик"""
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount: int = 1) -> None:
+        """Увеличить счётчик"""
+        self.value += amount
+
+
+class Histogram:
+    """
+    Гистограмма значений (в миллисекундах).
+
+    Хранит последние MAX_SAMPLES замеров для перцентилей и общие count/total
+    за всё время, поэтому память ограничена на длинных сессиях.
+    """
+
+    MAX_SAMPLES = 2048
+
+    def __init__(self):
+        self._samples: Deque[float] = deque(maxlen=self.MAX_SAMPLES)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        """Добавить замер"""
+        self._samples.append(value)
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, percent: float) -> float:
+        """
+        Перцентиль по последним замерам
+
+        Args:
+            percent: Перцентиль (0-100)
+
+        Returns:
+            Значение перцентиля или 0.0 если замеров нет
+        """
+        samples = sorted(self._samples)
+        if not samples:
+            return 0.0
+        index = min(len(samples) - 1, int(round(percent / 100.0 * (len(samples) - 1))))
+        return samples[index]
+
+    def summary(self) -> Dict[str, float]:
+        """Сводка: count, mean, p50, p99, max"""
+        return {
+            'count': self.count,
+            'mean': self.total / self.count if self.count else 0.0,
+            'p50': self.percentile(50),
+            'p99': self.percentile(99),
+            'max': self.max,
+        }
+
+
+class MetricsRegistry:
+    """Реестр именованных счётчиков и гистограмм"""
+
+    def __init__(self, enabled: bool = True):
+        """
+        Args:
+            enabled: Собирать ли метрики (выключенный реестр почти ничего не стоит)
+        """
+        self.enabled = enabled
+        self._counters: Dict[str, Counter] = {}
+        self._histograms: Dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str) -> Counter:
+        """Получить (или создать) счётчик"""
+        counter = self._counters.get(name)
+        if counter is None:
+            with self._lock:
+                counter = self._counters.setdefault(name, Counter())
+        return counter
+
+    def histogram(self, name: str) -> Histogram:
+        """Получить (или создать) гистограмму"""
+        histogram = self._histograms.get(name)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(name, Histogram())
+        return histogram
+
+    def observe(self, name: str, value_ms: float) -> None:
+        """Записать замер в гистограмму"""
+        if self.enabled:
+            self.histogram(name).observe(value_ms)
+
+    def inc(self, name: str, amount: int = 1) -> None:
+        """Увеличить счётчик"""
+        if self.enabled:
+            self.counter(name).inc(amount)
+
+    @contextmanager
+    def timer(self, name: str) -> Iterator[None]:
+        """
+        Замерить время выполнения блока
+
+        Args:
+            name: Имя гистограммы
+        """
+        if not self.enabled:
+            yield
+            return
+        began = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.histogram(name).observe((time.perf_counter() - began) * 1000)
+
+    def timed(self, name: str) -> Callable[[Callable], Callable]:
+        """
+        Декоратор замера времени выполнения функции
+
+        Args:
+            name: Имя гистограммы
+        """
+        def decorator(func: Callable) -> Callable:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                began = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.histogram(name).observe((time.perf_counter() - began) * 1000)
+            return wrapper
+        return decorator
+
+    def snapshot(self) -> Dict[str, dict]:
+        """
+        Снимок всех метрик
+
+        Returns:
+            {'counters': {имя: значение}, 'histograms': {имя: сводка}}
+        """
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = dict(self._histograms)
+        return {
+            'counters': {name: c.value for name, c in sorted(counters.items())},
+            'histograms': {name: h.summary() for name, h in sorted(histograms.items())},
+        }
+
+    def dump_json(self, path: str, extra: Optional[dict] = None) -> None:
+        """
+        Сохранить снимок метрик в JSON
+
+        Args:
+            path: Путь к файлу
+            extra: Дополнительные поля верхнего уровня
+        """
+        data = dict(extra or {})
+        data.update(self.snapshot())
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+
+    def reset(self) -> None:
+        """Сбросить все метрики"""
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+
+# Общий реестр процесса
+metrics = MetricsRegistry()
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""
+Сэмплирующий профилировщик работающего редактора
+
+Фоновый поток с заданным интервалом снимает стеки всех потоков
+(sys._current_frames), включая поток индексации, и считает одинаковые стеки.
+Результат сохраняется в формате collapsed stacks (по строке на стек:
+"поток;модуль:функция;... количество"), который понимают flamegraph.pl,
+speedscope и inferno.
+"""
+
+import logging
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class SamplingProfiler:
+    """Профилировщик, снимающий стеки потоков по таймеру"""
+
+    # Интервал сэмплирования по умолчанию (секунды)
+    DEFAULT_INTERVAL = 0.005
+    # Ограничение глубины стека (защита от глубокой рекурсии)
+    MAX_DEPTH = 128
+
+    def __init__(self, interval: float = DEFAULT_INTERVAL):
+        """
+        Args:
+            interval: Интервал между сэмплами в секундах
+        """
+        self.interval = interval
+        self._stacks: Dict[str, int] = {}
+        self._samples = 0
+        self._started_at: Optional[float] = None
+        self._duration = 0.0
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def is_running(self) -> bool:
+        """Идёт ли сейчас сбор сэмплов"""
+        return self._thread is not None
+
+    @property
+    def samples(self) -> int:
+        """Количество снятых сэмплов"""
+        return self._samples
+
+    @property
+    def duration(self) -> float:
+        """Длительность последнего (или текущего) сеанса в секундах"""
+        if self._started_at is not None:
+            return time.monotonic() - self._started_at
+        return self._duration
+
+    def start(self) -> None:
+        """Начать сбор сэмплов (предыдущие результаты сбрасываются)"""
+        if self.is_running:
+            return
+        self._stacks = {}
+        self._samples = 0
+        self._stop_event.clear()
+        self._started_at = time.monotonic()
+        self._thread = threading.Thread(target=self._run, name='seditor-profiler', daemon=True)
+        self._thread.start()
+        logger.info('Sampling profiler started (interval %.1f ms)', self.interval * 1000)
+
+    def stop(self) -> None:
+        """Остановить сбор сэмплов"""
+        if not self.is_running:
+            return
+        self._stop_event.set()
+        self._thread.join()
+        self._thread = None
+        self._duration = time.monotonic() - self._started_at
+        self._started_at = None
+        logger.info('Sampling profiler stopped: %d samples in %.1fs', self._samples, self._duration)
+
+    def _run(self) -> None:
+        own_ident = threading.get_ident()
+        while not self._stop_event.wait(self.interval):
+            self.sample(skip_ident=own_ident)
+
+    def sample(self, skip_ident: Optional[int] = None) -> None:
+        """
+        Снять один сэмпл стеков всех потоков
+
+        Args:
+            skip_ident: Идентификатор потока, который не нужно учитывать
+        """
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == skip_ident:
+                continue
+            stack = self._collapse(names.get(ident, f'thread-{ident}'), frame)
+            self._stacks[stack] = self._stacks.get(stack, 0) + 1
+        self._samples += 1
+
+    def _collapse(self, thread_name: str, frame) -> str:
+        """Свернуть стек в строку "поток;корень;...;лист" """
+        parts = []
+        while frame is not None and len(parts) < self.MAX_DEPTH:
+            code = frame.f_code
+            module = frame.f_globals.get('__name__') or os.path.basename(code.co_filename)
+            parts.append(f'{module}:{code.co_name}')
+            frame = frame.f_back
+        parts.append(thread_name.replace(';', ':').replace(' ', '_'))
+        parts.reverse()
+        return ';'.join(parts)
+
+    def collapsed(self) -> str:
+        """
+        Результаты в формате collapsed stacks
+
+        Returns:
+            Строки "стек количество", самые частые стеки первыми
+        """
+        items = sorted(self._stacks.items(), key=lambda item: (-item[1], item[0]))
+        return ''.join(f'{stack} {count}\n' for stack, count in items)
+
+    def write(self, directory: str) -> str:
+        """
+        Сохранить результаты в файл profile-<дата>-<время>.collapsed
+
+        Args:
+            directory: Директория для профилей (создаётся при необходимости)
+
+        Returns:
+            Путь к сохранённому файлу
+        """
+        os.makedirs(directory, exist_ok=True)
+        filename = f"profile-{datetime.now().strftime('%Y%m%d-%H%M%S')}.collapsed"
+        path = os.path.join(directory, filename)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(self.collapsed())
+        return path
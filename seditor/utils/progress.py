@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+"""
+Агрегированная передача прогресса фоновых задач в цикл событий UI
+"""
+
+import threading
+import time
+from typing import Callable, NamedTuple, Optional
+
+
+def format_duration(seconds: float) -> str:
+    """
+    Отформатировать длительность для статус-бара
+
+    Args:
+        seconds: Длительность в секундах
+
+    Returns:
+        Строка вида '42 с', '3 мин 05 с' или '1 ч 12 мин'
+    """
+    seconds = max(0, int(round(seconds)))
+    if seconds < 60:
+        return f'{seconds} с'
+    minutes, seconds = divmod(seconds, 60)
+    if minutes < 60:
+        return f'{minutes} мин {seconds:02d} с'
+    hours, minutes = divmod(minutes, 60)
+    return f'{hours} ч {minutes:02d} мин'
+
+
+class ProgressSnapshot(NamedTuple):
+    """Состояние прогресса на момент доставки в UI"""
+    current: int
+    total: int
+    elapsed: float
+    rate: float  # файлов в секунду
+    eta: Optional[float]  # секунд до завершения, None если неизвестно
+
+    @property
+    def percent(self) -> float:
+        """Процент выполнения (0-100)"""
+        if self.total <= 0:
+            return 0.0
+        return min(100.0, self.current * 100.0 / self.total)
+
+    def format(self, label: str = 'Индексация') -> str:
+        """
+        Сформировать строку для статус-бара
+
+        Args:
+            label: Название операции
+
+        Returns:
+            Строка вида 'Индексация: 120/5000 файлов (2%), 85 ф/с, ~57 с'
+        """
+        text = f'{label}: {self.current}/{self.total} файлов ({self.percent:.0f}%)'
+        if self.rate > 0:
+            text += f', {self.rate:.0f} ф/с'
+        if self.eta is not None:
+            text += f', ~{format_duration(self.eta)}'
+        return text
+
+
+class ThrottledProgress:
+    """
+    Потокобезопасный канал прогресса с ограничением частоты.
+
+    Вызывается из рабочего потока как обычный progress_callback(current, total):
+    вызов лишь запоминает последнее значение. Не чаще, чем раз в min_interval
+    секунд, в цикл событий через call_soon_threadsafe планируется доставка
+    агрегированного ProgressSnapshot в callback. Пока предыдущая доставка не
+    выполнена, новые не планируются, поэтому занятый UI не накапливает очередь.
+    """
+
+    DEFAULT_INTERVAL = 0.25  # seconds
+
+    def __init__(
+        self,
+        loop,
+        callback: Callable[[ProgressSnapshot], None],
+        min_interval: float = DEFAULT_INTERVAL,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Инициализация канала
+
+        Args:
+            loop: Цикл событий asyncio, в потоке которого вызывается callback
+            callback: Получатель ProgressSnapshot (вызывается в потоке цикла)
+            min_interval: Минимальный интервал между доставками в секундах
+            clock: Источник монотонного времени (подменяется в тестах)
+        """
+        self._loop = loop
+        self._callback = callback
+        self._min_interval = min_interval
+        self._clock = clock
+
+        self._lock = threading.Lock()
+        self._start_time = clock()
+        self._last_emit = float('-inf')
+        self._scheduled = False
+        self._closed = False
+        self._current = 0
+        self._total = 0
+
+    def __call__(self, current: int, total: int) -> None:
+        """
+        Сообщить о прогрессе (вызывается из рабочего потока)
+
+        Args:
+            current: Количество обработанных элементов
+            total: Общее количество элементов
+        """
+        now = self._clock()
+        with self._lock:
+            self._current = current
+            self._total = total
+            if self._closed or self._scheduled:
+                return
+            if now - self._last_emit < self._min_interval and current < total:
+                return
+            self._scheduled = True
+            self._last_emit = now
+        self._schedule()
+
+    def flush(self) -> None:
+        """Принудительно доставить последнее значение прогресса"""
+        with self._lock:
+            if self._closed or self._scheduled:
+                return
+            self._scheduled = True
+            self._last_emit = self._clock()
+        self._schedule()
+
+    def close(self) -> None:
+        """Прекратить доставку (например, после отмены задачи)"""
+        with self._lock:
+            self._closed = True
+
+    def snapshot(self) -> ProgressSnapshot:
+        """
+        Получить текущее агрегированное состояние
+
+        Returns:
+            ProgressSnapshot со скоростью и оценкой оставшегося времени
+        """
+        with self._lock:
+            current, total = self._current, self._total
+        elapsed = max(0.0, self._clock() - self._start_time)
+        rate = current / elapsed if elapsed > 0 else 0.0
+        eta = (total - current) / rate if rate > 0 and total >= current else None
+        return ProgressSnapshot(current, total, elapsed, rate, eta)
+
+    def _schedule(self) -> None:
+        """Запланировать доставку в потоке цикла событий"""
+        try:
+            self._loop.call_soon_threadsafe(self._deliver)
+        except RuntimeError:
+            # Цикл уже закрыт - доставлять некуда
+            with self._lock:
+                self._scheduled = False
+                self._closed = True
+
+    def _deliver(self) -> None:
+        """Вызвать callback с актуальным состоянием (поток цикла событий)"""
+        with self._lock:
+            self._scheduled = False
+            if self._closed:
+                return
+        self._callback(self.snapshot())
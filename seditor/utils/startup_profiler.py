@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""
+Профилирование холодного старта: время импортов, создания UI и первого кадра
+"""
+
+import importlib
+import sys
+import time
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Tuple
+
+
+class StartupProfiler:
+    """Сбор отметок времени от запуска процесса до первого отрисованного кадра"""
+
+    # Целевое время до первого кадра на прогретом кэше (мс)
+    FIRST_FRAME_TARGET_MS = 150.0
+
+    def __init__(self, start_time: Optional[float] = None):
+        """
+        Инициализация профилировщика
+
+        Args:
+            start_time: Момент старта (time.perf_counter); по умолчанию - текущий
+        """
+        self.start_time = start_time if start_time is not None else time.perf_counter()
+        self.stages: List[Tuple[str, float]] = []  # (название, длительность в мс)
+        self.first_frame_ms: Optional[float] = None
+
+    def elapsed_ms(self) -> float:
+        """Время с момента старта в миллисекундах"""
+        return (time.perf_counter() - self.start_time) * 1000
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """
+        Замерить длительность этапа
+
+        Args:
+            name: Название этапа для отчёта
+        """
+        began = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages.append((name, (time.perf_counter() - began) * 1000))
+
+    def import_module(self, module_name: str):
+        """
+        Импортировать модуль как отдельный этап отчёта
+
+        Args:
+            module_name: Полное имя модуля
+
+        Returns:
+            Импортированный модуль
+        """
+        already_loaded = module_name in sys.modules
+        label = f'import {module_name}' + (' (уже загружен)' if already_loaded else '')
+        with self.stage(label):
+            return importlib.import_module(module_name)
+
+    def attach(self, app) -> None:
+        """
+        Подписаться на первую отрисовку приложения prompt_toolkit
+
+        Args:
+            app: prompt_toolkit.Application
+        """
+        def on_render(_sender) -> None:
+            if self.first_frame_ms is None:
+                self.first_frame_ms = self.elapsed_ms()
+            app.after_render -= on_render
+
+        app.after_render += on_render
+
+    def report(self) -> str:
+        """
+        Сформировать текстовый отчёт
+
+        Returns:
+            Многострочный отчёт с длительностью этапов и временем до первого кадра
+        """
+        lines = ['seditor: профиль запуска']
+        for name, duration in self.stages:
+            lines.append(f'  {duration:8.1f} мс  {name}')
+        if self.first_frame_ms is not None:
+            verdict = 'OK' if self.first_frame_ms <= self.FIRST_FRAME_TARGET_MS else 'превышена'
+            lines.append(
+                f'  {self.first_frame_ms:8.1f} мс  первый кадр от запуска seditor.main '
+                f'(цель {self.FIRST_FRAME_TARGET_MS:.0f} мс: {verdict})'
+            )
+        else:
+            lines.append('  первый кадр не был отрисован')
+        lines.append('  подробная разбивка импортов: python -X importtime -m seditor.main')
+        return '\n'.join(lines)
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""
+Тесты IVF-индекса приближённого поиска
+"""
+
+import numpy as np
+
+from seditor.search.ann import IVFVectorStore, kmeans, nearest_centroids
+
+
+def _clustered(count=3000, dimension=32, clusters=20, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dimension)) * 3
+    labels = rng.integers(0, clusters, count)
+    vectors = centers[labels] + rng.normal(size=(count, dimension))
+    return vectors.astype(np.float32)
+
+
+def _store(tmp_path, vectors, **kwargs):
+    store = IVFVectorStore(str(tmp_path), **kwargs)
+    store.upsert([str(i) for i in range(len(vectors))], vectors, [{'row': i} for i in range(len(vectors))])
+    return store
+
+
+def test_kmeans_separates_clusters():
+    """k-means находит хорошо разделённые кластеры"""
+    rng = np.random.default_rng(1)
+    vectors = np.vstack([rng.normal(loc, 0.1, size=(50, 2)) for loc in (-5.0, 5.0)]).astype(np.float32)
+    centroids = kmeans(vectors, 2)
+    assignment = nearest_centroids(vectors, centroids)
+    assert len(set(assignment[:50])) == 1
+    assert len(set(assignment[50:])) == 1
+    assert assignment[0] != assignment[-1]
+
+
+def test_small_index_is_exact(tmp_path):
+    """Пока векторов мало, центроиды не обучаются и поиск точный"""
+    vectors = _clustered(count=100)
+    store = _store(tmp_path, vectors)
+    result = store.query([vectors[42]], n_results=3)
+    assert not store.is_trained
+    assert result['ids'][0][0] == '42'
+    expected = np.argsort(((vectors - vectors[42]) ** 2).sum(axis=1))[:3]
+    assert result['ids'][0] == [str(i) for i in expected]
+
+
+def test_query_does_not_train(tmp_path):
+    """Поиск не обучает центроиды: до сохранения он точный, обучение - при flush"""
+    vectors = _clustered(count=IVFVectorStore.TRAIN_MIN + 100)
+    store = _store(tmp_path, vectors)
+    result = store.query([vectors[7]], n_results=5)
+    assert not store.is_trained
+    expected = np.argsort(((vectors - vectors[7]) ** 2).sum(axis=1))[:5]
+    assert result['ids'][0] == [str(i) for i in expected]
+
+    store.flush()
+    assert store.is_trained
+    assert store.query([vectors[7]], n_results=1)['ids'][0] == ['7']
+
+
+def test_trained_index_recall(tmp_path):
+    """После обучения полнота высокая, nprobe равный числу кластеров даёт точный ответ"""
+    vectors = _clustered()
+    store = _store(tmp_path, vectors, nprobe=4, nlist=40)
+    store.train()
+    assert store.is_trained
+
+    hits = 0
+    for row in range(0, 3000, 100):
+        expected = set(np.argsort(((vectors - vectors[row]) ** 2).sum(axis=1))[:10].tolist())
+        found = {int(i) for i in store.query([vectors[row]], n_results=10)['ids'][0]}
+        hits += len(expected & found)
+    assert hits / 300 >= 0.9
+
+    store.nprobe = len(store._centroids)
+    expected = np.argsort(((vectors - vectors[7]) ** 2).sum(axis=1))[:10]
+    assert store.query([vectors[7]], n_results=10)['ids'][0] == [str(i) for i in expected]
+
+
+def test_incremental_insert_and_delete(tmp_path):
+    """Новые векторы попадают в кластеры, удалённые не возвращаются"""
+    vectors = _clustered()
+    store = _store(tmp_path, vectors[:2500])
+    store.train()
+
+    store.upsert(['new'], vectors[2900:2901])
+    assert store.query([vectors[2900]], n_results=1)['ids'][0] == ['new']
+
+    store.delete(['new', '5'])
+    assert 'new' not in store.query([vectors[2900]], n_results=5)['ids'][0]
+    assert '5' not in store.query([vectors[5]], n_results=5)['ids'][0]
+    assert store.count() == 2499
+
+
+def test_persistence(tmp_path):
+    """Индекс с центроидами сохраняется и открывается заново"""
+    vectors = _clustered()
+    store = _store(tmp_path, vectors)
+    store.delete(['0'])
+    store.flush()
+    assert store.is_trained
+
+    reopened = IVFVectorStore(str(tmp_path))
+    assert reopened.is_trained
+    assert reopened.count() == 2999
+    result = reopened.query([vectors[10]], n_results=1)
+    assert result['ids'][0] == ['10']
+    assert result['metadatas'][0] == [{'row': 10}]
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""
+Тесты возобновляемой индексации с контрольными точками
+"""
+
+import threading
+
+from seditor.search.embeddings import HashingEmbedder
+from seditor.search.semantic_indexer import SemanticIndexer
+
+
+class CountingEmbedder(HashingEmbedder):
+    """Хэширующий эмбеддер, считающий эмбеддированные тексты"""
+
+    def __init__(self):
+        super().__init__(dimension=32)
+        self.encoded = 0
+
+    def encode(self, texts, show_progress_bar=False):
+        self.encoded += len(texts)
+        return super().encode(texts, show_progress_bar)
+
+
+def _write_repo(root, files=35):
+    for i in range(files):
+        (root / f'module{i}.py').write_text(f'def handler_{i}():\n    return {i}\n')
+
+
+def _indexer(root, embedder):
+    return SemanticIndexer(str(root), embedder=embedder, index_mode='int8')
+
+
+def test_cancelled_indexing_resumes(tmp_path):
+    """Прерванный проход не считается готовым и продолжается без повторных эмбеддингов"""
+    _write_repo(tmp_path)
+    embedder = CountingEmbedder()
+    cancel = threading.Event()
+
+    def progress(current, total):
+        if current == 20:
+            cancel.set()
+
+    indexer = _indexer(tmp_path, embedder)
+    indexer.index_directory(progress, cancel)
+    first_pass = embedder.encoded
+    assert 0 < first_pass < 35
+    assert not indexer.is_indexed()
+
+    # Новый сеанс: хранилище и контрольная точка читаются с диска
+    resumed = _indexer(tmp_path, embedder)
+    assert not resumed.is_indexed()
+    assert resumed.index_directory() == 35
+    assert embedder.encoded == 35
+    assert resumed.is_indexed()
+    assert resumed.get_indexed_count() == 35
+
+
+def test_unchanged_files_not_reread(tmp_path, monkeypatch):
+    """После завершённого прохода неизменённые файлы не читаются заново"""
+    _write_repo(tmp_path, files=5)
+    embedder = CountingEmbedder()
+    _indexer(tmp_path, embedder).index_directory()
+
+    (tmp_path / 'module0.py').write_text('def changed():\n    return "new"\n')
+    reopened = _indexer(tmp_path, embedder)
+    reads = []
+    original = reopened._read_file_content
+    monkeypatch.setattr(reopened, '_read_file_content', lambda path: reads.append(path) or original(path))
+
+    assert reopened.index_directory() == 5
+    assert [path.rsplit('/', 1)[-1] for path in reads] == ['module0.py']
+    assert embedder.encoded == 6
+    assert reopened.get_indexed_count() == 5
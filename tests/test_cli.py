@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""
+Тесты команд без интерфейса (seditor index / seditor search)
+"""
+
+import json
+import sys
+
+import pytest
+
+from seditor.main import main
+from seditor.utils.metrics import metrics
+
+
+def _repository(root):
+    root.mkdir()
+    (root / 'billing.py').write_text('def charge_payment_card(amount):\n    return amount\n')
+    (root / 'accounts.py').write_text('def create_user_account(name):\n    return name\n')
+    (root / 'docs').mkdir()
+    (root / 'docs' / 'payments.md').write_text('# Payment cards\n')
+    return root
+
+
+def _run(tmp_path, *argv):
+    return main(['--log-file', str(tmp_path / 'seditor.log'), *argv])
+
+
+def test_index_and_search_without_tty(tmp_path, capsys):
+    """Индексация и поиск работают без терминала, поиск печатает JSON с таймингами"""
+    repo = _repository(tmp_path / 'repo')
+    assert not sys.stdin.isatty()
+    common = ('--embedder', 'hash', '--index-mode', 'int8')
+
+    timed = metrics.histogram('indexer.index_directory').count
+    assert _run(tmp_path, 'index', '--json', '-j', '4', *common, str(repo)) == 0
+    summary = json.loads(capsys.readouterr().out)
+    assert metrics.histogram('indexer.index_directory').count == timed + 1  # один замер на проход
+    assert summary[0]['indexed'] == 3 and summary[0]['complete']
+
+    # Повторный запуск инкрементальный: содержимое не эмбеддится заново
+    assert _run(tmp_path, 'index', '--json', *common, str(repo)) == 0
+    assert json.loads(capsys.readouterr().out)[0]['stored'] == 3
+
+    assert _run(tmp_path, 'search', 'create user account', '-k', '2', '--snippets',
+                '--root', str(repo), *common) == 0
+    output = json.loads(capsys.readouterr().out)
+    assert output['results'][0]['path'] == str(repo / 'accounts.py')
+    assert output['results'][0]['snippet'].startswith('def create_user_account')
+    assert len(output['results']) == 2
+    assert set(output['timings']) == {'load_ms', 'search_ms', 'total_ms', 'shards'}
+    assert output['timings']['shards'][0]['root'] == str(repo)
+
+    # Поддиректория ищет по индексу репозитория
+    assert _run(tmp_path, 'search', 'payment', '--root', str(repo / 'docs'), *common) == 0
+    output = json.loads(capsys.readouterr().out)
+    assert [item['name'] for item in output['results']] == ['payments.md']
+
+    # Общий --root перед подкомандой не затирается значением по умолчанию подкоманды
+    assert _run(tmp_path, '--root', str(repo / 'docs'), 'search', 'payment', *common) == 0
+    output = json.loads(capsys.readouterr().out)
+    assert output['timings']['shards'][0]['root'] == str(repo / 'docs')
+
+
+def test_search_without_index(tmp_path, capsys):
+    """Поиск без индекса завершается ошибкой с подсказкой"""
+    (tmp_path / 'empty').mkdir()
+    assert _run(tmp_path, 'search', 'anything', '--root', str(tmp_path / 'empty'),
+                '--embedder', 'hash', '--index-mode', 'int8') == 1
+    assert 'seditor index' in capsys.readouterr().err
+    assert not (tmp_path / 'empty' / '.seditor').exists()  # поиск не создаёт индекс
+
+
+def test_invalid_index_mode_is_rejected(tmp_path, capsys):
+    """Опечатка в --index-mode отклоняется разбором аргументов"""
+    with pytest.raises(SystemExit) as error:
+        _run(tmp_path, 'search', 'anything', '--index-mode', 'int9')
+    assert error.value.code == 2
+    assert 'int9' in capsys.readouterr().err
+
+
+def test_index_init_error_is_one_line(tmp_path, capsys, monkeypatch):
+    """Недоступная зависимость индекса - одна строка в stderr и ненулевой код"""
+    repo = _repository(tmp_path / 'repo')
+    monkeypatch.setitem(sys.modules, 'sentence_transformers', None)  # import -> ImportError
+    assert _run(tmp_path, 'index', '--no-progress', '--embedder', 'minilm', '--index-mode', 'int8',
+                str(repo)) == 1
+    err = capsys.readouterr().err
+    assert err.startswith('Ошибка:') and err.count('\n') == 1
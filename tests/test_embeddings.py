@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""
+Тесты для провайдеров эмбеддингов
+"""
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from seditor.search.embeddings import (  # noqa: E402
+    HashingEmbedder,
+    get_embedding_provider,
+    resolve_provider_name,
+)
+from seditor.search.semantic_indexer import SemanticIndexer  # noqa: E402
+
+
+def test_hashing_embedder_is_deterministic_and_normalized():
+    """Одинаковый текст - одинаковый нормированный вектор"""
+    embedder = HashingEmbedder(dimension=64)
+    first = embedder.encode(['def load_user_session(token): pass', ''])
+    second = HashingEmbedder(dimension=64).encode(['def load_user_session(token): pass', ''])
+
+    assert first.shape == (2, 64)
+    assert first.dtype == np.float32
+    np.testing.assert_array_equal(first, second)
+    assert abs(np.linalg.norm(first[0]) - 1.0) < 1e-5
+    assert not first[1].any()
+
+
+def test_hashing_embedder_similarity():
+    """Тексты с общими токенами ближе, чем тексты без общих токенов"""
+    embedder = HashingEmbedder()
+    query, related, unrelated = embedder.encode([
+        'user session token',
+        'class UserSession:\n    def refresh_token(self): ...',
+        'render the file tree layout with a theme',
+    ])
+    assert query @ related > query @ unrelated
+
+
+def test_tokenize_splits_identifiers():
+    """camelCase и snake_case идентификаторы разбиваются на части"""
+    tokens = HashingEmbedder.tokenize('loadUserSession parse_file_tree')
+    assert {'loadusersession', 'load', 'user', 'session', 'parse', 'file', 'tree'} <= set(tokens)
+
+
+def test_provider_factory(monkeypatch):
+    """Фабрика возвращает общий экземпляр и учитывает переменную окружения"""
+    monkeypatch.setenv('SEDITOR_EMBEDDER', 'hash')
+    assert resolve_provider_name() == 'hash'
+    assert get_embedding_provider() is get_embedding_provider('hash')
+    with pytest.raises(ValueError):
+        resolve_provider_name('unknown')
+
+
+def test_indexer_collection_per_provider(tmp_path):
+    """У разных провайдеров разные коллекции"""
+    indexer = SemanticIndexer(str(tmp_path), embedder='hash')
+    assert indexer.collection_name == 'files_hash_384'
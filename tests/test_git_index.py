@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+Тесты чтения .git/index и перечисления файлов по нему
+"""
+
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from seditor.search.embeddings import HashingEmbedder
+from seditor.search.git_index import GitIndex, GitIndexError, parse_index
+from seditor.search.semantic_indexer import SemanticIndexer
+
+pytestmark = pytest.mark.skipif(shutil.which('git') is None, reason='git не установлен')
+
+
+def _git(root, *args):
+    return subprocess.run(['git', '-C', str(root), *args], check=True,
+                          capture_output=True, text=True).stdout
+
+
+def _repo(root):
+    _git(root, 'init', '-q')
+    files = {
+        'main.py': 'def main():\n    pass\n',
+        'pkg/util.py': 'def helper():\n    return 1\n',
+        'docs/заметки.md': '# Заметки\n',
+        'deep/' + 'nested_directory/' * 6 + 'module_with_a_long_name.py': 'x = 1\n',
+    }
+    for rel_path, text in files.items():
+        path = root / rel_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text, encoding='utf-8')
+    _git(root, 'add', '.')
+    return files
+
+
+def _ls_files(root):
+    result = {}
+    for line in _git(root, '-c', 'core.quotepath=off', 'ls-files', '-s').splitlines():
+        info, path = line.split('\t', 1)
+        result[path] = info.split()[1]
+    return result
+
+
+@pytest.mark.parametrize('version', ['2', '3', '4'])
+def test_parse_matches_git(tmp_path, version):
+    """Пути и SHA совпадают с git ls-files для всех версий индекса"""
+    _repo(tmp_path)
+    _git(tmp_path, 'update-index', '--index-version', version)
+    index = GitIndex(str(tmp_path))
+    assert {path: entry.sha for path, entry in index.entries.items()} == _ls_files(tmp_path)
+    assert index.entries['main.py'].size == len('def main():\n    pass\n')
+
+
+def test_parse_rejects_garbage():
+    """Неверная сигнатура - GitIndexError"""
+    with pytest.raises(GitIndexError):
+        parse_index(b'not an index')
+
+
+def _indexer(root):
+    return SemanticIndexer(str(root), embedder=HashingEmbedder(dimension=32), index_mode='int8')
+
+
+def test_tracked_only_listing_is_opt_in(tmp_path, monkeypatch):
+    """По умолчанию неотслеживаемые файлы индексируются; только отслеживаемые - по SEDITOR_GIT_TRACKED_ONLY=1"""
+    _repo(tmp_path)
+    (tmp_path / 'untracked.py').write_text('def draft():\n    pass\n')
+    # Файл вырос после git add: размер проверяется по файлу, а не по индексу git
+    (tmp_path / 'main.py').write_text('#' * (SemanticIndexer.MAX_FILE_SIZE + 1))
+
+    collected = {os.path.relpath(path, tmp_path) for path in _indexer(tmp_path)._collect_files()}
+    assert 'untracked.py' in collected
+    assert 'main.py' not in collected
+
+    monkeypatch.setenv('SEDITOR_GIT_TRACKED_ONLY', '1')
+    collected = {os.path.relpath(path, tmp_path) for path in _indexer(tmp_path)._collect_files()}
+    assert 'untracked.py' not in collected
+    assert 'main.py' not in collected
+    assert os.path.join('pkg', 'util.py') in collected
+
+
+def test_indexer_uses_tracked_files(tmp_path):
+    """SHA блобов из индекса git: touch без изменений не вызывает чтения"""
+    _repo(tmp_path)
+    indexer = _indexer(tmp_path)
+    indexer.index_directory()
+
+    # Файл перезаписан тем же содержимым: mtime другой, SHA блоба прежний
+    path = tmp_path / 'main.py'
+    path.write_text(path.read_text())
+    past = path.stat().st_mtime - 10
+    os.utime(path, (past, past))
+    _git(tmp_path, 'update-index', '--refresh')
+
+    reads = []
+    original = indexer._read_file_content
+    indexer._read_file_content = lambda file_path: reads.append(file_path) or original(file_path)
+    indexer.index_directory()
+    assert reads == []
+
+
+def test_recent_priority_uses_real_mtime(tmp_path):
+    """Приоритет недавно изменённых - по stat файла, а не по времени из индекса git"""
+    _repo(tmp_path)
+    path = tmp_path / 'main.py'
+    future = path.stat().st_mtime + 1000
+    path.write_text('def main():\n    return 1\n')
+    os.utime(path, (future, future))
+    indexer = _indexer(tmp_path)
+    indexer._collect_files()
+    assert indexer._file_mtime(str(path)) == future
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""
+Тесты правил исключения (.gitignore, .git/info/exclude, .seditorignore)
+"""
+
+import os
+
+from seditor.core.file_tree import FileTree
+from seditor.search.embeddings import HashingEmbedder
+from seditor.search.semantic_indexer import SemanticIndexer
+from seditor.utils.ignore import IgnoreMatcher, get_ignore_matcher
+
+
+def _write(root, rel_path, text='x'):
+    path = root / rel_path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+    return path
+
+
+def _repo(root):
+    (root / '.git' / 'info').mkdir(parents=True)
+    _write(root, '.gitignore', '*.log\n/build/\ndocs/**/*.tmp\n!keep.log\n')
+    _write(root, '.git/info/exclude', 'local.txt\n')
+    _write(root, 'src/.gitignore', 'generated/\n')
+    for rel_path in ('app.py', 'debug.log', 'keep.log', 'local.txt', 'build/out.py',
+                     'src/build/real.py', 'src/main.py', 'src/generated/gen.py',
+                     'docs/a/b/x.tmp', 'docs/readme.md'):
+        _write(root, rel_path)
+    return IgnoreMatcher(str(root))
+
+
+def test_gitignore_patterns(tmp_path):
+    """Шаблоны, якоря, отрицания, ** и вложенные .gitignore"""
+    matcher = _repo(tmp_path)
+
+    def ignored(rel_path):
+        path = str(tmp_path / rel_path)
+        return matcher.is_ignored(path, os.path.isdir(path))
+
+    assert ignored('debug.log')
+    assert not ignored('keep.log')
+    assert ignored('local.txt')
+    assert ignored('build')
+    assert ignored('build/out.py')
+    # /build/ привязан к корню
+    assert not ignored('src/build/real.py')
+    assert ignored('src/generated/gen.py')
+    assert ignored('docs/a/b/x.tmp')
+    assert not ignored('docs/readme.md')
+    assert ignored('.git/info/exclude')
+    assert not ignored('app.py')
+
+
+def test_seditorignore_has_priority(tmp_path):
+    """.seditorignore может и исключить, и вернуть путь"""
+    _write(tmp_path, '.gitignore', '*.log\n')
+    _write(tmp_path, '.seditorignore', 'secret/\n!important.log\n')
+    matcher = IgnoreMatcher(str(tmp_path))
+
+    assert matcher.is_ignored(str(tmp_path / 'secret'), True)
+    assert not matcher.is_ignored(str(tmp_path / 'important.log'), False)
+    assert matcher.is_ignored(str(tmp_path / 'other.log'), False)
+
+
+def test_walk_prunes_ignored_directories(tmp_path):
+    """Обход не заходит в исключённые директории"""
+    matcher = _repo(tmp_path)
+    visited = set()
+    files = set()
+    for dirpath, _, filenames in matcher.walk():
+        rel_dir = os.path.relpath(dirpath, tmp_path)
+        visited.add(rel_dir)
+        files.update(os.path.normpath(os.path.join(rel_dir, name)) for name in filenames)
+
+    assert 'build' not in visited
+    assert '.git' not in visited
+    assert os.path.join('src', 'generated') not in visited
+    assert 'app.py' in files and 'keep.log' in files
+    assert 'debug.log' not in files
+
+
+def test_indexer_and_tree_use_ignore_rules(tmp_path):
+    """Индексатор и дерево файлов пропускают исключённое"""
+    _repo(tmp_path)
+    indexer = SemanticIndexer(str(tmp_path), embedder=HashingEmbedder(dimension=32), index_mode='int8')
+    collected = {os.path.relpath(path, tmp_path) for path in indexer._collect_files()}
+    assert os.path.join('src', 'main.py') in collected
+    assert os.path.join('build', 'out.py') not in collected
+    assert os.path.join('src', 'generated', 'gen.py') not in collected
+
+    tree = FileTree(str(tmp_path))
+    names = {node.name for node in tree.root.children}
+    assert 'build' not in names and 'debug.log' not in names
+    assert {'src', 'app.py', 'keep.log'} <= names
+
+    assert 'build' in {node.name for node in FileTree(str(tmp_path), respect_ignore=False).root.children}
+
+
+def test_shared_matcher_follows_rule_edits(tmp_path, monkeypatch):
+    """Общий матчер корня подхватывает изменённые и новые файлы правил"""
+    monkeypatch.setattr(IgnoreMatcher, 'REFRESH_INTERVAL', 0)
+    _repo(tmp_path)
+    matcher = get_ignore_matcher(str(tmp_path))
+    assert not matcher.is_ignored(str(tmp_path / 'src' / 'main.py'), False)
+    assert not matcher.is_ignored(str(tmp_path / 'app.py'), False)
+
+    _write(tmp_path, 'src/.gitignore', 'generated/\nmain.py\n')
+    _write(tmp_path, '.seditorignore', 'app.py\n')
+    assert get_ignore_matcher(str(tmp_path)) is matcher
+    assert matcher.is_ignored(str(tmp_path / 'src' / 'main.py'), False)
+    assert matcher.is_ignored(str(tmp_path / 'app.py'), False)
+    assert not matcher.refresh()
+
+
+def test_refresh_stats_existing_rules_and_is_rate_limited(tmp_path, monkeypatch):
+    """Отмечаются только существующие файлы правил и директории без них; проверка не чаще интервала"""
+    matcher = _repo(tmp_path)
+    list(matcher.walk())
+    stamped = {os.path.relpath(path, tmp_path) for path in matcher._stamps}
+    assert stamped == {'.', '.gitignore', 'src/.gitignore', '.git/info/exclude',
+                       'src/build', 'docs', 'docs/a', 'docs/a/b'}
+
+    stats = []
+    original = os.stat
+    monkeypatch.setattr(os, 'stat', lambda path, *args, **kwargs: stats.append(path) or original(path, *args, **kwargs))
+    assert not matcher.refresh()
+    assert stats == []  # интервал не прошёл
+
+    monkeypatch.setattr(IgnoreMatcher, 'REFRESH_INTERVAL', 0)
+    _write(tmp_path, 'docs/a/.gitignore', 'b/\n')  # новый файл правил в директории без него
+    assert matcher.refresh()
+    assert matcher.is_ignored(str(tmp_path / 'docs' / 'a' / 'b' / 'x.tmp'), False)
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""
+Тесты дедупликации содержимого при индексации
+"""
+
+from seditor.search.embeddings import HashingEmbedder
+from seditor.search.semantic_indexer import SemanticIndexer, copies_label, get_duplicate_paths
+
+
+def _indexer(root):
+    return SemanticIndexer(str(root), embedder=HashingEmbedder(dimension=64), index_mode='int8')
+
+
+def _write_repo(root):
+    config = 'retries: 3\ntimeout: 30\nendpoint: payments\n'
+    (root / 'service').mkdir()
+    (root / 'vendor').mkdir()
+    (root / 'service' / 'config.yaml').write_text(config)
+    (root / 'vendor' / 'config.yaml').write_text(config)
+    (root / 'vendor' / 'copy.yaml').write_text(config)
+    (root / 'render.py').write_text('def draw_tree(layout):\n    return layout.render_frame()\n')
+
+
+def test_copies_label():
+    """Подпись согласуется с числом"""
+    assert copies_label(1) == '(+1 копия)'
+    assert copies_label(3) == '(+3 копии)'
+    assert copies_label(5) == '(+5 копий)'
+    assert copies_label(11) == '(+11 копий)'
+    assert copies_label(22) == '(+22 копии)'
+
+
+def test_identical_files_embedded_once(tmp_path):
+    """Одинаковое содержимое даёт одну запись индекса со списком путей"""
+    _write_repo(tmp_path)
+    indexer = _indexer(tmp_path)
+
+    assert indexer.index_directory() == 4
+    assert indexer.get_indexed_count() == 2
+
+    results = indexer.search('retries timeout endpoint', top_k=5)
+    config_results = [r for r in results if 'config' in r[1] or 'copy' in r[1]]
+    assert len(config_results) == 1
+    assert config_results[0][1].endswith('(+2 копии)')
+
+    entry = next(m for m in indexer._collection.get()['metadatas'] if m.get('duplicate_count'))
+    paths = [entry['relative_path']] + get_duplicate_paths(entry)
+    assert sorted(paths) == sorted(['service/config.yaml', 'vendor/config.yaml', 'vendor/copy.yaml'])
+
+
+def test_reindex_removes_stale_entries(tmp_path):
+    """Записи изменённого содержимого удаляются при переиндексации"""
+    _write_repo(tmp_path)
+    _indexer(tmp_path).index_directory()
+
+    (tmp_path / 'vendor' / 'copy.yaml').write_text('completely different: content\n')
+    (tmp_path / 'render.py').unlink()
+    indexer = _indexer(tmp_path)
+    indexer.index_directory()
+
+    metadatas = indexer._collection.get()['metadatas']
+    assert indexer.get_indexed_count() == 2
+    assert all(m['name'] != 'render.py' for m in metadatas)
+    duplicated = next(m for m in metadatas if m.get('duplicate_count'))
+    assert duplicated['duplicate_count'] == 1
+
+
+def test_large_files_with_common_prefix_are_distinct(tmp_path):
+    """Большие файлы, отличающиеся после прочитанной части, не схлопываются в одну запись"""
+    prefix = 'def shared_helper():\n    return 42\n' * 2000  # больше PARTIAL_READ_SIZE
+    (tmp_path / 'a.py').write_text(prefix + 'def alpha():\n    pass\n' * 2000)
+    (tmp_path / 'b.py').write_text(prefix + 'def beta():\n    pass\n' * 2000)
+    indexer = _indexer(tmp_path)
+    assert (tmp_path / 'a.py').stat().st_size > indexer.MAX_FULL_READ_SIZE
+
+    assert indexer.index_directory() == 2
+    assert indexer.get_indexed_count() == 2
+    assert all(not m.get('duplicate_count') for m in indexer._collection.get()['metadatas'])
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""
+Тесты для настройки логирования через очередь
+"""
+
+import logging
+
+import pytest
+
+from seditor.utils.logging_setup import setup_logging, shutdown_logging
+
+
+def test_setup_logging_writes_through_queue(tmp_path):
+    """Записи попадают в указанный файл после остановки listener"""
+    log_file = tmp_path / 'logs' / 'seditor.log'
+    try:
+        used = setup_logging(level='DEBUG', log_file=str(log_file))
+        assert used == str(log_file)
+        logging.getLogger('seditor.test').debug('hello %s', 'queue')
+    finally:
+        shutdown_logging()
+
+    assert 'hello queue' in log_file.read_text(encoding='utf-8')
+
+
+def test_setup_logging_level_filters(tmp_path):
+    """Сообщения ниже заданного уровня не записываются"""
+    log_file = tmp_path / 'seditor.log'
+    try:
+        setup_logging(level='WARNING', log_file=str(log_file))
+        logger = logging.getLogger('seditor.test')
+        assert not logger.isEnabledFor(logging.INFO)
+        logger.info('skipped')
+        logger.warning('kept')
+    finally:
+        shutdown_logging()
+
+    content = log_file.read_text(encoding='utf-8')
+    assert 'kept' in content
+    assert 'skipped' not in content
+
+
+def test_setup_logging_rotates_by_size(tmp_path):
+    """Файл лога ротируется при превышении размера"""
+    log_file = tmp_path / 'seditor.log'
+    try:
+        setup_logging(level='INFO', log_file=str(log_file), max_bytes=512, backup_count=2)
+        logger = logging.getLogger('seditor.test')
+        for i in range(100):
+            logger.info('line %d %s', i, 'x' * 40)
+    finally:
+        shutdown_logging()
+
+    assert (tmp_path / 'seditor.log.1').exists()
+
+
+def test_setup_logging_rejects_unknown_level(tmp_path):
+    """Неизвестный уровень приводит к ValueError"""
+    with pytest.raises(ValueError):
+        setup_logging(level='LOUD', log_file=str(tmp_path / 'seditor.log'))
+
+
+def test_log_level_argument_is_validated(capsys):
+    """--log-level не чувствителен к регистру, неизвестный уровень - ошибка argparse, а не traceback"""
+    from seditor.main import _parse_args
+
+    assert _parse_args(['--log-level', 'debug']).log_level == 'DEBUG'
+    with pytest.raises(SystemExit):
+        _parse_args(['--log-level', 'verbose'])
+    assert 'invalid choice' in capsys.readouterr().err
+
+
+def test_search_skips_debug_call_below_level(tmp_path, monkeypatch):
+    """Без DEBUG поиск не вызывает logger.debug и не собирает его аргументы"""
+    from seditor.search import semantic_indexer
+
+    (tmp_path / 'billing.py').write_text('def charge_payment_card(amount):\n    return amount\n')
+    indexer = semantic_indexer.SemanticIndexer(str(tmp_path), embedder='hash', index_mode='int8')
+    indexer.index_directory()
+    calls = []
+    monkeypatch.setattr(semantic_indexer.logger, 'debug', lambda *args, **kwargs: calls.append(args))
+    try:
+        setup_logging(level='INFO', log_file=str(tmp_path / 'seditor.log'))
+        assert indexer.search('payment card')
+        assert calls == []
+        setup_logging(level='DEBUG', log_file=str(tmp_path / 'seditor.log'))
+        indexer.search('payment card')
+        assert len(calls) == 1
+    finally:
+        shutdown_logging()
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+Тесты учёта памяти и лимитов
+"""
+
+import os
+
+from seditor.core.file_tree import FileTree
+from seditor.search.embeddings import HashingEmbedder
+from seditor.search.semantic_indexer import SemanticIndexer
+from seditor.utils.memory import MemoryAccountant, MemoryLimits, format_bytes
+
+
+def _make_tree(root):
+    for name in ('a', 'b', 'c'):
+        directory = root / name
+        directory.mkdir()
+        for i in range(5):
+            (directory / f'file{i}.txt').write_text('x')
+    return FileTree(str(root))
+
+
+def _node(tree, name):
+    return next(node for node in tree.root.children if node.name == name)
+
+
+def test_format_bytes():
+    """Размеры форматируются в удобных единицах"""
+    assert format_bytes(512) == '512 Б'
+    assert format_bytes(1536) == '1.5 КБ'
+    assert format_bytes(5 * 1024 * 1024) == '5.0 МБ'
+
+
+def test_limits_from_env(monkeypatch):
+    """Лимиты читаются из переменных окружения"""
+    monkeypatch.setenv('SEDITOR_MODEL_IDLE_MINUTES', '2')
+    monkeypatch.setenv('SEDITOR_TREE_MAX_NODES', '100')
+    limits = MemoryLimits.from_env()
+    assert limits.model_idle_seconds == 120
+    assert limits.tree_max_nodes == 100
+
+
+def test_accountant_report_ignores_failing_estimators():
+    """Ошибка оценщика не ломает отчёт"""
+    accountant = MemoryAccountant()
+    accountant.register('ok', lambda: 2048)
+    accountant.register('broken', lambda: 1 / 0)
+    assert accountant.usage() == {'ok': 2048, 'broken': 0}
+    assert 'ok 2.0 КБ' in accountant.format_report()
+
+
+def test_prune_forgets_idle_collapsed_subtrees(tmp_path):
+    """Давно свёрнутые директории забывают детей, развёрнутые - нет"""
+    tree = _make_tree(tmp_path)
+    a, b = _node(tree, 'a'), _node(tree, 'b')
+    a.expand()
+    b.expand()
+    b.collapse()
+    visible_before = [node.path for node in tree.get_visible_items()]
+
+    freed = tree.prune(max_idle=60, now=b.last_visited + 61)
+
+    assert freed == 5
+    assert not b.scanned and b.children == []
+    assert a.scanned and len(a.children) == 5
+    assert [node.path for node in tree.get_visible_items()] == visible_before
+
+    # При повторном раскрытии директория сканируется заново
+    b.expand()
+    assert len(b.children) == 5
+
+
+def test_prune_enforces_node_cap_oldest_first(tmp_path):
+    """При превышении лимита узлов забываются самые давние поддеревья"""
+    tree = _make_tree(tmp_path)
+    b, c = _node(tree, 'b'), _node(tree, 'c')
+    b.expand()
+    b.collapse()
+    c.expand()
+    c.collapse()
+    c.last_visited = b.last_visited + 1
+    count, size = tree.memory_usage()
+    assert count == 1 + 3 + 10 and size > 0
+
+    freed = tree.prune(max_nodes=count - 1)
+
+    assert freed == 5
+    assert not b.scanned
+    assert c.scanned
+
+
+def test_indexer_releases_idle_model(tmp_path):
+    """Модель выгружается только после простоя"""
+    (tmp_path / 'main.py').write_text('def main():\n    return 1\n')
+    embedder = HashingEmbedder(dimension=32)
+    indexer = SemanticIndexer(str(tmp_path), embedder=embedder)
+    indexer._init_model()
+    embedder.encode(['warm cache'])
+    assert embedder.memory_usage() > 0
+
+    assert not indexer.release_if_idle(60, now=indexer._last_used + 10)
+    assert indexer.release_if_idle(60, now=indexer._last_used + 61)
+    assert indexer._model is None
+    assert embedder.memory_usage() == 0
+    assert os.path.isdir(indexer.seditor_dir)
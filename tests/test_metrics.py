@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""
+Тесты реестра метрик
+"""
+
+import asyncio
+import json
+
+from seditor.utils.metrics import Histogram, MetricsRegistry
+
+
+def test_histogram_percentiles():
+    """Перцентили считаются по замерам"""
+    histogram = Histogram()
+    for value in range(1, 101):
+        histogram.observe(float(value))
+
+    summary = histogram.summary()
+    assert summary['count'] == 100
+    assert summary['max'] == 100.0
+    assert 49.0 <= summary['p50'] <= 51.0
+    assert summary['p99'] >= 98.0
+    assert summary['mean'] == 50.5
+
+
+def test_histogram_memory_is_bounded():
+    """Хранится не больше MAX_SAMPLES замеров"""
+    histogram = Histogram()
+    for value in range(Histogram.MAX_SAMPLES * 2):
+        histogram.observe(float(value))
+
+    assert len(histogram._samples) == Histogram.MAX_SAMPLES
+    assert histogram.count == Histogram.MAX_SAMPLES * 2
+
+
+def test_timer_and_decorator_record_samples():
+    """timer и timed записывают замеры в гистограммы"""
+    registry = MetricsRegistry()
+
+    with registry.timer('block'):
+        pass
+
+    @registry.timed('func')
+    def func(x):
+        return x * 2
+
+    assert func(21) == 42
+    snapshot = registry.snapshot()
+    assert snapshot['histograms']['block']['count'] == 1
+    assert snapshot['histograms']['func']['count'] == 1
+
+
+def test_disabled_registry_records_nothing():
+    """Выключенный реестр не собирает метрики"""
+    registry = MetricsRegistry(enabled=False)
+    registry.inc('keypress')
+    registry.observe('frame', 1.0)
+
+    @registry.timed('func')
+    def func():
+        return 'ok'
+
+    assert func() == 'ok'
+    assert registry.snapshot() == {'counters': {}, 'histograms': {}}
+
+
+def test_dump_json(tmp_path):
+    """Снимок метрик сохраняется в JSON"""
+    registry = MetricsRegistry()
+    registry.inc('keypress', 3)
+    registry.observe('frame', 2.5)
+
+    path = tmp_path / 'metrics.json'
+    registry.dump_json(str(path), extra={'version': 1})
+
+    data = json.loads(path.read_text(encoding='utf-8'))
+    assert data['version'] == 1
+    assert data['counters'] == {'keypress': 3}
+    assert data['histograms']['frame']['p50'] == 2.5
+
+
+def test_typed_text_measures_key_to_render():
+    """Ввод текста стандартной привязкой self-insert тоже замеряется до отрисовки"""
+    from prompt_toolkit.application.current import set_app
+    from prompt_toolkit.key_binding.key_processor import KeyPress
+
+    from seditor.core.app_ptk import AppPTK
+    from seditor.utils.metrics import metrics
+
+    app = AppPTK()
+    app.layout.focus(app.editor_window)
+    keypresses = metrics.counter('keypress').value
+
+    async def type_text():
+        with set_app(app.app):
+            app.app.key_processor.feed_multiple([KeyPress(char) for char in 'hello'])
+            app.app.key_processor.process_keys()
+
+    asyncio.run(type_text())
+
+    assert app.editor_pane.buffer.text == 'hello'
+    assert app._pending_keypress is not None
+    assert metrics.counter('keypress').value == keypresses + 5
+    samples = metrics.histogram('key_to_render').count
+    app._on_after_render(app.app)
+    assert metrics.histogram('key_to_render').count == samples + 1
+    assert app._pending_keypress is None
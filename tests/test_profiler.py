@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""
+Тесты сэмплирующего профилировщика
+"""
+
+import threading
+import time
+
+from seditor.utils.profiler import SamplingProfiler
+
+
+def _busy_worker(stop: threading.Event) -> None:
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_sample_collects_stacks_of_other_threads():
+    """Сэмпл содержит стеки фоновых потоков с именем потока в корне"""
+    stop = threading.Event()
+    worker = threading.Thread(target=_busy_worker, args=(stop,), name='indexer worker')
+    worker.start()
+    try:
+        profiler = SamplingProfiler()
+        for _ in range(5):
+            profiler.sample()
+    finally:
+        stop.set()
+        worker.join()
+
+    assert profiler.samples == 5
+    lines = profiler.collapsed().splitlines()
+    worker_lines = [line for line in lines if line.startswith('indexer_worker;')]
+    assert worker_lines
+    assert any('test_profiler:_busy_worker' in line for line in worker_lines)
+    stack, count = worker_lines[0].rsplit(' ', 1)
+    assert int(count) >= 1
+
+
+def test_start_stop_writes_collapsed_file(tmp_path):
+    """Фоновый сбор сэмплов и запись файла в формате collapsed stacks"""
+    profiler = SamplingProfiler(interval=0.001)
+    profiler.start()
+    assert profiler.is_running
+    time.sleep(0.05)
+    profiler.stop()
+
+    assert not profiler.is_running
+    assert profiler.samples > 0
+    path = profiler.write(str(tmp_path / 'profiles'))
+    assert path.endswith('.collapsed')
+    with open(path, encoding='utf-8') as f:
+        content = f.read()
+    # Поток профилировщика не попадает в собственные сэмплы
+    assert 'seditor-profiler' not in content
+    assert content.startswith('MainThread;')
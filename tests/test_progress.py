@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+Тесты для агрегированной передачи прогресса
+"""
+
+from seditor.utils.progress import ThrottledProgress, format_duration
+
+
+class FakeLoop:
+    """Цикл событий, откладывающий вызовы до run_pending"""
+
+    def __init__(self):
+        self.pending = []
+
+    def call_soon_threadsafe(self, callback, *args):
+        self.pending.append((callback, args))
+
+    def run_pending(self):
+        pending, self.pending = self.pending, []
+        for callback, args in pending:
+            callback(*args)
+
+
+class FakeClock:
+    """Управляемый источник времени"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_progress_is_rate_limited():
+    """Частые обновления схлопываются в одну доставку за интервал"""
+    loop, clock, received = FakeLoop(), FakeClock(), []
+    progress = ThrottledProgress(loop, received.append, min_interval=0.25, clock=clock)
+
+    for i in range(1, 1001):
+        clock.now = i * 0.0001
+        progress(i, 10000)
+
+    assert len(loop.pending) == 1
+    loop.run_pending()
+    assert len(received) == 1
+    # Доставляется последнее значение, а не первое
+    assert received[0].current == 1000
+
+    clock.now = 0.3
+    progress(1001, 10000)
+    loop.run_pending()
+    assert len(received) == 2
+
+
+def test_progress_final_update_always_delivered():
+    """Последнее обновление (current == total) не отбрасывается"""
+    loop, clock, received = FakeLoop(), FakeClock(), []
+    progress = ThrottledProgress(loop, received.append, clock=clock)
+
+    clock.now = 1.0
+    progress(1, 2)
+    loop.run_pending()
+    progress(2, 2)
+    loop.run_pending()
+
+    assert [s.current for s in received] == [1, 2]
+
+
+def test_progress_rate_and_eta():
+    """Скорость и оценка оставшегося времени"""
+    loop, clock, received = FakeLoop(), FakeClock(), []
+    progress = ThrottledProgress(loop, received.append, clock=clock)
+
+    clock.now = 10.0
+    progress(100, 300)
+    loop.run_pending()
+
+    snapshot = received[0]
+    assert snapshot.rate == 10.0
+    assert snapshot.eta == 20.0
+    assert '100/300' in snapshot.format()
+
+
+def test_progress_close_stops_delivery():
+    """После close() callback больше не вызывается"""
+    loop, clock, received = FakeLoop(), FakeClock(), []
+    progress = ThrottledProgress(loop, received.append, clock=clock)
+
+    progress(1, 10)
+    progress.close()
+    loop.run_pending()
+    assert received == []
+
+
+def test_format_duration():
+    """Форматирование длительности"""
+    assert format_duration(42) == '42 с'
+    assert format_duration(185) == '3 мин 05 с'
+    assert format_duration(3720) == '1 ч 02 мин'
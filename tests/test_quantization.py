@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+"""
+Тесты квантованного векторного хранилища
+"""
+
+import os
+import threading
+
+import numpy as np
+import pytest
+
+from seditor.search.embeddings import HashingEmbedder
+from seditor.search.quantization import QuantizedVectorStore
+from seditor.search.semantic_indexer import SemanticIndexer
+from seditor.search.vector_store import RowVectorStore
+
+
+def _vectors(count=200, dimension=64, seed=0):
+    rng = np.random.default_rng(seed)
+    vectors = rng.normal(size=(count, dimension)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+@pytest.mark.parametrize('mode', QuantizedVectorStore.MODES)
+def test_query_returns_exact_neighbours(tmp_path, mode):
+    """После доранжирования расстояния точные, ближайший вектор - сам запрос"""
+    vectors = _vectors()
+    store = QuantizedVectorStore(str(tmp_path), mode=mode)
+    ids = [f'id{i}' for i in range(len(vectors))]
+    store.upsert(ids, vectors, [{'row': i} for i in range(len(vectors))])
+
+    result = store.query([vectors[17]], n_results=5)
+
+    assert result['ids'][0][0] == 'id17'
+    assert result['metadatas'][0][0] == {'row': 17}
+    assert result['distances'][0][0] == pytest.approx(0.0, abs=1e-5)
+    expected = ((vectors - vectors[17]) ** 2).sum(axis=1)
+    assert result['distances'][0] == sorted(result['distances'][0])
+    assert result['distances'][0][1] == pytest.approx(np.sort(expected)[1], rel=1e-4)
+
+
+def test_codes_are_smaller_than_floats(tmp_path):
+    """int8 в 4 раза, бинарные коды в 32 раза меньше float32 (без служебных полей)"""
+    vectors = _vectors(dimension=256)
+    for mode, width in (('int8', 256), ('binary', 32)):
+        store = QuantizedVectorStore(str(tmp_path / mode), mode=mode)
+        store.upsert([str(i) for i in range(len(vectors))], vectors)
+        assert store.code_width == width
+
+
+def test_upsert_updates_existing_vector(tmp_path):
+    """Повторный upsert заменяет вектор и метаданные"""
+    vectors = _vectors(count=10)
+    store = QuantizedVectorStore(str(tmp_path))
+    store.upsert([str(i) for i in range(10)], vectors)
+    store.upsert(['3'], vectors[7:8], [{'updated': True}])
+
+    assert store.count() == 10
+    result = store.query([vectors[7]], n_results=2)
+    assert set(result['ids'][0]) == {'3', '7'}
+    assert store.get(['3'])['metadatas'] == [{'updated': True}]
+
+
+def test_flush_persists_and_compacts(tmp_path):
+    """Сохранённый индекс открывается заново, удалённые строки вычищаются"""
+    vectors = _vectors(count=50)
+    store = QuantizedVectorStore(str(tmp_path), mode='binary')
+    store.upsert([str(i) for i in range(50)], vectors, [{'row': i} for i in range(50)])
+    store.delete(['0', '1', '2'])
+    store.flush()
+
+    reopened = QuantizedVectorStore(str(tmp_path), mode='binary')
+    assert reopened.count() == 47
+    assert reopened.get(['0'])['ids'] == []
+    result = reopened.query([vectors[30]], n_results=1)
+    assert result['ids'][0] == ['30']
+    assert result['metadatas'][0] == [{'row': 30}]
+
+
+@pytest.mark.parametrize('crash_after_meta', [False, True])
+def test_compaction_survives_crash(tmp_path, monkeypatch, crash_after_meta):
+    """Сбой во время сохранения со сжатием не рассогласовывает meta.json и файл векторов"""
+    vectors = _vectors(count=50)
+    store = QuantizedVectorStore(str(tmp_path), mode='int8')
+    assert store.kind == 'int8' and 'KIND' not in vars(store)
+    store.upsert([str(i) for i in range(50)], vectors)
+    store.flush()
+    store.delete(['0', '1', '2'])
+
+    def crash(*args, **kwargs):
+        raise OSError('crash')
+
+    if crash_after_meta:
+        # meta.json заменён, остальные файлы ещё не встали на место
+        original = os.replace
+        monkeypatch.setattr('seditor.search.vector_store.os.replace',
+                            lambda src, dst: crash() if not dst.endswith('meta.json') else original(src, dst))
+    else:
+        monkeypatch.setattr('seditor.search.vector_store.stage_array', crash)
+    with pytest.raises(OSError):
+        store.flush()
+    monkeypatch.undo()
+
+    reopened = QuantizedVectorStore(str(tmp_path), mode='int8')
+    assert reopened.count() == (47 if crash_after_meta else 50)
+    reopened.upsert(['50'], vectors[:1])
+    reopened.flush()  # пишущее хранилище убирает остатки прерванного сохранения
+    assert not [path for path in tmp_path.iterdir() if path.suffix == '.tmp']
+    for i in (3, 30, 49):
+        assert reopened.query([vectors[i]], n_results=1)['ids'][0] == [str(i)]
+
+
+def test_load_during_flush_reads_one_save(tmp_path, monkeypatch):
+    """Чтение между заменой meta.json и файлов данных не смешивает два сохранения"""
+    vectors = _vectors(count=53)
+    writer = QuantizedVectorStore(str(tmp_path), mode='int8')
+    writer.upsert([str(i) for i in range(50)], vectors[:50], [{'row': i} for i in range(50)])
+    writer.flush()
+    # Сжатие и добавление: в новом сохранении столько же строк, но другие
+    writer.delete(['0', '1', '2'])
+    writer.upsert(['50', '51', '52'], vectors[50:], [{'row': i} for i in range(50, 53)])
+
+    committed, resume = threading.Event(), threading.Event()
+    original_replace = os.replace
+
+    def paused_replace(src, dst):
+        original_replace(src, dst)
+        if dst.endswith('meta.json'):
+            committed.set()
+            resume.wait(5)
+
+    monkeypatch.setattr('seditor.search.vector_store.os.replace', paused_replace)
+    thread = threading.Thread(target=writer.flush)
+    thread.start()
+    assert committed.wait(5)
+
+    # Первая проверка остатков у читателя прошла до фиксации
+    recover = RowVectorStore._recover
+    calls = []
+    monkeypatch.setattr(RowVectorStore, '_recover',
+                        lambda self, writer: calls.append(writer) if len(calls) < 1 else recover(self, writer))
+    reader = QuantizedVectorStore(str(tmp_path), mode='int8')
+    resume.set()
+    thread.join()
+
+    assert not reader.load_failed
+    assert reader.count() == 50
+    for i in (3, 30, 52):
+        result = reader.query([vectors[i]], n_results=1)
+        assert result['ids'][0] == [str(i)] and result['metadatas'][0] == [{'row': i}]
+
+
+def test_load_gives_up_on_torn_index(tmp_path, monkeypatch):
+    """Если согласованно прочитать не удаётся, хранилище пустое и load_failed выставлен"""
+    vectors = _vectors(count=20)
+    writer = QuantizedVectorStore(str(tmp_path), mode='int8')
+    writer.upsert([str(i) for i in range(20)], vectors)
+    writer.flush()
+    os.replace(tmp_path / 'codes.npy', tmp_path / 'codes.npy.old')
+    np.save(tmp_path / 'codes.npy', np.zeros((20, 64), dtype=np.int8))  # файл другого сохранения
+
+    monkeypatch.setattr(QuantizedVectorStore, 'LOAD_RETRY_DELAY', 0)
+    reader = QuantizedVectorStore(str(tmp_path), mode='int8')
+    assert reader.load_failed and reader.count() == 0
+
+
+def test_indexer_quantized_mode(tmp_path):
+    """SemanticIndexer индексирует и ищет через квантованное хранилище"""
+    (tmp_path / 'payments.py').write_text('def charge_invoice(order):\n    return payment_gateway.charge(order)\n')
+    (tmp_path / 'render.py').write_text('def draw_tree(layout):\n    return layout.render_frame()\n')
+    indexer = SemanticIndexer(str(tmp_path), embedder=HashingEmbedder(dimension=64), index_mode='int8')
+
+    assert indexer.index_directory() == 2
+    results = indexer.search('invoice payment', top_k=1)
+    assert results[0][1] == 'payments.py'
+
+    reopened = SemanticIndexer(str(tmp_path), embedder=HashingEmbedder(dimension=64), index_mode='int8')
+    assert reopened.is_indexed()
+    assert reopened.get_indexed_count() == 2
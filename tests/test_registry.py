@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""
+Тесты реестра индексаторов и поиска в поддиректории
+"""
+
+import os
+
+from seditor.search.registry import IndexerRegistry
+from seditor.search.semantic_indexer import SemanticIndexer
+
+
+def _factory(root):
+    return SemanticIndexer(root, embedder='hash', index_mode='int8')
+
+
+def _project(root):
+    files = {
+        'api/payments.py': 'def charge_payment_card():\n    pass\n',
+        'api/users.py': 'def create_user_account():\n    pass\n',
+        'web/payments.py': 'def charge_payment_card():\n    pass\n',
+        'web/checkout.py': 'def checkout_payment_form():\n    pass\n',
+    }
+    for rel_path, text in files.items():
+        path = root / rel_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text)
+
+
+def test_registry_shares_indexers(tmp_path):
+    """Один индексатор на корень, модель общая"""
+    registry = IndexerRegistry(_factory)
+    first = registry.get(str(tmp_path))
+    assert registry.get(str(tmp_path) + os.sep) is first
+    (tmp_path / 'other').mkdir()
+    assert registry.get(str(tmp_path / 'other')).embedder is first.embedder
+    assert len(registry) == 2
+
+
+def test_nested_directory_reuses_parent_index(tmp_path):
+    """Поддиректория ищет по индексу корня с фильтром, без своего .seditor"""
+    _project(tmp_path)
+    registry = IndexerRegistry(_factory)
+    registry.get(str(tmp_path)).index_directory()
+
+    scope = registry.find_scope(str(tmp_path / 'web'))
+    assert scope.indexer is registry.get(str(tmp_path))
+    assert scope.prefix == 'web'
+    assert not (tmp_path / 'web' / '.seditor').exists()
+
+    results = scope.search('charge payment card', top_k=5)
+    paths = [path for path, _, _ in results]
+    assert paths and all(path.startswith(str(tmp_path / 'web') + os.sep) for path in paths)
+    # Копия из api/ свёрнута в запись, но в области web/ показывается файл из web/
+    assert os.path.join(str(tmp_path), 'web', 'payments.py') in paths
+
+
+def test_saved_index_found_from_new_process(tmp_path):
+    """Индекс, сохранённый на диске, находится из поддиректории новым реестром"""
+    _project(tmp_path)
+    _factory(str(tmp_path)).index_directory()
+    (tmp_path / 'empty').mkdir()
+
+    registry = IndexerRegistry(_factory)
+    assert registry.find_scope(str(tmp_path / 'api')).prefix == 'api'
+    # В индексе нет файлов внутри директории - индекс её не покрывает
+    assert registry.find_scope(str(tmp_path / 'empty')) is None
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""
+Тесты приоритетного порядка и темпа индексации
+"""
+
+import os
+import sys
+import threading
+import time
+import types
+
+from seditor.search.embeddings import HashingEmbedder
+from seditor.search.scheduler import IdleThrottle, IndexPriorities, prioritize_files
+from seditor.search.semantic_indexer import SemanticIndexer
+
+
+def test_prioritize_files_order():
+    """Директория открытого файла, недавние, раскрытые узлы, остальные"""
+    root = os.path.abspath('/repo')
+    paths = {name: os.path.join(root, *name.split('/')) for name in (
+        'a/old.py', 'b/recent.py', 'c/d/inner.py', 'e/other.py', 'open/x.py', 'open/y.py', 'open/sub/z.py',
+    )}
+    mtimes = {paths['b/recent.py']: 100.0}
+    priorities = IndexPriorities(
+        focus_dirs=(os.path.join(root, 'open'),),
+        expanded_dirs=(os.path.join(root, 'c'),),
+        recent_limit=1,
+    )
+    ordered = prioritize_files(list(paths.values()), priorities, lambda path: mtimes.get(path, 0.0))
+    names = [os.path.relpath(path, root).replace(os.sep, '/') for path in ordered]
+
+    assert names == ['open/x.py', 'open/y.py', 'b/recent.py', 'c/d/inner.py',
+                     'a/old.py', 'e/other.py', 'open/sub/z.py']
+
+
+def test_search_during_indexing(tmp_path):
+    """Поиск отвечает по частичному индексу, приоритетная директория индексируется первой"""
+    for i in range(30):
+        directory = tmp_path / f'pkg{i % 3}'
+        directory.mkdir(exist_ok=True)
+        (directory / f'module{i}.py').write_text(f'def handler_{i}():\n    return {i}\n')
+    (tmp_path / 'focus').mkdir()
+    (tmp_path / 'focus' / 'payments.py').write_text('def charge_payment_card():\n    pass\n')
+
+    indexer = SemanticIndexer(str(tmp_path), embedder=HashingEmbedder(dimension=64), index_mode='int8')
+    cancel = threading.Event()
+    partial = []
+
+    def progress(current, total):
+        if current == 12:
+            partial.append(indexer.search('charge payment card', top_k=3))
+            cancel.set()
+
+    priorities = IndexPriorities(focus_dirs=(str(tmp_path / 'focus'),), recent_limit=0)
+    indexer.index_directory(progress, cancel, priorities)
+
+    assert partial and partial[0][0][1] == 'payments.py'
+    assert not indexer.is_indexed()
+
+
+def test_idle_throttle_waits_for_idle(monkeypatch):
+    """Батч ждёт простоя; во время набора torch ограничен, в простое лимит снимается"""
+    calls = []
+    fake_torch = types.SimpleNamespace(get_num_threads=lambda: 8, set_num_threads=calls.append)
+    monkeypatch.setitem(sys.modules, 'torch', fake_torch)
+
+    throttle = IdleThrottle(idle_ms=50, max_pause=0.02)
+    assert throttle.wait_idle() == 0.0
+
+    throttle.touch()
+    assert 0.015 <= throttle.wait_idle() < 0.05
+    assert calls == [1]  # пауза исчерпана, а набор продолжается
+
+    time.sleep(0.06)
+    assert throttle.is_idle()
+    throttle.wait_idle()
+    assert calls == [1, 8]
+
+
+def test_idle_throttle_cancel():
+    """Отмена прерывает ожидание"""
+    throttle = IdleThrottle(idle_ms=10_000, max_pause=10.0)
+    throttle.touch()
+    cancel = threading.Event()
+    cancel.set()
+    assert throttle.wait_idle(cancel) < 1.0
+
+
+def test_indexing_pauses_while_typing(tmp_path):
+    """Индексация идёт только после простоя"""
+    for i in range(25):
+        (tmp_path / f'module{i}.py').write_text(f'def handler_{i}():\n    return {i}\n')
+    indexer = SemanticIndexer(str(tmp_path), embedder=HashingEmbedder(dimension=32), index_mode='int8')
+    throttle = IdleThrottle(idle_ms=100)
+    throttle.touch()
+
+    started = time.monotonic()
+    assert indexer.index_directory(throttle=throttle) == 25
+    assert time.monotonic() - started >= 0.09
+
+
+def test_typed_text_pauses_indexing():
+    """Ввод текста в редакторе (стандартная привязка self-insert) отмечает активность"""
+    import asyncio
+
+    from prompt_toolkit.application.current import set_app
+    from prompt_toolkit.key_binding.key_processor import KeyPress
+
+    from seditor.core.app_ptk import AppPTK
+
+    app = AppPTK()
+    app.layout.focus(app.editor_window)
+    assert app._idle_throttle.is_idle()
+
+    async def type_text():
+        with set_app(app.app):
+            app.app.key_processor.feed_multiple([KeyPress(char) for char in 'hello'])
+            app.app.key_processor.process_keys()
+
+    asyncio.run(type_text())
+    assert app.editor_pane.buffer.text == 'hello'
+    assert not app._idle_throttle.is_idle()
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""
+Тесты для покадрового вывода с диффом
+"""
+
+from seditor.components.file_tree import FileTreePane
+from seditor.terminal.layout import Layout
+from seditor.terminal.screen import DiffRenderer, Frame
+
+
+def test_first_frame_is_full_and_identical_frame_is_empty():
+    """Первый кадр выводится целиком, повторный без изменений - пустой"""
+    renderer = DiffRenderer()
+    frame = Frame(10, 2)
+    frame.put(0, 0, 'hello')
+
+    first = renderer.render(frame)
+    assert 'hello' in first
+
+    same = Frame(10, 2)
+    same.put(0, 0, 'hello')
+    assert renderer.render(same) == ''
+
+
+def test_only_changed_run_is_emitted():
+    """Выводится только изменившаяся серия ячеек"""
+    renderer = DiffRenderer()
+    old = Frame(40, 3)
+    old.put(0, 1, 'a' * 40)
+    renderer.render(old)
+
+    new = Frame(40, 3)
+    new.put(0, 1, 'a' * 20 + 'b' + 'a' * 19)
+    output = renderer.render(new)
+
+    assert output.startswith('\x1b[2;21H')
+    assert 'b' in output
+    assert 'a' not in output
+
+
+def test_style_change_is_emitted():
+    """Изменение только стиля тоже приводит к выводу"""
+    renderer = DiffRenderer()
+    old = Frame(5, 1)
+    old.put(0, 0, 'x')
+    renderer.render(old)
+
+    new = Frame(5, 1)
+    new.put(0, 0, 'x', '1')
+    assert '\x1b[0;1mx' in renderer.render(new)
+
+
+def test_wide_characters_occupy_two_cells():
+    """Широкий символ занимает две ячейки и выводится один раз"""
+    frame = Frame(6, 1)
+    end = frame.put(0, 0, '🐠ab')
+    assert end == 4
+    assert frame.rows[0][1][0] == ''
+    assert DiffRenderer().render(frame).count('🐠') == 1
+
+
+def test_tree_navigation_emits_fewer_bytes_than_full_redraw(tmp_path):
+    """Перемещение выделения выводит меньше байт, чем полная перерисовка"""
+    for i in range(20):
+        (tmp_path / f'file_{i:02d}.txt').write_text('x')
+    pane = FileTreePane(Layout(100, 30), str(tmp_path))
+    renderer = DiffRenderer()
+
+    full = pane.render(renderer, focused=True)
+    pane.move_down()
+    diff = pane.render(renderer, focused=True)
+
+    assert 0 < len(diff.encode()) < len(full.encode()) / 5
@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+"""
+Тесты переносимых снимков индекса
+"""
+
+import json
+import logging
+import os
+import shutil
+import zipfile
+
+import pytest
+
+from seditor.search.semantic_indexer import SemanticIndexer
+from seditor.search.snapshot import (
+    Snapshot,
+    SnapshotError,
+    export_snapshot,
+    import_snapshot,
+    main as snapshot_main,
+    restore_snapshot,
+    snapshot_name,
+)
+
+FILES = {
+    'billing.py': 'def charge_payment_card(amount):\n    return amount\n',
+    'accounts.py': 'def create_user_account(name):\n    return name\n',
+    'docs/readme.md': '# Payments service\n\nCharges cards.\n',
+}
+
+
+def _repository(root):
+    for name, text in FILES.items():
+        path = root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text)
+    return root
+
+
+def _indexer(root, index_mode='int8'):
+    return SemanticIndexer(str(root), embedder='hash', index_mode=index_mode)
+
+
+@pytest.mark.parametrize('index_mode', ['int8', 'ivf'])
+def test_snapshot_round_trip(tmp_path, monkeypatch, index_mode):
+    """Индекс из снимка ищет так же, как исходный, без повторного эмбеддинга"""
+    source = _indexer(_repository(tmp_path / 'ci'), index_mode)
+    source.index_directory()
+    path = export_snapshot(source, str(tmp_path), commit='abc123')
+    assert os.path.basename(path) == snapshot_name('abc123')
+    expected = source.search('create user account', top_k=3)
+
+    clone = tmp_path / 'clone'
+    shutil.copytree(tmp_path / 'ci', clone, ignore=shutil.ignore_patterns('.seditor'))
+    target = _indexer(clone, index_mode)
+    manifest = import_snapshot(target, path)
+    assert manifest['commit'] == 'abc123'
+    assert not target.checkpoint.complete  # локальные отличия ещё не проверены
+
+    encoded = []
+    original = target.embedder.encode
+    monkeypatch.setattr(target.embedder, 'encode',
+                        lambda texts, **kwargs: encoded.append(len(texts)) or original(texts, **kwargs))
+    results = target.search('create user account', top_k=3)
+    assert [(name, score) for _, name, score in results] == [(name, score) for _, name, score in expected]
+    assert results[0][0] == os.path.join(str(clone), 'accounts.py')
+
+    # Догоняющий проход не эмбеддит содержимое, уже лежащее в снимке
+    encoded.clear()
+    (clone / 'accounts.py').write_text(FILES['accounts.py'])  # другой mtime, то же содержимое
+    (clone / 'orders.py').write_text('def place_order():\n    pass\n')
+    assert target.index_directory() == 4
+    assert encoded == [1]
+    assert target.checkpoint.complete
+
+
+def test_snapshot_stores_files_as_is(tmp_path):
+    """Массивы хранилища лежат в снимке без сжатия и побайтно совпадают с исходными"""
+    indexer = _indexer(_repository(tmp_path))
+    indexer.index_directory()
+    path = export_snapshot(indexer, str(tmp_path / 'index.snapshot'))
+
+    with Snapshot(path) as snapshot:
+        names = snapshot.store_files()
+        assert 'meta.json' in names and 'vectors.f32' in names
+        for name in names:
+            if name == 'meta.json':
+                continue
+            with open(os.path.join(indexer.store_directory, name), 'rb') as f:
+                assert snapshot.read('store/' + name) == f.read()
+    with zipfile.ZipFile(path) as archive:
+        assert archive.getinfo('store/meta.json').compress_type == zipfile.ZIP_DEFLATED
+        assert archive.getinfo('store/vectors.f32').compress_type == zipfile.ZIP_STORED
+
+
+def test_snapshot_rejects_incompatible(tmp_path):
+    """Снимок другой версии или другого режима индекса не загружается"""
+    indexer = _indexer(_repository(tmp_path / 'repo'))
+    indexer.index_directory()
+    path = export_snapshot(indexer, str(tmp_path / 'index.snapshot'))
+
+    with pytest.raises(SnapshotError):
+        import_snapshot(_indexer(tmp_path / 'repo', 'binary'), path)
+
+    newer = str(tmp_path / 'newer.snapshot')
+    with zipfile.ZipFile(path) as src, zipfile.ZipFile(newer, 'w') as dst:
+        for info in src.infolist():
+            data = src.read(info)
+            if info.filename == 'manifest.json':
+                manifest = json.loads(data)
+                manifest['version'] += 1
+                data = json.dumps(manifest)
+            dst.writestr(info, data)
+    with pytest.raises(SnapshotError):
+        Snapshot(newer)
+
+    chroma = SemanticIndexer(str(tmp_path / 'repo'), embedder='hash', index_mode='chroma')
+    with pytest.raises(SnapshotError):
+        export_snapshot(chroma)
+    with pytest.raises(SnapshotError):
+        import_snapshot(chroma, path)
+
+
+def test_restore_snapshot_from_directory(tmp_path, monkeypatch):
+    """Первая индексация берёт снимок из SEDITOR_SNAPSHOT_DIR, имеющийся индекс не трогается"""
+    source = _indexer(_repository(tmp_path / 'ci'))
+    source.index_directory()
+    snapshots = tmp_path / 'snapshots'
+    snapshots.mkdir()
+    export_snapshot(source, str(snapshots))
+    monkeypatch.setenv('SEDITOR_SNAPSHOT_DIR', str(snapshots))
+
+    clone = tmp_path / 'clone' / 'ci'  # то же имя - тот же репозиторий без remote
+    shutil.copytree(tmp_path / 'ci', clone, ignore=shutil.ignore_patterns('.seditor'))
+    target = _indexer(clone)
+    assert restore_snapshot(target)['files'] == len(FILES)
+    assert target.get_indexed_count() == len(FILES)
+    assert restore_snapshot(target) is None
+
+
+def test_snapshot_unsupported_in_chroma_mode(tmp_path, monkeypatch, caplog):
+    """В режиме chroma снимок не загружается молча: редактор пишет в лог, команда завершается с ошибкой"""
+    repo = _repository(tmp_path / 'repo')
+    monkeypatch.setenv('SEDITOR_SNAPSHOT_DIR', str(tmp_path))
+    monkeypatch.setenv('SEDITOR_INDEX_MODE', 'chroma')
+    with caplog.at_level(logging.WARNING, logger='seditor.search.snapshot'):
+        assert restore_snapshot(SemanticIndexer(str(repo), embedder='hash')) is None
+    assert 'not supported in chroma mode' in caplog.text
+
+    assert snapshot_main(['export', str(repo), '--embedder', 'hash']) == 1
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""
+Тесты отсева бинарных, минифицированных и сгенерированных файлов
+"""
+
+from seditor.search.embeddings import HashingEmbedder
+from seditor.search.semantic_indexer import SemanticIndexer
+from seditor.search.sniff import (
+    SKIP_BINARY, SKIP_GENERATED, SKIP_MINIFIED, format_skip_counts, sniff_head, sniff_name,
+)
+
+
+def test_sniff_head_reasons():
+    """Причины пропуска определяются по первым байтам"""
+    assert sniff_head(b'def main():\n    return 1\n') is None
+    assert sniff_head('# Привет\nтекст\n'.encode('utf-8')) is None
+    assert sniff_head(b'abc\0def') == SKIP_BINARY
+    assert sniff_head(bytes(range(1, 32)) * 10) == SKIP_BINARY
+    assert sniff_head(b'var a=1;' * 1000) == SKIP_MINIFIED
+    assert sniff_head(b'// Code generated by protoc. DO NOT EDIT.\npackage x\n') == SKIP_GENERATED
+    # Маркер далеко от начала файла не учитывается
+    assert sniff_head(b'x = 1\n' * 10 + b'# @generated\n') is None
+
+
+def test_sniff_name():
+    """Lock-файлы и .min.js распознаются по имени"""
+    assert sniff_name('package-lock.json') == SKIP_GENERATED
+    assert sniff_name('app.min.js') == SKIP_MINIFIED
+    assert sniff_name('service_pb2.py') == SKIP_GENERATED
+    assert sniff_name('app.js') is None
+
+
+def test_indexer_counts_skipped_files(tmp_path):
+    """Индексатор не эмбеддит отсеянные файлы и считает их по причинам"""
+    (tmp_path / 'main.py').write_text('def main():\n    pass\n')
+    (tmp_path / 'bundle.js').write_text('x=1;' * 2000)
+    (tmp_path / 'data.json').write_bytes(b'{"a": 1}\0\0')
+    (tmp_path / 'package-lock.json').write_text('{}')
+    (tmp_path / 'gen.py').write_text('# @generated by tool\nx = 1\n')
+
+    indexer = SemanticIndexer(str(tmp_path), embedder=HashingEmbedder(dimension=32), index_mode='int8')
+    assert indexer.index_directory() == 1
+    assert indexer.get_indexed_count() == 1
+    assert indexer.skip_counts == {SKIP_MINIFIED: 1, SKIP_BINARY: 1, SKIP_GENERATED: 2}
+    assert format_skip_counts(indexer.skip_counts) == 'бинарные 1, сгенерированные 2, минифицированные 1'
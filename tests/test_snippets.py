@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+"""
+Тесты метаданных фрагментов и ленивого чтения предпросмотра
+"""
+
+from seditor.search.embeddings import HashingEmbedder
+from seditor.search.semantic_indexer import SemanticIndexer
+from seditor.search.snippets import read_snippet
+
+
+def test_read_snippet_bounds(tmp_path):
+    """Читаются непустые строки внутри байтовых границ"""
+    path = tmp_path / 'notes.txt'
+    path.write_bytes(b'\n\nfirst line\nsecond line\nthird line\n')
+
+    assert read_snippet(str(path)) == 'first line\nsecond line'
+    assert read_snippet(str(path), byte_start=13, max_lines=1) == 'second line'
+    assert read_snippet(str(path), byte_end=5) == 'fir'
+    assert read_snippet(str(path), max_lines=1, max_width=5) == 'firs…'
+    assert read_snippet(str(tmp_path / 'missing.txt')) is None
+
+
+def test_index_stores_offsets_not_documents(tmp_path):
+    """В индексе хэш и границы фрагмента, предпросмотр читается из файла"""
+    (tmp_path / 'payments.py').write_text('# payment gateway\ndef charge(card):\n    return card\n')
+    indexer = SemanticIndexer(str(tmp_path), embedder=HashingEmbedder(dimension=32), index_mode='int8')
+    indexer.index_directory()
+
+    stored = indexer._collection.get()
+    metadata = stored['metadatas'][0]
+    assert 'documents' not in stored
+    assert metadata['content_hash'] == stored['ids'][0]
+    assert (metadata['byte_start'], metadata['byte_end']) == (0, (tmp_path / 'payments.py').stat().st_size)
+    assert (metadata['line_start'], metadata['line_end']) == (1, 3)
+
+    path, _, _ = indexer.search('payment charge card', top_k=1)[0]
+    assert indexer.get_snippet(path) == '# payment gateway\ndef charge(card):'
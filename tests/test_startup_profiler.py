@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""
+Тесты профиля холодного старта и ленивых импортов
+"""
+
+import os
+import subprocess
+import sys
+
+from prompt_toolkit.utils import Event
+
+from seditor.utils.startup_profiler import StartupProfiler
+
+
+class _App:
+    """Минимальная замена Application: только событие after_render"""
+
+    def __init__(self):
+        self.after_render = Event(self)
+
+
+def test_import_search_package_is_lazy():
+    """Импорт seditor.search и SemanticIndexer не загружает chromadb, sentence_transformers и torch"""
+    # Попытки импорта записываются, даже если пакеты не установлены
+    code = (
+        'import sys\n'
+        'attempted = []\n'
+        'class Recorder:\n'
+        '    def find_spec(self, name, path=None, target=None):\n'
+        '        if name.split(".")[0] in ("chromadb", "sentence_transformers", "torch"):\n'
+        '            attempted.append(name)\n'
+        '        return None\n'
+        'sys.meta_path.insert(0, Recorder())\n'
+        'import seditor.search\n'
+        'from seditor.search import SemanticIndexer\n'
+        'import seditor.core.app_ptk\n'
+        'print(",".join(attempted))\n'
+    )
+    repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True,
+                            cwd=repo_root)
+    assert result.stdout.strip() == ''
+
+
+def test_startup_profiler_reports_stages():
+    """Отчёт содержит этапы, импорты и время первого кадра"""
+    profiler = StartupProfiler()
+    with profiler.stage('AppPTK()'):
+        pass
+    profiler.import_module('json')
+    app = _App()
+    profiler.attach(app)
+    assert 'первый кадр не был отрисован' in profiler.report()
+
+    app.after_render.fire()
+    app.after_render.fire()  # повторные кадры не меняют отметку
+    first_frame = profiler.first_frame_ms
+    assert first_frame is not None and first_frame >= 0
+
+    report = profiler.report()
+    assert [name for name, _ in profiler.stages] == ['AppPTK()', 'import json (уже загружен)']
+    assert 'AppPTK()' in report and 'import json' in report
+    assert 'первый кадр от запуска' in report
@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+"""
+Тесты для генератора синтетических репозиториев
+"""
+
+import os
+
+from benchmarks.synthetic_repo import generate_repo
+
+
+def _snapshot(root):
+    result = {}
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            with open(path, encoding='utf-8') as f:
+                result[os.path.relpath(path, root)] = f.read()
+    return result
+
+
+def test_generate_repo_is_deterministic(tmp_path):
+    """Одинаковый seed даёт одинаковые файлы и содержимое"""
+    first = generate_repo(str(tmp_path / 'a'), files=40, depth=2, fanout=3, seed=7)
+    generate_repo(str(tmp_path / 'b'), files=40, depth=2, fanout=3, seed=7)
+
+    assert len(first.files) == 40
+    assert _snapshot(tmp_path / 'a') == _snapshot(tmp_path / 'b')
+
+
+def test_generate_repo_shape(tmp_path):
+    """Глубина, ветвление, языки и размеры соблюдаются"""
+    stats = generate_repo(str(tmp_path), files=30, depth=2, fanout=2,
+                          languages=['python', 'go'], size_range=(100, 1000))
+
+    assert len(stats.directories) == 1 + 2 + 4
+    assert set(stats.by_language) == {'python', 'go'}
+    for path in stats.files:
+        assert os.path.splitext(path)[1] in ('.py', '.go')
+        assert os.path.getsize(path) < 2000
+
+
+def test_generate_repo_duplicates(tmp_path):
+    """duplicate_ratio создаёт файлы с повторяющимся содержимым"""
+    generate_repo(str(tmp_path), files=60, depth=1, fanout=2, seed=3, duplicate_ratio=0.5)
+
+    contents = list(_snapshot(tmp_path).values())
+    assert len(contents) == 60
+    assert len(set(contents)) < 45
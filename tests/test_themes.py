@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""
+Тесты для реестра тем
+"""
+
+from seditor.components.command_palette import CommandPalette
+from seditor.core.themes import ThemeRegistry, ThemeStyle
+
+
+def test_registry_compiles_lazily_once():
+    """Тема компилируется при первом обращении и переиспользуется"""
+    registry = ThemeRegistry()
+    assert not registry.is_compiled('monokai')
+
+    first = registry.get('monokai')
+    assert registry.is_compiled('monokai')
+    assert registry.get('monokai') is first
+
+
+def test_all_palette_themes_compile():
+    """Все темы из палитры компилируются (с запасной подсветкой при необходимости)"""
+    registry = ThemeRegistry()
+    for _, theme_id in CommandPalette.AVAILABLE_THEMES:
+        theme = registry.get(theme_id)
+        attrs = theme.get_attrs_for_style_str('class:status.message')
+        assert attrs.color == '9cdcfe'
+
+
+def test_theme_style_switch_is_pointer_swap():
+    """Переключение темы меняет хэш инвалидации, но не пересоздаёт темы"""
+    registry = ThemeRegistry()
+    style = ThemeStyle(registry, 'vscode-dark')
+    vscode = registry.get('vscode-dark')
+
+    style.activate('monokai')
+    monokai_hash = style.invalidation_hash()
+    style.activate('vscode-dark')
+
+    assert style.invalidation_hash() != monokai_hash
+    assert registry.get('vscode-dark') is vscode
+    assert style.theme_id == 'vscode-dark'
+
+
+def test_unknown_theme_falls_back():
+    """Неизвестная тема Pygments использует запасную подсветку"""
+    registry = ThemeRegistry()
+    theme = registry.get('no-such-theme')
+    assert theme.get_attrs_for_style_str('class:pygments.keyword').color == 'c586c0'
+
+
+def test_app_theme_switch_does_not_rebuild_style(monkeypatch):
+    """Переключение между скомпилированными темами не собирает новый Style"""
+    from prompt_toolkit.styles import Style
+
+    from seditor.core.app_ptk import AppPTK
+
+    app = AppPTK()
+    renderer_style = app.app.renderer.style
+    app.theme_registry.get('monokai')  # обе темы уже скомпилированы
+
+    built = []
+    original_init = Style.__init__
+    monkeypatch.setattr(Style, '__init__', lambda self, rules: built.append(rules) or original_init(self, rules))
+
+    colors = []
+    for theme_id in ('monokai', 'vscode-dark', 'monokai', 'vscode-dark'):
+        app._change_theme(theme_id)
+        colors.append(renderer_style.get_attrs_for_style_str('class:pygments.keyword').color)
+    assert built == []
+    assert app.app.renderer.style is renderer_style
+    monokai = app.theme_registry.get('monokai').get_attrs_for_style_str('class:pygments.keyword').color
+    assert colors == [monokai, 'c586c0', monokai, 'c586c0'] and monokai != 'c586c0'
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""
+Тесты индексации в дочернем процессе
+"""
+
+import asyncio
+import sys
+import threading
+import time
+
+import pytest
+
+from seditor.search.semantic_indexer import SemanticIndexer
+from seditor.search.worker import IndexWorker, IndexWorkerError
+
+
+def _project(root, count=15):
+    for i in range(count):
+        (root / f'module{i}.py').write_text(f'def handler_{i}():\n    return {i}\n')
+    (root / 'payments.py').write_text('def charge_payment_card():\n    pass\n')
+
+
+def test_worker_indexes_and_parent_reloads(tmp_path):
+    """Процесс индексирует, прогресс приходит по каналу, редактор видит индекс"""
+    _project(tmp_path)
+    indexer = SemanticIndexer(str(tmp_path), embedder='hash', index_mode='int8')
+    assert indexer.get_indexed_count() == 0  # хранилище открыто до индексации
+
+    # Хранилище перечитывается не в потоке цикла событий
+    reload_threads = []
+    original_reload = indexer.reload
+    indexer.reload = lambda: reload_threads.append(threading.current_thread()) or original_reload()
+
+    updates = []
+    worker = IndexWorker(indexer, nice=5)
+    indexed = asyncio.run(worker.run(lambda current, total: updates.append((current, total))))
+
+    assert reload_threads and threading.main_thread() not in reload_threads
+    assert indexed == 16
+    assert updates[-1] == (16, 16)
+    assert indexer.is_indexed()
+    assert indexer.search('charge payment card', top_k=1)[0][1] == 'payments.py'
+
+
+@pytest.mark.skipif(not sys.platform.startswith('linux'), reason='RLIMIT_AS проверяется на Linux')
+def test_worker_failure_is_reported(tmp_path):
+    """Падение процесса (здесь - нехватка памяти) не роняет редактор, а становится ошибкой"""
+    _project(tmp_path, count=1)
+    indexer = SemanticIndexer(str(tmp_path), embedder='hash', index_mode='int8')
+    worker = IndexWorker(indexer, memory_limit_mb=1)
+
+    with pytest.raises(IndexWorkerError):
+        asyncio.run(worker.run())
+    assert not indexer.is_indexed()
+
+
+def test_worker_stop_kills_after_timeout(tmp_path):
+    """stop() дожидается выхода процесса; не вышедший вовремя процесс завершается принудительно"""
+    _project(tmp_path)
+    indexer = SemanticIndexer(str(tmp_path), embedder='hash', index_mode='int8')
+    worker = IndexWorker(indexer)
+
+    async def scenario():
+        run = asyncio.ensure_future(worker.run())
+        while worker._process is None:
+            await asyncio.sleep(0.01)
+        process = worker._process
+        await worker.stop(timeout=0)
+        assert process.returncode is not None
+        with pytest.raises(IndexWorkerError):
+            await run
+
+    asyncio.run(scenario())
+
+
+class _SlowIndexer:
+    """Индексатор, который после отмены ещё некоторое время дописывает хранилище"""
+
+    index_mode = 'chroma'  # без снимков
+
+    def __init__(self, name, events):
+        self.name = name
+        self.events = events
+        self.skip_counts = {}
+
+    def index_directory(self, progress, cancel, priorities, throttle):
+        self.events.append(f'start {self.name}')
+        cancel.wait(5)
+        time.sleep(0.1)
+        self.events.append(f'end {self.name}')
+        return 0
+
+
+def test_new_indexing_waits_for_cancelled_thread(monkeypatch):
+    """Следующий проход начинается только после остановки потока отменённого прохода"""
+    from seditor.core.app_ptk import AppPTK
+
+    monkeypatch.setenv('SEDITOR_INDEX_WORKER', 'thread')
+    app = AppPTK()
+    events = []
+
+    async def scenario():
+        app._indexing_task = asyncio.ensure_future(app._index_directory_async(_SlowIndexer('first', events)))
+        while not events:
+            await asyncio.sleep(0.01)
+        app._cancel_indexing()
+        second = _SlowIndexer('second', events)
+        second.index_directory = lambda *args: events.append('start second') or 0
+        await app._index_directory_async(second)
+
+    asyncio.run(scenario())
+    assert events == ['start first', 'end first', 'start second']
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+Тесты рабочего пространства из нескольких корней
+"""
+
+import os
+
+from seditor.search.registry import IndexerRegistry
+from seditor.search.semantic_indexer import SemanticIndexer
+from seditor.search.workspace import Workspace, merge_results
+
+
+def _registry():
+    return IndexerRegistry(lambda root: SemanticIndexer(root, embedder='hash', index_mode='int8'))
+
+
+def test_merge_results_k_way():
+    """Слияние отсортированных ответов шардов в общий top-k без повторов"""
+    first = [('/a/x.py', 'x.py', 0.9), ('/a/y.py', 'y.py', 0.4)]
+    second = [('/b/z.py', 'z.py', 0.7), ('/a/x.py', 'x.py', 0.6), ('/b/w.py', 'w.py', 0.1)]
+    merged = merge_results([first, second], top_k=3)
+    assert [path for path, _, _ in merged] == ['/a/x.py', '/b/z.py', '/a/y.py']
+
+
+def test_workspace_fan_out_search(tmp_path, monkeypatch):
+    """Каждый корень - свой шард; поиск идёт по всем, время шардов записывается"""
+    registry = _registry()
+    roots = []
+    for name, text in (('billing', 'def charge_payment_card():\n    pass\n'),
+                       ('accounts', 'def create_user_account():\n    pass\n')):
+        root = tmp_path / name
+        root.mkdir()
+        (root / f'{name}.py').write_text(text)
+        (root / 'readme.md').write_text(f'# {name} service\n')
+        registry.get(str(root)).index_directory()
+        roots.append(str(root))
+
+    workspace = Workspace(roots + [roots[0]], registry=registry)
+    assert len(workspace) == 2
+    encoded = []
+    embedder = registry.get(roots[0]).embedder
+    original = embedder.encode
+    monkeypatch.setattr(embedder, 'encode',
+                        lambda texts, **kwargs: encoded.append(texts) or original(texts, **kwargs))
+
+    results = workspace.search('create user account', top_k=3)
+    assert results[0][0] == os.path.join(roots[1], 'accounts.py')
+    assert {os.path.dirname(path) for path, _, _ in results} == set(roots)
+    assert len(encoded) == 1  # одна модель - один эмбеддинг запроса
+    assert [latency.root for latency in workspace.last_latencies] == roots
+    assert all(latency.results and latency.error is None for latency in workspace.last_latencies)
+    assert workspace.get_snippet(results[0][0]) == 'def create_user_account():\npass'
+    workspace.close()
+
+
+def test_shards_cached_until_roots_change(tmp_path, monkeypatch):
+    """Области поиска не пересчитываются на каждый запрос, а только при смене корней или реестра"""
+    registry = _registry()
+    for name in ('api', 'web'):
+        (tmp_path / name).mkdir()
+        (tmp_path / name / f'{name}.py').write_text(f'def {name}_handler():\n    pass\n')
+    registry.get(str(tmp_path)).index_directory()
+
+    calls = []
+    original = registry.scope_for
+    monkeypatch.setattr(registry, 'scope_for', lambda directory: calls.append(directory) or original(directory))
+    workspace = Workspace([str(tmp_path / 'api')], registry=registry)
+    workspace.search('handler')
+    workspace.search('handler')
+    assert calls == [str(tmp_path / 'api')]
+
+    workspace.add_root(str(tmp_path / 'web'))
+    shards = workspace.shards()
+    assert len(calls) == 3
+    assert {scope.prefix for scope in shards} == {'api', 'web'}
+    assert all(scope.indexer is registry.get(str(tmp_path)) for scope in shards)
+
+    registry.get(str(tmp_path / 'web'))  # новый индексатор в реестре
+    workspace.shards()
+    assert len(calls) == 5
+    workspace.close()
+
+
+def test_shards_of_one_indexer_keep_own_metadata(tmp_path):
+    """Шарды одного индексатора не делят метаданные результатов"""
+    registry = _registry()
+    for name in ('api', 'web'):
+        (tmp_path / name).mkdir()
+        (tmp_path / name / f'{name}.py').write_text(f'# {name} module\ndef {name}_handler():\n    pass\n')
+    indexer = registry.get(str(tmp_path))
+    indexer.index_directory()
+
+    workspace = Workspace([str(tmp_path / 'api'), str(tmp_path / 'web')], registry=registry)
+    results = workspace.search('handler module', top_k=4)
+    assert {os.path.basename(path) for path, _, _ in results} == {'api.py', 'web.py'}
+    assert indexer._result_metadata == {}  # поиск по шардам не трогает состояние индексатора
+    for path, _, _ in results:
+        name = os.path.basename(path)[:-3]
+        assert workspace.get_snippet(path) == f'# {name} module\ndef {name}_handler():'
+
+    metadata = {}
+    found = indexer.search_vector(indexer.encode_query('handler'), top_k=1, path_prefix='web', metadata=metadata)
+    assert list(metadata) == [found[0][0]]
+    assert metadata[found[0][0]]['relative_path'] == os.path.join('web', 'web.py')
+    workspace.close()